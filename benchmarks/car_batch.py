@@ -0,0 +1,70 @@
+"""Car-steps/second of `CarBatch` against a Python loop over `Car.update`.
+
+    python -m benchmarks.car_batch --cars 1000 --steps 200
+"""
+import argparse
+import time
+
+import numpy as np
+
+from core.car import Car, CarInput
+from core.car_batch import CarBatch
+
+
+def scripted_inputs(steps, dt):
+    """Accelerate straight, then a sinusoidal steer with partial braking."""
+    t = np.arange(steps) * dt
+    steer = np.where(t > 1.0, 0.3 * np.sin(2.0 * t), 0.0)
+    throttle = np.where(t < 3.0, 100.0, 20.0)
+    brake = np.where(t > 4.0, 10.0, 0.0)
+    return steer, throttle, brake
+
+
+def run_car_loop(n_cars, steer, throttle, brake, dt):
+    cars = [Car() for _ in range(n_cars)]
+    start = time.perf_counter()
+    for i in range(len(steer)):
+        car_input = CarInput(steer[i], throttle[i], brake[i])
+        for car in cars:
+            car.update(car_input, dt)
+    elapsed = time.perf_counter() - start
+    return cars, elapsed
+
+
+def run_batch(n_cars, steer, throttle, brake, dt):
+    batch = CarBatch(n_cars)
+    start = time.perf_counter()
+    for i in range(len(steer)):
+        batch.step(steer[i], throttle[i], brake[i], dt)
+    elapsed = time.perf_counter() - start
+    return batch, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cars", type=int, default=1000, help="cars in the batch")
+    parser.add_argument("--loop-cars", type=int, default=20, help="cars stepped by the Car.update loop")
+    parser.add_argument("--steps", type=int, default=300)
+    parser.add_argument("--dt", type=float, default=1 / 60)
+    args = parser.parse_args()
+
+    steer, throttle, brake = scripted_inputs(args.steps, args.dt)
+
+    cars, loop_time = run_car_loop(args.loop_cars, steer, throttle, brake, args.dt)
+    batch, batch_time = run_batch(args.cars, steer, throttle, brake, args.dt)
+
+    loop_rate = args.loop_cars * args.steps / loop_time
+    batch_rate = args.cars * args.steps / batch_time
+    print(f"Car.update loop: {args.loop_cars:6d} cars  {loop_rate:14,.0f} car-steps/s")
+    print(f"CarBatch.step:   {args.cars:6d} cars  {batch_rate:14,.0f} car-steps/s  ({batch_rate / loop_rate:.1f}x)")
+
+    # every car got the same inputs, so car 0 of the batch must follow the reference car
+    reference = cars[0]
+    position_error = np.max(np.abs(batch.position_wc[0] - reference.position_wc))
+    angle_error = abs(batch.angle[0] - reference.angle)
+    print(f"deviation from Car.update after {args.steps} steps: "
+          f"position {position_error:.2e} m, angle {angle_error:.2e} rad")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Throughput of the `core.env` environments in environment-steps per second per core.
+
+    python -m benchmarks.env --envs 1 16 256 4096 --seconds 2
+
+Random actions, with episodes ending and resetting as they would in training. Each
+environment step is `--action-repeat` physics steps. Everything runs in this one
+process on one core, so the rates are per core; NumPy is limited to one thread for
+the same reason.
+"""
+import os
+
+for variable in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+    os.environ.setdefault(variable, "1")
+
+import argparse
+import time
+
+import numpy as np
+
+from core.car import Car
+from core.env import ACTIONS, CarEnv, VectorCarEnv
+from core.racing_line import RacingLine
+
+
+def random_actions(rng, n):
+    """Steer anywhere, mostly throttle and a little braking."""
+    return np.column_stack((rng.uniform(-1.0, 1.0, n), rng.uniform(0.3, 1.0, n), rng.uniform(0.0, 0.1, n)))
+
+
+def vector_rate(line, n, seconds, action_repeat):
+    env = VectorCarEnv(n, line=line, action_repeat=action_repeat)
+    env.reset(seed=0)
+    rng = np.random.default_rng(0)
+    actions = [random_actions(rng, n) for _ in range(64)]
+    env.step(actions[0])
+    steps = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        env.step(actions[steps % len(actions)])
+        steps += 1
+    return n * steps / (time.perf_counter() - start)
+
+
+def single_rate(line, seconds, action_repeat):
+    env = CarEnv(line=line, action_repeat=action_repeat)
+    env.reset(seed=0)
+    actions = random_actions(np.random.default_rng(0), 64)
+    steps = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        _, _, terminated, truncated, _ = env.step(actions[steps % len(actions)])
+        if terminated or truncated:
+            env.reset()
+        steps += 1
+    return steps / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--envs", type=int, nargs="+", default=[1, 16, 256, 4096], help="VectorCarEnv sizes to time")
+    parser.add_argument("--seconds", type=float, default=2.0, help="time per measurement")
+    parser.add_argument("--action-repeat", type=int, default=4)
+    args = parser.parse_args()
+
+    line = RacingLine.load()
+    print(f"{len(ACTIONS)} actions, physics steps per env step: {args.action_repeat}")
+    print(f"{'environment':28s} {'env-steps/s/core':>18s} {'physics steps/s':>16s}")
+    car = type(Car()).__name__
+    rate = single_rate(line, args.seconds, args.action_repeat)
+    print(f"{'CarEnv (' + car + ')':28s} {rate:18,.0f} {rate * args.action_repeat:16,.0f}")
+    for n in args.envs:
+        rate = vector_rate(line, n, args.seconds, args.action_repeat)
+        print(f"{f'VectorCarEnv n={n}':28s} {rate:18,.0f} {rate * args.action_repeat:16,.0f}")
+
+
+if __name__ == "__main__":
+    main()
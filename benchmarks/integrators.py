@@ -0,0 +1,115 @@
+"""Accuracy against cost of the `core.integrators` options and the built-in Euler step.
+
+    python -m benchmarks.integrators --dt 0.004167 0.016667 0.05 --tolerance 0.05
+
+Every integrator drives a `ScalarCar` through each manoeuvre at each `dt`. The error
+is measured against RK4 at `dt / --refine`, with each input held for the same whole
+coarse step, so it is integration error only. "euler" is a slightly different model:
+it damps the yaw rate after each step rather than as part of the derivative, and it
+zeroes small yaw rates, which delays the start of every turn.
+"""
+import argparse
+import math
+import time
+
+import numpy as np
+
+from core.car import CarInput, ScalarCar
+from core.integrators import INTEGRATORS, RK4, make_integrator
+
+DIVERGED = 10.0 # m of position error past which a run is flagged
+
+
+def slalom(t):
+    """A sinusoidal steer from 1 s on, braking from 6 s on; smooth, at 20 m/s."""
+    steer = 0.25 * math.sin(2.0 * (t - 1.0)) if t > 1.0 else 0.0
+    return CarInput(steer, 0.0 if t > 6.0 else 40.0, 10.0 if t > 6.0 else 0.0)
+
+
+def lane_change(t):
+    """Steer steps to one side and the other, then hard braking; at 30 m/s."""
+    if t < 1.0:
+        return CarInput(0.0, 40.0, 0.0)
+    if t < 3.0:
+        return CarInput(0.5 if t < 2.0 else -0.5, 0.0, 0.0)
+    return CarInput(0.0, 0.0, 30.0)
+
+
+# name: (inputs at time t, start speed in m/s, duration in s)
+MANOEUVRES = {"slalom": (slalom, 20.0, 8.0), "lane-change": (lane_change, 30.0, 6.0)}
+
+
+class CountingCar(ScalarCar):
+    """`ScalarCar` counting its force evaluations."""
+
+    __slots__ = ("evaluations",)
+
+    def __init__(self):
+        super().__init__()
+        self.evaluations = 0
+
+    def dynamics(self, *args):
+        self.evaluations += 1
+        return super().dynamics(*args)
+
+
+def drive(integrator, manoeuvre, dt, substeps=1, car=None):
+    """Poses `(x, y, angle)` after each step of `dt`, each split into `substeps` steps."""
+    inputs, speed, duration = manoeuvre
+    steps = int(round(duration / dt))
+    car = car if car is not None else ScalarCar()
+    car.integrator = integrator
+    car.velocity_wc = (0.0, speed) # heading 0 points along +y
+    poses = np.empty((steps, 3))
+    for i in range(steps):
+        car_input = inputs(i * dt)
+        for _ in range(substeps):
+            car.update(car_input, dt / substeps)
+        x, y = car.position_wc
+        poses[i] = x, y, car.angle
+    return poses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dt", type=float, nargs="+", default=[1 / 240, 1 / 120, 1 / 60, 1 / 30, 1 / 20])
+    parser.add_argument("--manoeuvre", choices=MANOEUVRES, nargs="+", default=list(MANOEUVRES))
+    parser.add_argument("--refine", type=int, default=32, help="reference substeps per step")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs, the fastest counts")
+    parser.add_argument("--tolerance", type=float, default=0.05, help="largest acceptable position error in m")
+    args = parser.parse_args()
+
+    names = ["euler"] + list(INTEGRATORS)
+    for manoeuvre_name in args.manoeuvre:
+        manoeuvre = MANOEUVRES[manoeuvre_name]
+        for dt in args.dt:
+            reference = drive(RK4(), manoeuvre, dt, args.refine)
+            steps = len(reference)
+            print(f"{manoeuvre_name}, dt {dt * 1000:.2f} ms ({1 / dt:.0f} Hz), {steps} steps")
+            print(f"  {'integrator':14s} {'us/step':>9s} {'evals':>6s} {'max error m':>12s} {'rms error m':>12s} {'heading rad':>12s}")
+            cheapest = None
+            for name in names:
+                cost = math.inf
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    poses = drive(make_integrator(name), manoeuvre, dt)
+                    cost = min(cost, (time.perf_counter() - start) / steps * 1e6)
+                counting = CountingCar()
+                drive(make_integrator(name), manoeuvre, dt, car=counting)
+                evaluations = counting.evaluations / steps
+
+                distance = np.hypot(*(poses[:, :2] - reference[:, :2]).T)
+                worst = float(np.max(distance)) if np.all(np.isfinite(distance)) else math.inf
+                rms = float(np.sqrt(np.mean(distance ** 2)))
+                heading = float(np.max(np.abs(poses[:, 2] - reference[:, 2])))
+                note = "  diverged" if worst > DIVERGED else ""
+                print(f"  {name:14s} {cost:9.2f} {evaluations:6.2f} {worst:12.2e} {rms:12.2e} {heading:12.2e}{note}")
+                if worst <= args.tolerance and (cheapest is None or cost < cheapest[1]):
+                    cheapest = (name, cost)
+            if cheapest is None:
+                print(f"  nothing within {args.tolerance} m")
+            else:
+                print(f"  cheapest within {args.tolerance} m: {cheapest[0]}")
+
+if __name__ == "__main__":
+    main()
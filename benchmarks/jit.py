@@ -0,0 +1,150 @@
+"""Parity and cost of the compiled `core.jit` kernels against the NumPy and scalar steps.
+
+    python -m benchmarks.jit --steps 4000 --cars 1 100 10000
+
+Parity: `JitCar` must match `ScalarCar` and the compiled `CarBatch` step the NumPy one
+to `--tolerance`. `JitCar` must also match the float32 `Car.update` to the looser
+`--reference-tolerance`, float32 drifts from every float64 implementation. Exits with
+status 1 on a mismatch.
+
+Startup: fresh interpreters time importing `core.car`, then the first `JitCar` and
+`CarBatch` steps, once with an empty Numba cache (compilation) and once with the
+cache the first run left (loading).
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.car_batch import scripted_inputs
+from core.car import Car, CarInput, JitCar, ScalarCar
+from core.car_batch import CarBatch
+from core.jit import JIT_AVAILABLE
+
+STARTUP = """
+import json, time
+start = time.perf_counter()
+from core.car import CarInput, JitCar
+from core.car_batch import CarBatch
+imported = time.perf_counter()
+JitCar().update(CarInput(0.1, 10.0, 0.0), 1 / 240)
+car_step = time.perf_counter()
+batch = CarBatch(4)
+batch.jit = True
+batch.step(0.1, 10.0, 0.0, 1 / 240)
+batch_step = time.perf_counter()
+print(json.dumps({"import": imported - start, "car_step": car_step - imported, "batch_step": batch_step - car_step}))
+"""
+
+
+def single_car_parity(steps, dt):
+    """Largest differences of `JitCar` from `ScalarCar` and from `Car.update` over `steps`."""
+    steer, throttle, brake = scripted_inputs(steps, dt)
+    Car.fast_path = Car.jit = False
+    jit, scalar, reference = JitCar(), ScalarCar(), Car()
+    worst_scalar = worst_reference = 0.0
+    for i in range(steps):
+        car_input = CarInput(float(steer[i]), float(throttle[i]), float(brake[i]))
+        for car in (jit, scalar, reference):
+            car.update(car_input, dt)
+        state = _state(jit)
+        worst_scalar = max(worst_scalar, float(np.max(np.abs(state - _state(scalar)))))
+        worst_reference = max(worst_reference, float(np.max(np.abs(state - _state(reference)))))
+    return worst_scalar, worst_reference
+
+
+def _state(car):
+    return np.array([*car.position_wc, *car.velocity_wc, car.angle, car.angular_velocity,
+                     car.slip_angle_front, car.slip_angle_rear, car.angular_acceleration], dtype=np.float64)
+
+
+def batch_parity(n, steps, dt, seed=0):
+    """Largest difference between the compiled and the NumPy `CarBatch` step over every array."""
+    rng = np.random.default_rng(seed)
+    numpy_batch, jit_batch = CarBatch(n), CarBatch(n)
+    numpy_batch.jit = False
+    jit_batch.jit = True
+    worst = 0.0
+    for i in range(steps):
+        steer = rng.uniform(-0.4, 0.4, n)
+        throttle = rng.uniform(0.0, 100.0, n)
+        brake = np.where(rng.random(n) < 0.1, 50.0, 0.0)
+        numpy_batch.step(steer, throttle, brake, dt)
+        jit_batch.step(steer, throttle, brake, dt)
+    for name in ("position_wc", "velocity_wc", "angle", "angular_velocity", "velocity", "acceleration_wc",
+                 "slip_angle_front", "slip_angle_rear", "force", "torque", "angular_acceleration"):
+        worst = max(worst, float(np.max(np.abs(getattr(numpy_batch, name) - getattr(jit_batch, name)))))
+    return worst
+
+
+def startup(cache_dir):
+    environment = dict(os.environ, NUMBA_CACHE_DIR=cache_dir)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run([sys.executable, "-c", STARTUP], cwd=root, env=environment,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def rate(step, steps):
+    start = time.perf_counter()
+    for _ in range(steps):
+        step()
+    return steps / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--steps", type=int, default=4000)
+    parser.add_argument("--dt", type=float, default=1 / 240)
+    parser.add_argument("--cars", type=int, nargs="+", default=[1, 100, 10000], help="batch sizes to time")
+    parser.add_argument("--tolerance", type=float, default=1e-9)
+    parser.add_argument("--reference-tolerance", type=float, default=1e-3,
+                        help="largest difference from the float32 Car.update")
+    args = parser.parse_args()
+
+    if not JIT_AVAILABLE:
+        print("Numba is not installed: the kernels run as plain Python and Car.jit / CarBatch.jit are ignored")
+
+    worst_scalar, worst_reference = single_car_parity(args.steps, args.dt)
+    worst_batch = batch_parity(256, min(args.steps, 1000), args.dt)
+    print(f"parity over {args.steps} steps: JitCar vs ScalarCar {worst_scalar:.3g}, "
+          f"compiled vs NumPy CarBatch {worst_batch:.3g}, JitCar vs float32 Car.update {worst_reference:.3g}")
+    failed = (worst_scalar > args.tolerance or worst_batch > args.tolerance
+              or worst_reference > args.reference_tolerance)
+
+    if JIT_AVAILABLE:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            for label in ("empty cache", "warm cache"):
+                times = startup(cache_dir)
+                print(f"startup, {label}: import {times['import'] * 1000:7.1f} ms, first JitCar step "
+                      f"{times['car_step'] * 1000:7.1f} ms, first CarBatch step {times['batch_step'] * 1000:7.1f} ms")
+
+    car_input = CarInput(0.1, 30.0, 0.0)
+    for cls in (ScalarCar, JitCar):
+        car = cls()
+        car.velocity_wc = (0.0, 20.0)
+        car.update(car_input, args.dt)
+        print(f"{cls.__name__ + '.update':18s} {rate(lambda: car.update(car_input, args.dt), args.steps):12,.0f} steps/s")
+    for n in args.cars:
+        steps = max(args.steps * 100 // max(n, 100), 10)
+        rates = []
+        for jit in (False, True):
+            batch = CarBatch(n)
+            batch.jit = jit
+            batch.step(0.1, 30.0, 0.0, args.dt)
+            rates.append(n * rate(lambda: batch.step(0.1, 30.0, 0.0, args.dt), steps))
+        print(f"CarBatch n={n:<6d} NumPy {rates[0]:14,.0f} car-steps/s   compiled {rates[1]:14,.0f} car-steps/s "
+              f"({rates[1] / rates[0]:.1f}x)")
+
+    if failed:
+        print(f"parity FAILED, tolerance {args.tolerance}, reference tolerance {args.reference_tolerance}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
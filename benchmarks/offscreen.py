@@ -0,0 +1,53 @@
+"""Frames per second of the `ui.offscreen` renderers, without a window.
+
+    python -m benchmarks.offscreen --cars 1 16 256 --seconds 2
+
+Cars are spread along the racing line and moved between frames so sprite rotations
+and map tiles change as they would in an episode. Loading the game's assets for
+`SpriteRenderer` takes a few seconds and is not timed.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from core.racing_line import RacingLine
+from ui.offscreen import SpriteRenderer, TopDownRenderer, init_headless_display
+from ui.game_drawer import GameDrawerAssets
+
+
+def rate(renderer, line, n, seconds):
+    """Frames per second of `renderer` for `n` cars driving along `line` at 30 m/s."""
+    progress = np.linspace(0.0, line.length, n, endpoint=False)
+    frames = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        progress += 0.5
+        tangent = line.tangent_at(progress)
+        renderer.render(line.point_at(progress), np.arctan2(tangent[:, 0], tangent[:, 1]), np.full(n, 0.1))
+        frames += n
+    return frames / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cars", type=int, nargs="+", default=[1, 16, 256])
+    parser.add_argument("--seconds", type=float, default=2.0, help="time per measurement")
+    parser.add_argument("--sprite-size", type=int, nargs=2, default=[256, 256], metavar=("WIDTH", "HEIGHT"))
+    parser.add_argument("--top-down-size", type=int, nargs=2, default=[64, 64], metavar=("WIDTH", "HEIGHT"))
+    args = parser.parse_args()
+
+    line = RacingLine.load()
+    init_headless_display()
+    assets = GameDrawerAssets()
+    print(f"{'renderer':34s} {'frames/s':>12s}")
+    for n in args.cars:
+        renderer = TopDownRenderer(n, size=tuple(args.top_down_size))
+        print(f"{f'TopDownRenderer {args.top_down_size[0]}x{args.top_down_size[1]} n={n}':34s} {rate(renderer, line, n, args.seconds):12,.0f}")
+    for n in args.cars:
+        renderer = SpriteRenderer(n, size=tuple(args.sprite_size), assets=assets)
+        print(f"{f'SpriteRenderer {args.sprite_size[0]}x{args.sprite_size[1]} n={n}':34s} {rate(renderer, line, n, args.seconds):12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Queries/second of `RacingLine.project` through its grid index, against checking every segment.
+
+    python -m benchmarks.racing_line --batch 1 64 4096 --spread 1.5
+"""
+import argparse
+import time
+
+import numpy as np
+
+from core.racing_line import LapTimer, RacingLine
+
+
+def rate(function, queries, min_time=0.5):
+    """Queries/second of `function()` answering `queries` positions, repeated for at least `min_time`."""
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        function()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return calls * queries / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--image", default="assets/racing_line.png")
+    parser.add_argument("--batch", type=int, nargs="+", default=[1, 64, 4096], help="positions per call")
+    parser.add_argument("--spread", type=float, default=1.5, help="std. deviation of positions around the line in m")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    line = RacingLine.load(args.image)
+    print(f"loaded {len(line.vertices)} vertices, {line.length:.1f} m lap, in {time.perf_counter() - start:.2f} s")
+
+    rng = np.random.default_rng(args.seed)
+    everything = np.arange(len(line.vertices))
+    for batch in args.batch:
+        positions = line.point_at(rng.uniform(0, line.length, batch)) + rng.normal(0, args.spread, (batch, 2))
+        indexed = rate(lambda: line.project(positions), batch)
+        all_segments = np.broadcast_to(everything, (batch, len(everything)))
+        brute = rate(lambda: line._nearest(positions, all_segments), batch)
+        print(f"batch {batch:6d}: index {indexed:14,.0f} queries/s   all segments {brute:12,.0f} queries/s  "
+              f"({indexed / brute:.0f}x)")
+
+    # the same positions projected and timed every step, as a physics step would
+    timer = LapTimer(line.length, args.batch[-1])
+    positions = line.point_at(rng.uniform(0, line.length, args.batch[-1]))
+    steps = rate(lambda: timer.update(line.project(positions).progress, 1 / 240), 1)
+    print(f"project + LapTimer.update for {args.batch[-1]} cars: {steps:,.0f} steps/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""Steps/second of the scalar `ScalarCar` fast path against the NumPy `Car.update`.
+
+    python -m benchmarks.scalar_car --steps 20000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from core.car import Car, CarInput, ScalarCar
+from benchmarks.car_batch import scripted_inputs
+
+
+def run(car, inputs, dt):
+    start = time.perf_counter()
+    for car_input in inputs:
+        car.update(car_input, dt)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--steps", type=int, default=20000)
+    parser.add_argument("--dt", type=float, default=1 / 240)
+    args = parser.parse_args()
+
+    steer, throttle, brake = scripted_inputs(args.steps, args.dt)
+    inputs = [CarInput(float(s), float(t), float(b)) for s, t, b in zip(steer, throttle, brake)]
+
+    Car.fast_path = False
+    reference = Car()
+    fast = ScalarCar()
+    reference_time = run(reference, inputs, args.dt)
+    fast_time = run(fast, inputs, args.dt)
+
+    print(f"Car.update:       {args.steps / reference_time:12,.0f} steps/s")
+    print(f"ScalarCar.update: {args.steps / fast_time:12,.0f} steps/s  ({reference_time / fast_time:.1f}x)")
+    position_error = np.max(np.abs(fast.position_wc - reference.position_wc))
+    print(f"deviation after {args.steps} steps: position {position_error:.2e} m, "
+          f"angle {abs(fast.angle - reference.angle):.2e} rad")
+
+
+if __name__ == "__main__":
+    main()
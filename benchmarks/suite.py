@@ -0,0 +1,247 @@
+"""The hot paths of the game, timed and checked against a JSON baseline.
+
+    python -m benchmarks.suite --update                 # measure and write the baseline
+    python -m benchmarks.suite                          # measure and compare, exit status 1 on a regression
+                                                        # or a benchmark missing from the baseline
+    python -m benchmarks.suite --group car frame --threshold 0.1 --threshold-for startup.game_init=0.5
+
+Every result is the time of one call in seconds, the fastest of `--repeat` rounds. A
+benchmark regresses when it takes more than `1 + threshold` times its baseline. The
+threshold is `--threshold-for`, else the baseline file's `"thresholds"` entry for the
+benchmark, else `THRESHOLDS`, else `--threshold`. `--update` keeps the file's
+thresholds. The baseline holds this machine's times, so it is ignored by git
+rather than committed; run `--update` once per machine before checking. Frame and
+settings benchmarks draw to an off-screen surface with the dummy video driver;
+startup runs `Game()` in fresh interpreters, with the asset cache warm.
+"""
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import argparse
+import contextlib
+import json
+import platform
+import subprocess
+import sys
+import time
+
+from benchmarks.car_batch import scripted_inputs
+from core.car import Car, CarInput, JitCar, ScalarCar
+from core.car_batch import CarBatch
+from core.jit import JIT_AVAILABLE
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_THRESHOLD = 0.25 # fraction slower than the baseline that fails the check
+THRESHOLDS = {
+    # startup reads files and starts threads, it is noisier than the loops
+    "startup.import": 0.5,
+    "startup.game_init": 0.5,
+}
+BATCH_SIZES = (1, 100, 10000)
+
+STARTUP = """
+import json, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+game = main.Game()
+initialised = time.perf_counter()
+game.game_loader.result()
+print(json.dumps({"import": imported - start, "game_init": initialised - imported}))
+"""
+
+
+def time_per_call(function, repeat, min_time):
+    """Seconds per call of `function()`, the fastest of `repeat` rounds of at least `min_time` each."""
+    function()
+    best = float("inf")
+    for _ in range(repeat):
+        calls = 0
+        start = time.perf_counter()
+        while True:
+            function()
+            calls += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+        best = min(best, elapsed / calls)
+    return best
+
+
+def car_benchmarks(args):
+    """One `update` of each single-car class and one `CarBatch.step` at each of `BATCH_SIZES`."""
+    dt = 1 / 240
+    steer, throttle, brake = scripted_inputs(1200, dt)
+    inputs = [CarInput(float(s), float(t), float(b)) for s, t, b in zip(steer, throttle, brake)]
+    Car.fast_path = Car.jit = False
+    classes = [("car.update", Car), ("car.update_scalar", ScalarCar)]
+    if JIT_AVAILABLE:
+        classes.append(("car.update_jit", JitCar))
+    for name, cls in classes:
+        car = cls()
+        step = iter(range(len(inputs)))
+
+        def update():
+            # a fresh car every lap of the inputs, so the state stays in range
+            nonlocal car, step
+            i = next(step, None)
+            if i is None:
+                car, step = cls(), iter(range(len(inputs)))
+                i = next(step)
+            car.update(inputs[i], dt)
+        yield name, time_per_call(update, args.repeat, args.min_time)
+
+    for n in BATCH_SIZES:
+        for suffix, jit in (("", False), ("_jit", True)):
+            if jit and not JIT_AVAILABLE:
+                continue
+            batch = CarBatch(n)
+            batch.jit = jit
+            yield f"car.batch_step{suffix}[{n}]", time_per_call(lambda: batch.step(0.1, 30.0, 0.0, dt), args.repeat, args.min_time)
+
+
+def _game_drawer():
+    from ui.game_drawer import GameDrawer, GameDrawerAssets
+    from ui.input_handling import InputHandler
+    from ui.offscreen import init_headless_display
+    from ui.screen import Screen
+    import pygame
+
+    init_headless_display()
+    screen = pygame.Surface((Screen.WIDTH, Screen.HEIGHT)).convert()
+    car = Car()
+    car.velocity_wc = (4.0, 20.0)
+    drawer = GameDrawer(screen, car, InputHandler(), GameDrawerAssets())
+    for _ in range(10):
+        drawer.update(1 / 60)
+    return drawer, screen
+
+
+def frame_benchmarks(args):
+    """Each stage of `GameDrawer.draw` and the whole of it, with every debug vector shown."""
+    drawer, _ = _game_drawer()
+    drawer._draw_acceleration = drawer._draw_velocity = drawer._draw_friction_circle = drawer._draw_resistance = True
+    stages = [("frame.draw_map", drawer._draw_map), ("frame.draw_ai_cars", drawer._draw_ai_cars),
+              ("frame.draw_car", drawer._draw_car), ("frame.draw_vectors", drawer._draw_vectors),
+              ("frame.draw_stats", drawer.draw_stats), ("frame.draw_speedometer", drawer.draw_speedometer),
+              ("frame.draw", drawer.draw), ("frame.update", lambda: drawer.update(1 / 60))]
+    for name, stage in stages:
+        yield name, time_per_call(stage, args.repeat, args.min_time)
+
+
+def settings_benchmarks(args):
+    """`CarSettingsWidget.update` and `draw`, with the settings hidden and shown."""
+    from ui.widgets.settings import CarSettingsWidget
+
+    _, screen = _game_drawer()
+    settings = CarSettingsWidget(Car().config, screen)
+    for shown in (False, True):
+        if settings.show_hide_toggle.value != shown:
+            settings.show_hide_toggle.toggle()
+        settings.update()
+        label = "shown" if shown else "hidden"
+        yield f"settings.update_{label}", time_per_call(settings.update, args.repeat, args.min_time)
+        yield f"settings.draw_{label}", time_per_call(settings.draw, args.repeat, args.min_time)
+
+
+def startup_benchmarks(args):
+    """Importing `main` and `Game()` in fresh interpreters; the asset loader is waited for, not timed."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    runs = []
+    for _ in range(args.repeat + 1):
+        output = subprocess.run([sys.executable, "-c", STARTUP], cwd=root, env=dict(os.environ),
+                                capture_output=True, text=True, check=True).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    # the first run fills the asset cache if it was empty
+    runs = runs[1:]
+    for key in ("import", "game_init"):
+        yield f"startup.{key}", min(run[key] for run in runs)
+
+
+GROUPS = {"car": car_benchmarks, "frame": frame_benchmarks, "settings": settings_benchmarks, "startup": startup_benchmarks}
+
+
+def parse_threshold(text):
+    name, _, value = text.partition("=")
+    try:
+        return name, float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected NAME=FRACTION, got '{text}'")
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return {"results": {}, "thresholds": {}}
+    with open(path) as file:
+        baseline = json.load(file)
+    baseline.setdefault("results", {})
+    baseline.setdefault("thresholds", {})
+    return baseline
+
+
+def format_time(seconds):
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:9.2f} ms"
+    return f"{seconds * 1e6:9.2f} us"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--group", choices=GROUPS, nargs="+", default=list(GROUPS))
+    parser.add_argument("--baseline", default=BASELINE, help="JSON file of baseline results and thresholds")
+    parser.add_argument("--update", action="store_true", help="write the results to the baseline instead of checking")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="fraction slower than the baseline that fails, for benchmarks without their own")
+    parser.add_argument("--threshold-for", type=parse_threshold, action="append", default=[], metavar="NAME=FRACTION")
+    parser.add_argument("--repeat", type=int, default=5, help="timed rounds, the fastest counts")
+    parser.add_argument("--min-time", type=float, default=0.1, help="seconds per timed round")
+    args = parser.parse_args()
+
+    baseline = load_baseline(args.baseline)
+    thresholds = {**THRESHOLDS, **baseline["thresholds"], **dict(args.threshold_for)}
+    results = {}
+    regressions = []
+    missing = []
+    print(f"{'benchmark':32s} {'time':>12s} {'baseline':>12s} {'change':>8s}")
+    for group in args.group:
+        # the game prints its time to first frame, replay and telemetry messages and asset
+        # load failures on stdout, keep the table readable
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            measured = list(GROUPS[group](args))
+        for name, seconds in measured:
+            results[name] = seconds
+            reference = baseline["results"].get(name)
+            if reference is None:
+                missing.append(name)
+                print(f"{name:32s} {format_time(seconds)} {'-':>12s} {'new':>8s}")
+                continue
+            change = seconds / reference - 1
+            limit = thresholds.get(name, args.threshold)
+            failed = change > limit
+            if failed:
+                regressions.append(name)
+            print(f"{name:32s} {format_time(seconds)} {format_time(reference)} {change:+8.1%}"
+                  f"{f'  REGRESSION (limit {limit:+.0%})' if failed else ''}")
+
+    if args.update:
+        baseline["results"].update(results)
+        baseline["machine"] = {"platform": platform.platform(), "python": platform.python_version(),
+                               "processor": platform.processor(), "cpus": os.cpu_count()}
+        with open(args.baseline, "w") as file:
+            json.dump(baseline, file, indent=2, sort_keys=True)
+        print(f"baseline written to {args.baseline}")
+        return
+    if missing:
+        # without a baseline nothing can fail, which must not pass for a clean run
+        print(f"NO BASELINE for {len(missing)} benchmark(s): {', '.join(missing)}; "
+              f"record one with --update (to {args.baseline})")
+    if regressions:
+        print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+    if missing or regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+import time
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+
+from core.car import CarConfig, CarInput, g
+from core.car_batch import CarBatch
+from core.racing_line import LapTimer, Projection, RacingLine
+
+MAX_STEER_ANGLE = np.pi / 4 # full steering input, as mapped by GameDrawer
+MAX_PEDAL = 100.0 # full throttle or brake input, as mapped by GameDrawer
+TRACTION_PER_PEDAL = 150.0 # N per unit of throttle in the car model
+
+
+class PurePursuitDriver:
+    """Pure-pursuit steering and curvature-limited speed for a whole `CarBatch` in one call.
+
+    Each car steers toward the point of the racing line `lookahead` metres ahead of its
+    projection, with `lookahead` growing with speed. The target speed is the lowest of
+    the cornering limits `sqrt(grip_margin * max_grip * g / |curvature|)` over the next
+    `preview` metres, each raised by what braking at `braking_deceleration` can shed
+    before that point. The margin leaves room for the slip angles the car model needs to
+    corner; closer to 1 the cars run wide. Throttle holds the target speed against the
+    car's resistance and drag, brake bleeds off any excess.
+    """
+
+    def __init__(self, line: RacingLine, lookahead_time: float = 0.2, min_lookahead: float = 3.0,
+                 max_lookahead: float = 25.0, preview: float = 80.0, preview_step: float = 4.0,
+                 braking_deceleration: float = 6.0, grip_margin: float = 0.6, max_speed: float = 60.0,
+                 speed_gain: float = 40.0):
+        self.line = line
+        self.lookahead_time = lookahead_time
+        self.min_lookahead = min_lookahead
+        self.max_lookahead = max_lookahead
+        self.braking_deceleration = braking_deceleration
+        self.grip_margin = grip_margin
+        self.max_speed = max_speed
+        self.speed_gain = speed_gain
+        self._preview = np.arange(0.0, preview + preview_step / 2, preview_step)
+
+    def target_speed(self, progress: np.ndarray, max_grip: np.ndarray) -> np.ndarray:
+        curvature = np.abs(self.line.curvature_at(progress[:, None] + self._preview))
+        cornering = np.sqrt(self.grip_margin * max_grip[:, None] * g / np.maximum(curvature, 1e-6))
+        reachable = np.sqrt(cornering * cornering + 2 * self.braking_deceleration * self._preview)
+        return np.minimum(reachable.min(axis=1), self.max_speed)
+
+    def control(self, batch: CarBatch, projection: Optional[Projection] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Steer angle, throttle and brake arrays for every car of `batch`."""
+        if projection is None:
+            projection = self.line.project(batch.position_wc)
+        config = batch.config
+        sin = np.sin(batch.angle)
+        cos = np.cos(batch.angle)
+        # forward is (sin, cos) in world coordinates, body +y (where positive steer turns) is (cos, -sin)
+        speed = batch.velocity_wc[:, 0] * sin + batch.velocity_wc[:, 1] * cos
+
+        lookahead = np.clip(speed * self.lookahead_time, self.min_lookahead, self.max_lookahead)
+        target = self.line.point_at(projection.progress + lookahead) - batch.position_wc
+        ahead = target[:, 0] * sin + target[:, 1] * cos
+        side = target[:, 0] * cos - target[:, 1] * sin
+        curvature = 2 * side / np.maximum(ahead * ahead + side * side, 1e-6)
+        steer = np.clip(np.arctan(config.wheel_base * curvature), -MAX_STEER_ANGLE, MAX_STEER_ANGLE)
+
+        moving = np.maximum(speed, 0.0)
+        hold = (config.resistance * moving + config.drag * moving * moving) / TRACTION_PER_PEDAL
+        error = self.target_speed(projection.progress, config.max_grip) - speed
+        throttle = np.clip(hold + self.speed_gain * error, 0.0, MAX_PEDAL)
+        brake = np.clip(-self.speed_gain * error, 0.0, MAX_PEDAL)
+        throttle[brake > 0] = 0.0
+        return steer, throttle, brake
+
+
+class AIDrivers:
+    """Computer-driven cars on a racing line: one `CarBatch`, its driver and lap timing.
+
+    Cars start on the line `spacing` metres apart behind the start, pointing along it.
+    `step` projects every car, computes all inputs in one vectorized call, steps the
+    batch and updates the lap timer.
+    """
+
+    def __init__(self, line: RacingLine, n: int, configs: Optional[Iterable[CarConfig]] = None,
+                 spacing: float = 8.0, driver: Optional[PurePursuitDriver] = None):
+        self.line = line
+        self.batch = CarBatch(n=n, configs=configs)
+        self.driver = driver if driver is not None else PurePursuitDriver(line)
+        self.timer = LapTimer(line.length, len(self.batch))
+        self.steer_angle = np.zeros(len(self.batch))
+        self.throttle = np.zeros(len(self.batch))
+        self.brake = np.zeros(len(self.batch))
+
+        progress = -spacing * np.arange(1, len(self.batch) + 1)
+        self.batch.position_wc[:] = line.point_at(progress)
+        tangent = line.point_at(progress + 0.5) - self.batch.position_wc
+        self.batch.angle[:] = np.arctan2(tangent[:, 0], tangent[:, 1])
+        self.batch.orientation_vector[:, 0] = np.cos(self.batch.angle)
+        self.batch.orientation_vector[:, 1] = np.sin(self.batch.angle)
+
+    def __len__(self):
+        return len(self.batch)
+
+    def step(self, dt: float):
+        projection = self.line.project(self.batch.position_wc)
+        self.timer.update(projection.progress, dt)
+        self.steer_angle, self.throttle, self.brake = self.driver.control(self.batch, projection)
+        self.batch.step(self.steer_angle, self.throttle, self.brake, dt)
+
+    def car_input(self, i: int) -> CarInput:
+        """The inputs car `i` was last driven with."""
+        return CarInput(float(self.steer_angle[i]), float(self.throttle[i]), float(self.brake[i]))
+
+
+def frame_time(line: RacingLine, n: int, steps_per_frame: int = 4, dt: float = 1 / 240, frames: int = 20,
+               warmup_frames: int = 60) -> float:
+    """Median seconds `n` AI cars take to drive one frame of `steps_per_frame` physics steps.
+
+    The cars drive `warmup_frames` first so the measurement sees them spread out and at
+    speed rather than stopped on the grid.
+    """
+    drivers = AIDrivers(line, n)
+    for _ in range(warmup_frames * steps_per_frame):
+        drivers.step(dt)
+    times = []
+    for _ in range(frames):
+        start = time.perf_counter()
+        for _ in range(steps_per_frame):
+            drivers.step(dt)
+        times.append(time.perf_counter() - start)
+    return float(np.median(times))
+
+
+def cars_within_budget(line: RacingLine, budget: float = 0.016, report=lambda n, seconds: None, **kwargs) -> int:
+    """Most AI cars whose `frame_time` stays within `budget` seconds, 0 if not even one does.
+
+    Doubles the count until a frame runs over, then bisects; `report(n, seconds)` is
+    called for every count measured.
+    """
+    def fits(n):
+        seconds = frame_time(line, n, **kwargs)
+        report(n, seconds)
+        return seconds <= budget
+
+    if not fits(1):
+        return 0
+    low, high = 1, 2
+    while fits(high):
+        low, high = high, high * 2
+    while high - low > max(low // 64, 1):
+        middle = (low + high) // 2
+        if fits(middle):
+            low = middle
+        else:
+            high = middle
+    return low
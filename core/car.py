@@ -1,9 +1,19 @@
+import math
+import os
 from dataclasses import dataclass
 
 import numpy as np
 
+from core.jit import JIT_AVAILABLE, kernels
+
 g = 9.81 # m/s^2
 ZERO : float = 0.01
+ANGULAR_DAMPING : float = 0.99 # kept of the angular velocity per 1/60 s, the frame the model was tuned at
+ANGULAR_DAMPING_RATE : float = -math.log(ANGULAR_DAMPING) * 60 # the same decay in 1/s
+
+def angular_damping(dt: float) -> float:
+    """Factor that decays the angular velocity over a step of `dt` s, the same per second at any step length."""
+    return math.exp(-ANGULAR_DAMPING_RATE * dt)
 
 @dataclass
 class CarInput:
@@ -49,8 +59,52 @@ class CarConfig:
 def f32_array(arr):
     return np.array(arr, dtype='float32')
 
-@dataclass
 class Car:
+    """Single car stepped with NumPy vector arithmetic, the reference implementation.
+
+    Setting `Car.fast_path` (or the environment variable `CAR_FAST_PATH=1`) makes
+    `Car()` construct a `ScalarCar` instead, so callers pick up the scalar stepping
+    mode without changes. `Car.jit` (or `CAR_JIT=1`) makes it a `JitCar` when Numba
+    is installed; without Numba it is ignored.
+    """
+
+    __slots__ = ("config", "position_wc", "velocity_wc", "angle", "orientation_vector", "angular_velocity",
+                 "velocity", "acceleration_wc", "rot_angle", "side_slip", "slip_angle_front", "slip_angle_rear",
+                 "force", "rear_slip", "front_slip", "resistance", "acceleration", "torque",
+                 "angular_acceleration", "sin", "cos", "yaw_speed", "weight", "front_traction",
+                 "lateral_force_front", "lateral_force_rear", "integrator")
+
+    fast_path: bool = os.environ.get("CAR_FAST_PATH", "0") not in ("", "0")
+    jit: bool = os.environ.get("CAR_JIT", "0") not in ("", "0")
+
+    # per-step values read by core.telemetry, each getter returns a float
+    TELEMETRY = {
+        "slip_angle_front": lambda car: car.slip_angle_front,
+        "slip_angle_rear": lambda car: car.slip_angle_rear,
+        "side_slip": lambda car: car.side_slip,
+        "lateral_force_front": lambda car: car.lateral_force_front[1],
+        "lateral_force_rear": lambda car: car.lateral_force_rear[1],
+        "front_traction": lambda car: car.front_traction[0],
+        "resistance_x": lambda car: car.resistance[0],
+        "resistance_y": lambda car: car.resistance[1],
+        "torque": lambda car: car.torque,
+        "angular_acceleration": lambda car: car.angular_acceleration,
+        "angular_velocity": lambda car: car.angular_velocity,
+        "velocity_x": lambda car: car.velocity[0],
+        "velocity_y": lambda car: car.velocity[1],
+    }
+
+    # attributes carried from one step to the next, `update` recomputes everything else;
+    # `velocity` is overwritten each step, but its dtype changes once the car stood still
+    STATE = ("position_wc", "velocity_wc", "velocity", "angle", "angular_velocity")
+
+    def __new__(cls, *args, **kwargs):
+        if cls is Car and Car.jit and JIT_AVAILABLE:
+            cls = JitCar
+        elif cls is Car and Car.fast_path:
+            cls = ScalarCar
+        return super().__new__(cls)
+
     def __init__(self):
         self.config: CarConfig = CarConfig()
         self.position_wc = f32_array([0.0, 0.0])
@@ -78,23 +132,50 @@ class Car:
         self.front_traction = f32_array([0.0, 0.0])
         self.lateral_force_front = f32_array([0.0, 0.0])
         self.lateral_force_rear = f32_array([0.0, 0.0])
+        # None steps with the explicit update below, see core.integrators for the others
+        self.integrator = None
 
         self.config = CarConfig()
 
     def update(self, car_input: CarInput, dt: float):
-        sin = np.sin(self.angle)
-        cos = np.cos(self.angle)
+        if self.integrator is not None:
+            self.integrator.step(self, car_input, dt)
+            return
+        self.dynamics(car_input, self.velocity_wc[0], self.velocity_wc[1], self.angle, self.angular_velocity)
+
+        # velocity is integrated acceleration
+        self.velocity_wc += self.acceleration_wc * dt
+
+        # position is integrated velocity
+        self.position_wc += self.velocity_wc * dt
+
+        # angular velocity and heading
+        self.angular_velocity += self.angular_acceleration * dt
+        self.angular_velocity *= angular_damping(dt)
+        if np.abs(self.angular_velocity) < ZERO:
+            self.angular_velocity = 0
+
+        self.angle += self.angular_velocity * dt
+        self.orientation_vector = f32_array([np.cos(self.angle), np.sin(self.angle)])
+
+    def dynamics(self, car_input: CarInput, velocity_wc_x, velocity_wc_y, angle, angular_velocity):
+        """Forces on the car moving with the given velocity and yaw rate.
 
-        self.velocity[0] = cos * self.velocity_wc[1] + sin * self.velocity_wc[0]
-        self.velocity[1] = -sin * self.velocity_wc[1] + cos * self.velocity_wc[0]
+        Stores the forces, slip angles and accelerations on the car like a step does and
+        returns `(acceleration_wc_x, acceleration_wc_y, angular_acceleration)`.
+        """
+        sin = np.sin(angle)
+        cos = np.cos(angle)
+
+        self.velocity[0] = cos * velocity_wc_y + sin * velocity_wc_x
+        self.velocity[1] = -sin * velocity_wc_y + cos * velocity_wc_x
 
         if np.linalg.norm(self.velocity) < ZERO:
             self.velocity = np.zeros(2)
 
         speed = np.linalg.norm(self.velocity)
-        print(type(self.velocity[0]))
 
-        yaw_speed = self.config.wheel_base * 0.5 * self.angular_velocity
+        yaw_speed = self.config.wheel_base * 0.5 * angular_velocity
         if speed > ZERO:
             # lateral force on wheels
             if self.velocity[0] < ZERO:
@@ -109,12 +190,20 @@ class Car:
             slip_angle_front = side_slip + rot_angle - car_input.steer_angle
             slip_angle_rear = side_slip - rot_angle
         else:
+            rot_angle = 0
+            side_slip = 0
             slip_angle_front = 0
             slip_angle_rear = 0
+        self.yaw_speed = yaw_speed
+        self.rot_angle = rot_angle
+        self.side_slip = side_slip
+        self.slip_angle_front = slip_angle_front
+        self.slip_angle_rear = slip_angle_rear
 
         # weight per axle
         # TODO: check if better to depend on b and c
         weight = self.config.m * g * 0.5
+        self.weight = weight
 
         # calculate lateral force on front wheels (Ca * slip_angle) capped to friction * load
         self.lateral_force_front[0] = 0
@@ -150,6 +239,7 @@ class Car:
 
         # torque on body from lateral forces
         torque = self.config.b * self.lateral_force_front[1] - self.config.c * self.lateral_force_rear[1]
+        self.torque = torque
 
         # acceleration
         self.acceleration[0] = self.force[0] / self.config.m
@@ -157,24 +247,269 @@ class Car:
         angular_acceleration = torque / self.config.inertia
         if np.abs(angular_acceleration) < ZERO:
             angular_acceleration = 0
+        self.angular_acceleration = angular_acceleration
 
-        # update velocity
+        # acceleration in world coordinates
         self.acceleration_wc[0] = cos * self.acceleration[1] + sin * self.acceleration[0]
         self.acceleration_wc[1] = -sin * self.acceleration[1] + cos * self.acceleration[0]
         # print("accel:", acceleration)
+        return self.acceleration_wc[0], self.acceleration_wc[1], angular_acceleration
+
+
+class ScalarCar(Car):
+    """`Car` with its state held in plain float slots and stepped with `math` functions.
+
+    For a single car the per-call overhead of NumPy on 2-element arrays dominates
+    `Car.update`; this version does the same arithmetic on Python floats and allocates
+    nothing per step. The vector attributes of `Car` are provided as properties that
+    build a fresh array on access, so they are snapshots: assign to `position_wc` or
+    `velocity_wc` as a whole instead of modifying them in place.
+    """
+
+    __slots__ = ("_position_x", "_position_y", "_velocity_wc_x", "_velocity_wc_y", "_velocity_x", "_velocity_y",
+                 "_acceleration_x", "_acceleration_y", "_acceleration_wc_x", "_acceleration_wc_y",
+                 "_force_x", "_force_y", "_resistance_x", "_resistance_y", "_front_traction",
+                 "_lateral_force_front", "_lateral_force_rear")
+
+    # same fields as Car.TELEMETRY, read from the float slots without building arrays
+    TELEMETRY = {
+        **Car.TELEMETRY,
+        "lateral_force_front": lambda car: car._lateral_force_front,
+        "lateral_force_rear": lambda car: car._lateral_force_rear,
+        "front_traction": lambda car: car._front_traction,
+        "resistance_x": lambda car: car._resistance_x,
+        "resistance_y": lambda car: car._resistance_y,
+        "velocity_x": lambda car: car._velocity_x,
+        "velocity_y": lambda car: car._velocity_y,
+    }
+
+    STATE = ("position_wc", "velocity_wc", "angle", "angular_velocity")
 
-        # velocity is integrated acceleration
-        self.velocity_wc += self.acceleration_wc * dt
+    def __init__(self):
+        self.config: CarConfig = CarConfig()
+        self._position_x = 0.0
+        self._position_y = 0.0
+        self._velocity_wc_x = 0.0
+        self._velocity_wc_y = 0.0
+        self.angle: float = 0.0
+        self.angular_velocity: float = 0.0
+        self._velocity_x = 0.0
+        self._velocity_y = 0.0
+        self._acceleration_x = 0.0
+        self._acceleration_y = 0.0
+        self._acceleration_wc_x = 0.0
+        self._acceleration_wc_y = 0.0
+        self.rot_angle: float = 0.0
+        self.side_slip: float = 0.0
+        self.slip_angle_front: float = 0.0
+        self.slip_angle_rear: float = 0.0
+        self._force_x = 0.0
+        self._force_y = 0.0
+        self.rear_slip: int = 0
+        self.front_slip: int = 0
+        self._resistance_x = 0.0
+        self._resistance_y = 0.0
+        self.torque: float = 0.0
+        self.angular_acceleration: float = 0.0
+        self.sin: float = 0.0
+        self.cos: float = 0.0
+        self.yaw_speed: float = 0.0
+        self.weight: float = 0.0
+        self._front_traction = 0.0
+        self._lateral_force_front = 0.0
+        self._lateral_force_rear = 0.0
+        self.integrator = None
 
-        # position is integrated velocity
-        self.position_wc += self.velocity_wc * dt
+    @property
+    def position_wc(self):
+        return np.array([self._position_x, self._position_y])
+
+    @position_wc.setter
+    def position_wc(self, value):
+        self._position_x, self._position_y = float(value[0]), float(value[1])
+
+    @property
+    def velocity_wc(self):
+        return np.array([self._velocity_wc_x, self._velocity_wc_y])
+
+    @velocity_wc.setter
+    def velocity_wc(self, value):
+        self._velocity_wc_x, self._velocity_wc_y = float(value[0]), float(value[1])
+
+    @property
+    def orientation_vector(self):
+        return np.array([math.cos(self.angle), math.sin(self.angle)])
+
+    @property
+    def velocity(self):
+        return np.array([self._velocity_x, self._velocity_y])
+
+    @property
+    def acceleration(self):
+        return np.array([self._acceleration_x, self._acceleration_y])
+
+    @property
+    def acceleration_wc(self):
+        return np.array([self._acceleration_wc_x, self._acceleration_wc_y])
+
+    @property
+    def force(self):
+        return np.array([self._force_x, self._force_y])
+
+    @property
+    def resistance(self):
+        return np.array([self._resistance_x, self._resistance_y])
+
+    @property
+    def front_traction(self):
+        return np.array([self._front_traction, 0.0])
+
+    @property
+    def lateral_force_front(self):
+        return np.array([0.0, self._lateral_force_front])
+
+    @property
+    def lateral_force_rear(self):
+        return np.array([0.0, self._lateral_force_rear])
+
+    def update(self, car_input: CarInput, dt: float):
+        if self.integrator is not None:
+            self.integrator.step(self, car_input, dt)
+            return
+        acceleration_wc_x, acceleration_wc_y, angular_acceleration = self.dynamics(
+            car_input, self._velocity_wc_x, self._velocity_wc_y, self.angle, self.angular_velocity)
+
+        # velocity is integrated acceleration, position is integrated velocity
+        self._velocity_wc_x += acceleration_wc_x * dt
+        self._velocity_wc_y += acceleration_wc_y * dt
+        self._position_x += self._velocity_wc_x * dt
+        self._position_y += self._velocity_wc_y * dt
 
         # angular velocity and heading
-        self.angular_velocity += angular_acceleration * dt
-        ANGULAR_DAMPING = 0.99  # Adjust as needed
-        self.angular_velocity *= ANGULAR_DAMPING
-        if np.abs(self.angular_velocity) < ZERO:
-            self.angular_velocity = 0
+        angular_velocity = (self.angular_velocity + angular_acceleration * dt) * angular_damping(dt)
+        if abs(angular_velocity) < ZERO:
+            angular_velocity = 0.0
+        self.angular_velocity = angular_velocity
+        self.angle += angular_velocity * dt
+
+    def dynamics(self, car_input: CarInput, velocity_wc_x, velocity_wc_y, angle, angular_velocity):
+        """`Car.dynamics` on floats."""
+        config = self.config
+        steer_angle = car_input.steer_angle
+        sin = math.sin(angle)
+        cos = math.cos(angle)
+
+        velocity_x = cos * velocity_wc_y + sin * velocity_wc_x
+        velocity_y = -sin * velocity_wc_y + cos * velocity_wc_x
+        if math.hypot(velocity_x, velocity_y) < ZERO:
+            velocity_x = 0.0
+            velocity_y = 0.0
+        speed = math.hypot(velocity_x, velocity_y)
+
+        yaw_speed = config.wheel_base * 0.5 * angular_velocity
+        if speed > ZERO:
+            # lateral force on wheels
+            if velocity_x < ZERO:
+                rot_angle = 0.0
+                side_slip = 0.0
+            else:
+                rot_angle = math.atan(yaw_speed / velocity_x)
+                side_slip = math.atan(velocity_y / velocity_x)
+            slip_angle_front = side_slip + rot_angle - steer_angle
+            slip_angle_rear = side_slip - rot_angle
+        else:
+            rot_angle = 0.0
+            side_slip = 0.0
+            slip_angle_front = 0.0
+            slip_angle_rear = 0.0
 
-        self.angle += self.angular_velocity * dt
-        self.orientation_vector = f32_array([np.cos(self.angle), np.sin(self.angle)])
\ No newline at end of file
+        # weight per axle
+        weight = config.m * g * 0.5
+        max_grip = config.max_grip
+
+        # lateral force on wheels (Ca * slip_angle) capped to friction * load
+        lateral_force_front = min(max(config.cornering_front * slip_angle_front, -max_grip), max_grip) * weight
+        if self.front_slip == 1:
+            lateral_force_front *= 0.5
+        lateral_force_rear = min(max(config.cornering_rear * slip_angle_rear, -max_grip), max_grip) * weight
+        if self.rear_slip == 1:
+            lateral_force_rear *= 0.5
+
+        # longitudinal force - very simple traction model
+        direction = 1.0 if velocity_x > 0 else (-1.0 if velocity_x < 0 else 0.0)
+        front_traction = 150 * (car_input.throttle - car_input.brake * direction)
+        if self.rear_slip == 1:
+            front_traction *= 0.5
+
+        # forces and torque on body
+        resistance_x = -(config.resistance * velocity_x + config.drag * velocity_x * abs(velocity_x))
+        resistance_y = -(config.resistance * velocity_y + config.drag * velocity_y * abs(velocity_y))
+        force_x = front_traction + resistance_x
+        force_y = math.cos(steer_angle) * lateral_force_front + lateral_force_rear + resistance_y
+        torque = config.b * lateral_force_front - config.c * lateral_force_rear
+
+        # acceleration
+        acceleration_x = force_x / config.m
+        acceleration_y = force_y / config.m
+        angular_acceleration = torque / config.inertia
+        if abs(angular_acceleration) < ZERO:
+            angular_acceleration = 0.0
+        acceleration_wc_x = cos * acceleration_y + sin * acceleration_x
+        acceleration_wc_y = -sin * acceleration_y + cos * acceleration_x
+
+        self.sin = sin
+        self.cos = cos
+        self._velocity_x = velocity_x
+        self._velocity_y = velocity_y
+        self.yaw_speed = yaw_speed
+        self.rot_angle = rot_angle
+        self.side_slip = side_slip
+        self.slip_angle_front = slip_angle_front
+        self.slip_angle_rear = slip_angle_rear
+        self.weight = weight
+        self._lateral_force_front = lateral_force_front
+        self._lateral_force_rear = lateral_force_rear
+        self._front_traction = front_traction
+        self._resistance_x = resistance_x
+        self._resistance_y = resistance_y
+        self._force_x = force_x
+        self._force_y = force_y
+        self.torque = torque
+        self._acceleration_x = acceleration_x
+        self._acceleration_y = acceleration_y
+        self.angular_acceleration = angular_acceleration
+        self._acceleration_wc_x = acceleration_wc_x
+        self._acceleration_wc_y = acceleration_wc_y
+
+        return acceleration_wc_x, acceleration_wc_y, angular_acceleration
+
+
+class JitCar(ScalarCar):
+    """`ScalarCar` stepped by the compiled `core.jit.car_step` kernel.
+
+    Only worth it with Numba installed, the first step then imports Numba and compiles
+    the kernel (or loads it from Numba's cache). Without Numba the kernel runs as plain
+    Python, so recordings of a `JitCar` still replay anywhere. Integrators other than the built-in
+    step go through `ScalarCar.dynamics` as usual.
+    """
+
+    __slots__ = ()
+
+    def update(self, car_input: CarInput, dt: float):
+        if self.integrator is not None:
+            self.integrator.step(self, car_input, dt)
+            return
+        config = self.config
+        (self._position_x, self._position_y, self._velocity_wc_x, self._velocity_wc_y, self.angle,
+         self.angular_velocity, self.sin, self.cos, self._velocity_x, self._velocity_y, self.yaw_speed,
+         self.rot_angle, self.side_slip, self.slip_angle_front, self.slip_angle_rear, self.weight,
+         self._lateral_force_front, self._lateral_force_rear, self._front_traction, self._resistance_x,
+         self._resistance_y, self._force_x, self._force_y, self.torque, self._acceleration_x,
+         self._acceleration_y, self.angular_acceleration, self._acceleration_wc_x, self._acceleration_wc_y) = kernels()[0](
+            self._position_x, self._position_y, self._velocity_wc_x, self._velocity_wc_y, float(self.angle),
+            float(self.angular_velocity), self.front_slip, self.rear_slip,
+            float(config.b), float(config.c), float(config.wheel_base), float(config.m), float(config.inertia),
+            float(config.drag), float(config.resistance), float(config.cornering_front),
+            float(config.cornering_rear), float(config.max_grip),
+            float(car_input.steer_angle), float(car_input.throttle), float(car_input.brake), float(dt),
+            ZERO, g, angular_damping(dt))
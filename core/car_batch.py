@@ -0,0 +1,172 @@
+import os
+from typing import Iterable, Optional
+
+import numpy as np
+
+from core.car import CarConfig, ZERO, angular_damping, g
+from core.jit import JIT_AVAILABLE, kernels
+
+
+class CarConfigBatch:
+    """Per-car `CarConfig` parameters, one contiguous float64 array per field."""
+
+    FIELDS = ("b", "c", "height", "wheel_base", "m", "inertia", "drag", "resistance",
+              "cornering_rear", "cornering_front", "max_grip")
+
+    def __init__(self, configs: Iterable[CarConfig]):
+        configs = list(configs)
+        for field in CarConfigBatch.FIELDS:
+            setattr(self, field, np.array([getattr(config, field) for config in configs], dtype=np.float64))
+
+    def __len__(self):
+        return len(self.m)
+
+    def set(self, index: int, config: CarConfig):
+        for field in CarConfigBatch.FIELDS:
+            getattr(self, field)[index] = getattr(config, field)
+
+
+class CarBatch:
+    """N cars advanced together by one vectorized step.
+
+    State is kept struct-of-arrays: every `Car` attribute becomes an array with the
+    car index as its first axis, so `batch.position_wc[i]` mirrors `car.position_wc`.
+    The force model is the one in `Car.update`, evaluated for all cars at once.
+    With `CarBatch.jit` (or `CAR_JIT=1`) and Numba installed, `step` runs the compiled
+    per-car loop of `core.jit.batch_step` instead.
+    """
+
+    jit: bool = os.environ.get("CAR_JIT", "0") not in ("", "0")
+
+    def __init__(self, n: Optional[int] = None, configs: Optional[Iterable[CarConfig]] = None):
+        if configs is None:
+            if n is None:
+                raise ValueError("CarBatch needs either n or configs")
+            configs = [CarConfig() for _ in range(n)]
+        self.config = CarConfigBatch(configs)
+        self.n = len(self.config)
+
+        vector = lambda: np.zeros((self.n, 2), dtype=np.float64)
+        scalar = lambda: np.zeros(self.n, dtype=np.float64)
+
+        self.position_wc = vector()
+        self.velocity_wc = vector()
+        self.angle = scalar()
+        self.orientation_vector = vector()
+        self.orientation_vector[:, 0] = 1.0
+        self.angular_velocity = scalar()
+        self.velocity = vector()
+        self.acceleration_wc = vector()
+        self.side_slip = scalar()
+        self.slip_angle_front = scalar()
+        self.slip_angle_rear = scalar()
+        self.force = vector()
+        self.rear_slip = np.zeros(self.n, dtype=bool)
+        self.front_slip = np.zeros(self.n, dtype=bool)
+        self.resistance = vector()
+        self.acceleration = vector()
+        self.torque = scalar()
+        self.angular_acceleration = scalar()
+        self.front_traction = vector()
+        self.lateral_force_front = vector()
+        self.lateral_force_rear = vector()
+
+    def __len__(self):
+        return self.n
+
+    def step(self, steer_angle, throttle, brake, dt: float):
+        """Advance every car by `dt`.
+
+        `steer_angle`, `throttle` and `brake` are scalars or arrays of shape (n,).
+        """
+        if self.jit and JIT_AVAILABLE:
+            self._step_jit(steer_angle, throttle, brake, dt)
+            return
+        config = self.config
+        steer_angle = np.broadcast_to(np.asarray(steer_angle, dtype=np.float64), (self.n,))
+        throttle = np.asarray(throttle, dtype=np.float64)
+        brake = np.asarray(brake, dtype=np.float64)
+
+        sin = np.sin(self.angle)
+        cos = np.cos(self.angle)
+
+        # velocity in car coordinates
+        vx = cos * self.velocity_wc[:, 1] + sin * self.velocity_wc[:, 0]
+        vy = -sin * self.velocity_wc[:, 1] + cos * self.velocity_wc[:, 0]
+        stopped = np.hypot(vx, vy) < ZERO
+        vx[stopped] = 0.0
+        vy[stopped] = 0.0
+        self.velocity[:, 0] = vx
+        self.velocity[:, 1] = vy
+        speed = np.hypot(vx, vy)
+
+        # slip angles, zero while stopped or rolling backwards
+        yaw_speed = config.wheel_base * 0.5 * self.angular_velocity
+        forward = (speed > ZERO) & (vx >= ZERO)
+        safe_vx = np.where(forward, vx, 1.0)
+        rot_angle = np.where(forward, np.arctan(yaw_speed / safe_vx), 0.0)
+        side_slip = np.where(forward, np.arctan(vy / safe_vx), 0.0)
+        moving = speed > ZERO
+        self.side_slip = side_slip
+        self.slip_angle_front = np.where(moving, side_slip + rot_angle - steer_angle, 0.0)
+        self.slip_angle_rear = np.where(moving, side_slip - rot_angle, 0.0)
+
+        # weight per axle
+        weight = config.m * g * 0.5
+
+        # lateral force on wheels (Ca * slip_angle) capped to friction * load
+        lateral_front = np.clip(config.cornering_front * self.slip_angle_front, -config.max_grip, config.max_grip) * weight
+        lateral_front[self.front_slip] *= 0.5
+        lateral_rear = np.clip(config.cornering_rear * self.slip_angle_rear, -config.max_grip, config.max_grip) * weight
+        lateral_rear[self.rear_slip] *= 0.5
+        self.lateral_force_front[:, 1] = lateral_front
+        self.lateral_force_rear[:, 1] = lateral_rear
+
+        # longitudinal force - very simple traction model
+        traction = 150 * (throttle - brake * np.sign(vx))
+        traction = np.where(self.rear_slip, traction * 0.5, traction)
+        self.front_traction[:, 0] = traction
+
+        # forces and torque on body
+        self.resistance[:] = -(config.resistance[:, None] * self.velocity
+                               + config.drag[:, None] * self.velocity * np.abs(self.velocity))
+
+        self.force[:, 0] = traction + self.resistance[:, 0]
+        self.force[:, 1] = np.cos(steer_angle) * lateral_front + lateral_rear + self.resistance[:, 1]
+        self.torque = config.b * lateral_front - config.c * lateral_rear
+
+        # acceleration
+        np.divide(self.force, config.m[:, None], out=self.acceleration)
+        angular_acceleration = self.torque / config.inertia
+        angular_acceleration[np.abs(angular_acceleration) < ZERO] = 0.0
+        self.angular_acceleration = angular_acceleration
+
+        ax = self.acceleration[:, 0]
+        ay = self.acceleration[:, 1]
+        self.acceleration_wc[:, 0] = cos * ay + sin * ax
+        self.acceleration_wc[:, 1] = -sin * ay + cos * ax
+
+        # integrate velocity, position, angular velocity and heading
+        self.velocity_wc += self.acceleration_wc * dt
+        self.position_wc += self.velocity_wc * dt
+
+        self.angular_velocity += angular_acceleration * dt
+        self.angular_velocity *= angular_damping(dt)
+        self.angular_velocity[np.abs(self.angular_velocity) < ZERO] = 0.0
+
+        self.angle += self.angular_velocity * dt
+        self.orientation_vector[:, 0] = np.cos(self.angle)
+        self.orientation_vector[:, 1] = np.sin(self.angle)
+
+    def _step_jit(self, steer_angle, throttle, brake, dt: float):
+        config = self.config
+        inputs = [np.ascontiguousarray(np.broadcast_to(np.asarray(value, dtype=np.float64), (self.n,)))
+                  for value in (steer_angle, throttle, brake)]
+        kernels()[1](self.position_wc, self.velocity_wc, self.angle, self.angular_velocity, self.orientation_vector,
+                   self.front_slip, self.rear_slip,
+                   config.b, config.c, config.wheel_base, config.m, config.inertia, config.drag, config.resistance,
+                   config.cornering_front, config.cornering_rear, config.max_grip,
+                   *inputs, float(dt), ZERO, g, angular_damping(dt),
+                   self.velocity, self.acceleration_wc, self.side_slip, self.slip_angle_front, self.slip_angle_rear,
+                   self.force, self.resistance, self.acceleration, self.torque, self.angular_acceleration,
+                   self.front_traction, self.lateral_force_front, self.lateral_force_rear)
@@ -0,0 +1,237 @@
+from typing import Optional, Tuple
+
+import numpy as np
+
+from core.ai import MAX_PEDAL, MAX_STEER_ANGLE
+from core.car import Car, CarConfig, CarInput
+from core.car_batch import CarBatch
+from core.integrators import write_state
+from core.racing_line import Projection, RacingLine
+from core.track import TrackMap
+
+# columns of an observation; speeds in m/s in car coordinates, angles in rad, offsets in m, curvatures in 1/m
+OBSERVATIONS = ("speed", "lateral_speed", "yaw_rate", "side_slip", "slip_angle_front", "slip_angle_rear",
+                "lateral_offset", "heading_error", "curvature", "curvature_ahead")
+
+# columns of an action: steer in [-1, 1] of MAX_STEER_ANGLE, throttle and brake in [0, 1] of MAX_PEDAL
+ACTIONS = ("steer", "throttle", "brake")
+
+
+class _RacingTask:
+    """Observations, rewards and episode ends shared by `CarEnv` and `VectorCarEnv`.
+
+    The reward of a step is the distance gained along the racing line. An episode
+    terminates when the car leaves the track, with `off_track_penalty` taken off the
+    reward, and is truncated after `max_steps` steps. Off track means outside `track`
+    if one is given, else more than `max_offset` from the racing line. Each step holds
+    the action for `action_repeat` physics steps of `dt`.
+
+    With `render_mode="rgb_array"`, `render()` returns frames of the cars from
+    `renderer`, a `ui.offscreen` renderer for as many cars, by default a
+    `TopDownRenderer`; pygame is only imported then.
+    """
+
+    metadata = {"render_modes": ["rgb_array"]}
+
+    def __init__(self, line: Optional[RacingLine], track: Optional[TrackMap], dt: float, action_repeat: int,
+                 max_steps: int, max_offset: float, off_track_penalty: float, lookahead: float,
+                 start_speed: Tuple[float, float], render_mode: Optional[str], renderer, cars: int):
+        if render_mode not in (None, *self.metadata["render_modes"]):
+            raise ValueError(f"render mode {render_mode!r} is not supported, choose from {self.metadata['render_modes']}")
+        self.line = line if line is not None else RacingLine.load()
+        self.track = track
+        self.dt = dt
+        self.action_repeat = action_repeat
+        self.max_steps = max_steps
+        self.max_offset = max_offset
+        self.off_track_penalty = off_track_penalty
+        self.lookahead = lookahead
+        self.start_speed = start_speed
+        self.render_mode = render_mode
+        if render_mode == "rgb_array" and renderer is None:
+            from ui.offscreen import TopDownRenderer
+            renderer = TopDownRenderer(cars)
+        self.renderer = renderer
+        self.rng = np.random.default_rng()
+
+    def _controls(self, actions: np.ndarray):
+        steer = np.clip(actions[..., 0], -1.0, 1.0) * MAX_STEER_ANGLE
+        throttle = np.clip(actions[..., 1], 0.0, 1.0) * MAX_PEDAL
+        brake = np.clip(actions[..., 2], 0.0, 1.0) * MAX_PEDAL
+        return steer, throttle, brake
+
+    def _starts(self, n: int):
+        """Positions, headings and world velocities of `n` cars placed on the line at random."""
+        progress = self.rng.uniform(0.0, self.line.length, n)
+        tangent = self.line.tangent_at(progress)
+        speed = self.rng.uniform(*self.start_speed, n)
+        # heading 0 points along +y, forward is (sin, cos)
+        return self.line.point_at(progress), np.arctan2(tangent[:, 0], tangent[:, 1]), tangent * speed[:, None]
+
+    def _observe(self, position, angle, velocity_wc, yaw_rate, side_slip, slip_angle_front,
+                 slip_angle_rear) -> Tuple[np.ndarray, Projection]:
+        projection = self.line.project(position)
+        sin = np.sin(angle)
+        cos = np.cos(angle)
+        tangent = self.line.tangent_at(projection.progress)
+        line_heading = np.arctan2(tangent[:, 0], tangent[:, 1])
+        observation = np.column_stack((
+            cos * velocity_wc[:, 1] + sin * velocity_wc[:, 0],
+            -sin * velocity_wc[:, 1] + cos * velocity_wc[:, 0],
+            yaw_rate, side_slip, slip_angle_front, slip_angle_rear,
+            projection.lateral_offset,
+            np.angle(np.exp(1j * (angle - line_heading))),
+            self.line.curvature_at(projection.progress),
+            self.line.curvature_at(projection.progress + self.lookahead),
+        )).astype(np.float32)
+        return observation, projection
+
+    def _score(self, position, projection: Projection, previous_progress):
+        """Rewards and the terminated flags of a step that moved the cars from `previous_progress`."""
+        gained = np.mod(projection.progress - previous_progress + self.line.length / 2, self.line.length) - self.line.length / 2
+        if self.track is not None:
+            off_track = self.track.distance_to_edge(position) < 0
+        else:
+            off_track = np.abs(projection.lateral_offset) > self.max_offset
+        return gained - self.off_track_penalty * off_track, off_track
+
+
+class VectorCarEnv(_RacingTask):
+    """`n` independent cars on the racing line, stepped together by one `CarBatch`.
+
+    Gym-style: `reset(seed)` returns `(observations, info)` and `step(actions)` takes an
+    `(n, 3)` array of `ACTIONS` and returns `(observations, rewards, terminated,
+    truncated, info)` with one row or entry per car; observations are float32 columns
+    of `OBSERVATIONS`. A car whose episode ended is reset at once and its row holds the
+    first observation of its next episode; the last one of the ended episode is in
+    `info["final_observation"]`. `render()` returns `(n, height, width, 3)` frames, one
+    per car, or None without a render mode.
+    """
+
+    def __init__(self, n: int, line: Optional[RacingLine] = None, track: Optional[TrackMap] = None,
+                 configs=None, dt: float = 1 / 240, action_repeat: int = 4, max_steps: int = 1000,
+                 max_offset: float = 6.0, off_track_penalty: float = 10.0, lookahead: float = 20.0,
+                 start_speed: Tuple[float, float] = (0.0, 10.0), render_mode: Optional[str] = None, renderer=None):
+        super().__init__(line, track, dt, action_repeat, max_steps, max_offset, off_track_penalty, lookahead,
+                         start_speed, render_mode, renderer, n)
+        self.n = n
+        self.batch = CarBatch(n=n, configs=configs)
+        self.steps = np.zeros(n, dtype=int)
+        self._progress = np.zeros(n)
+        self._steer_angle = np.zeros(n) # of the last action, for drawing the wheels
+
+    def reset(self, seed: Optional[int] = None):
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
+        self._reset_cars(np.arange(self.n))
+        observation, projection = self._observation()
+        self._progress = projection.progress
+        return observation, {}
+
+    def step(self, actions):
+        steer, throttle, brake = self._controls(np.asarray(actions, dtype=np.float64).reshape(self.n, len(ACTIONS)))
+        self._steer_angle = steer
+        for _ in range(self.action_repeat):
+            self.batch.step(steer, throttle, brake, self.dt)
+        self.steps += 1
+
+        observation, projection = self._observation()
+        reward, terminated = self._score(self.batch.position_wc, projection, self._progress)
+        truncated = (self.steps >= self.max_steps) & ~terminated
+        self._progress = projection.progress
+        info = {}
+        done = np.flatnonzero(terminated | truncated)
+        if len(done):
+            info["final_observation"] = observation.copy()
+            self._reset_cars(done)
+            observation[done], restarted = self._observation(done)
+            self._progress[done] = restarted.progress
+        return observation, reward, terminated, truncated, info
+
+    def render(self):
+        if self.renderer is None:
+            return None
+        return self.renderer.render(self.batch.position_wc, self.batch.angle, self._steer_angle)
+
+    def _reset_cars(self, cars: np.ndarray):
+        batch = self.batch
+        position, angle, velocity_wc = self._starts(len(cars))
+        batch.position_wc[cars] = position
+        batch.velocity_wc[cars] = velocity_wc
+        batch.angle[cars] = angle
+        batch.orientation_vector[cars, 0] = np.cos(angle)
+        batch.orientation_vector[cars, 1] = np.sin(angle)
+        batch.angular_velocity[cars] = 0.0
+        batch.side_slip[cars] = 0.0
+        batch.slip_angle_front[cars] = 0.0
+        batch.slip_angle_rear[cars] = 0.0
+        self.steps[cars] = 0
+
+    def _observation(self, cars=slice(None)):
+        batch = self.batch
+        return self._observe(batch.position_wc[cars], batch.angle[cars], batch.velocity_wc[cars],
+                             batch.angular_velocity[cars], batch.side_slip[cars],
+                             batch.slip_angle_front[cars], batch.slip_angle_rear[cars])
+
+
+class CarEnv(_RacingTask):
+    """One `Car` on the racing line, with the same task as `VectorCarEnv`.
+
+    `step(action)` takes one row of `ACTIONS` and returns `(observation, reward,
+    terminated, truncated, info)` as a float32 vector, a float and two bools; after an
+    episode ends call `reset`. `Car()` picks the scalar or compiled car when
+    `Car.fast_path` or `Car.jit` is set.
+    """
+
+    def __init__(self, line: Optional[RacingLine] = None, track: Optional[TrackMap] = None,
+                 config: Optional[CarConfig] = None, dt: float = 1 / 240, action_repeat: int = 4,
+                 max_steps: int = 1000, max_offset: float = 6.0, off_track_penalty: float = 10.0,
+                 lookahead: float = 20.0, start_speed: Tuple[float, float] = (0.0, 10.0),
+                 render_mode: Optional[str] = None, renderer=None):
+        super().__init__(line, track, dt, action_repeat, max_steps, max_offset, off_track_penalty, lookahead,
+                         start_speed, render_mode, renderer, 1)
+        self.config = config
+        self.car = Car()
+        self.steps = 0
+        self._progress = 0.0
+        self._steer_angle = 0.0
+
+    def reset(self, seed: Optional[int] = None):
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
+        self.car = Car()
+        if self.config is not None:
+            self.car.config = self.config
+        position, angle, velocity_wc = self._starts(1)
+        write_state(self.car, (position[0, 0], position[0, 1], velocity_wc[0, 0], velocity_wc[0, 1], float(angle[0]), 0.0))
+        self.steps = 0
+        observation, projection = self._observation()
+        self._progress = projection.progress
+        return observation[0], {}
+
+    def step(self, action):
+        steer, throttle, brake = self._controls(np.asarray(action, dtype=np.float64))
+        car_input = CarInput(float(steer), float(throttle), float(brake))
+        self._steer_angle = float(steer)
+        for _ in range(self.action_repeat):
+            self.car.update(car_input, self.dt)
+        self.steps += 1
+
+        observation, projection = self._observation()
+        reward, terminated = self._score(np.asarray(self.car.position_wc, dtype=np.float64)[None], projection, self._progress)
+        self._progress = projection.progress
+        terminated = bool(terminated[0])
+        return observation[0], float(reward[0]), terminated, self.steps >= self.max_steps and not terminated, {}
+
+    def render(self):
+        if self.renderer is None:
+            return None
+        car = self.car
+        return self.renderer.render(np.asarray(car.position_wc, dtype=np.float64), car.angle, self._steer_angle)[0]
+
+    def _observation(self):
+        car = self.car
+        values = lambda value: np.array([value], dtype=np.float64)
+        return self._observe(np.asarray(car.position_wc, dtype=np.float64)[None], values(car.angle),
+                             np.asarray(car.velocity_wc, dtype=np.float64)[None], values(car.angular_velocity),
+                             values(car.side_slip), values(car.slip_angle_front), values(car.slip_angle_rear))
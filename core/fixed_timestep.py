@@ -0,0 +1,40 @@
+class FixedTimestep:
+    """Turns variable frame times into a whole number of fixed physics steps.
+
+    Frame time (scaled by `time_scale`) is accumulated and consumed in steps of `dt`.
+    What is left over is exposed as `alpha`, the fraction of a step the renderer
+    should interpolate by. At most `max_substeps` steps are run per frame; time beyond
+    that is dropped so a long hitch cannot snowball into ever longer frames.
+    """
+
+    MIN_TIME_SCALE = 0.125
+    MAX_TIME_SCALE = 8.0
+
+    def __init__(self, rate: float = 240, max_substeps: int = 10, time_scale: float = 1.0):
+        self.dt = 1.0 / rate
+        self.max_substeps = max_substeps
+        self.time_scale = time_scale
+        self.dropped_time = 0.0
+        self._accumulator = 0.0
+
+    @property
+    def alpha(self) -> float:
+        return self._accumulator / self.dt
+
+    def set_time_scale(self, time_scale: float):
+        self.time_scale = min(max(time_scale, FixedTimestep.MIN_TIME_SCALE), FixedTimestep.MAX_TIME_SCALE)
+
+    def advance(self, frame_dt: float) -> int:
+        """Add a frame's worth of time and return how many physics steps to run."""
+        self._accumulator += frame_dt * self.time_scale
+        steps = int(self._accumulator / self.dt)
+        if steps > self.max_substeps:
+            dropped = (steps - self.max_substeps) * self.dt
+            self.dropped_time += dropped
+            self._accumulator -= dropped
+            steps = self.max_substeps
+        self._accumulator -= steps * self.dt
+        return steps
+
+    def reset(self):
+        self._accumulator = 0.0
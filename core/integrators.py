@@ -0,0 +1,162 @@
+import math
+from abc import ABC, abstractmethod
+from typing import Optional, Tuple
+
+import numpy as np
+
+from core.car import ANGULAR_DAMPING_RATE, Car, CarInput, ScalarCar, ZERO
+
+# (x, y, velocity_wc_x, velocity_wc_y, angle, angular_velocity)
+State = Tuple[float, float, float, float, float, float]
+
+
+def read_state(car: Car) -> State:
+    if isinstance(car, ScalarCar):
+        # straight from the float slots, the array properties would allocate
+        return (car._position_x, car._position_y, car._velocity_wc_x, car._velocity_wc_y, car.angle, car.angular_velocity)
+    x, y = car.position_wc
+    velocity_x, velocity_y = car.velocity_wc
+    return (float(x), float(y), float(velocity_x), float(velocity_y), float(car.angle), float(car.angular_velocity))
+
+
+def write_state(car: Car, state: State):
+    """Store `state` on `car`; `Car` keeps the dtype of its arrays."""
+    x, y, velocity_x, velocity_y, angle, angular_velocity = state
+    car.angle = angle
+    car.angular_velocity = angular_velocity
+    if isinstance(car, ScalarCar):
+        car._position_x, car._position_y, car._velocity_wc_x, car._velocity_wc_y = x, y, velocity_x, velocity_y
+        return
+    car.position_wc = np.array([x, y], dtype=car.position_wc.dtype)
+    car.velocity_wc = np.array([velocity_x, velocity_y], dtype=car.velocity_wc.dtype)
+    car.orientation_vector = np.array([math.cos(angle), math.sin(angle)], dtype=np.float32)
+
+
+class Integrator(ABC):
+    """Advances a car's state by `dt` from `Car.dynamics`, set as `car.integrator`.
+
+    Yaw damping decays at `ANGULAR_DAMPING_RATE` as in `Car.update`, but as part of
+    the derivative, and a yaw rate below `ZERO` is only zeroed while no torque acts.
+    The built-in step zeroes it regardless, which at small `dt` keeps a small steer
+    angle from ever starting a turn. Forces and slip angles left on the car are those
+    of the last evaluation.
+    """
+
+    name = "integrator"
+
+    def step(self, car: Car, car_input: CarInput, dt: float):
+        write_state(car, self.advance(car, car_input, read_state(car), dt))
+
+    @abstractmethod
+    def advance(self, car: Car, car_input: CarInput, state: State, dt: float) -> State:
+        pass
+
+
+def derivative(car: Car, car_input: CarInput, state: State) -> State:
+    """Time derivative of `state` with the car's force model."""
+    _, _, velocity_x, velocity_y, angle, angular_velocity = state
+    acceleration_x, acceleration_y, angular_acceleration = car.dynamics(car_input, velocity_x, velocity_y, angle, angular_velocity)
+    return (velocity_x, velocity_y, float(acceleration_x), float(acceleration_y), angular_velocity,
+            float(angular_acceleration) - ANGULAR_DAMPING_RATE * angular_velocity)
+
+
+def _settle(car: Car, state: State) -> State:
+    # a yaw rate decaying on its own snaps to zero at ZERO, like the car at rest in Car.update
+    if abs(state[5]) < ZERO and car.angular_acceleration == 0:
+        return state[:5] + (0.0,)
+    return state
+
+
+def _add(state: State, rate: State, h: float) -> State:
+    return tuple(value + h * change for value, change in zip(state, rate))
+
+
+class SemiImplicitEuler(Integrator):
+    """Velocities first, then positions and heading from the new velocities; the yaw
+    rate decays exactly over the step."""
+
+    name = "semi-implicit"
+
+    def advance(self, car, car_input, state, dt):
+        x, y, velocity_x, velocity_y, angle, angular_velocity = state
+        acceleration_x, acceleration_y, angular_acceleration = car.dynamics(car_input, velocity_x, velocity_y, angle, angular_velocity)
+        velocity_x += float(acceleration_x) * dt
+        velocity_y += float(acceleration_y) * dt
+        angular_velocity = (angular_velocity + float(angular_acceleration) * dt) * math.exp(-ANGULAR_DAMPING_RATE * dt)
+        return _settle(car, (x + velocity_x * dt, y + velocity_y * dt, velocity_x, velocity_y,
+                             angle + angular_velocity * dt, angular_velocity))
+
+
+class RK2(Integrator):
+    """Midpoint method."""
+
+    name = "rk2"
+
+    def advance(self, car, car_input, state, dt):
+        k1 = derivative(car, car_input, state)
+        k2 = derivative(car, car_input, _add(state, k1, dt / 2))
+        return _settle(car, _add(state, k2, dt))
+
+
+class RK4(Integrator):
+    """Classic fourth-order Runge-Kutta."""
+
+    name = "rk4"
+
+    def advance(self, car, car_input, state, dt):
+        k1 = derivative(car, car_input, state)
+        k2 = derivative(car, car_input, _add(state, k1, dt / 2))
+        k3 = derivative(car, car_input, _add(state, k2, dt / 2))
+        k4 = derivative(car, car_input, _add(state, k3, dt))
+        rate = tuple((a + 2 * b + 2 * c + d) / 6 for a, b, c, d in zip(k1, k2, k3, k4))
+        return _settle(car, _add(state, rate, dt))
+
+
+class Adaptive(Integrator):
+    """Splits a step into substeps of `base` where the slip angles or yaw rate move fast.
+
+    The forces at the start of the step give the rates of change of the yaw rate and,
+    from the lateral acceleration and the yaw acceleration, of the slip angles. The step
+    is split so each substep changes the slip angles by at most `max_slip_change` rad
+    and the yaw rate by at most `max_yaw_rate_change` rad/s, up to `max_substeps`. On a
+    straight or in a steady turn one substep is taken, at the cost of one evaluation
+    more than `base`, so most of the work goes into transients: a step steer or a
+    lane change at a large `dt`.
+    """
+
+    name = "adaptive"
+
+    def __init__(self, base: Optional[Integrator] = None, max_slip_change: float = 0.005,
+                 max_yaw_rate_change: float = 0.02, max_substeps: int = 16):
+        self.base = base if base is not None else SemiImplicitEuler()
+        self.max_slip_change = max_slip_change
+        self.max_yaw_rate_change = max_yaw_rate_change
+        self.max_substeps = max_substeps
+        self.substeps = 0 # taken by the last step
+
+    def advance(self, car, car_input, state, dt):
+        rate = derivative(car, car_input, state)
+        forward_speed = car.velocity[0]
+        change = abs(rate[5]) * dt / self.max_yaw_rate_change
+        if forward_speed > ZERO:
+            # side slip moves with the lateral acceleration not taken up by turning,
+            # the wheels' rotation angle with the yaw acceleration
+            side_slip_rate = abs(car.acceleration[1] / forward_speed - state[5])
+            rotation_rate = abs(car.config.wheel_base * 0.5 * rate[5] / forward_speed)
+            change = max(change, (side_slip_rate + rotation_rate) * dt / self.max_slip_change)
+        self.substeps = min(max(math.ceil(change), 1), self.max_substeps)
+        for _ in range(self.substeps):
+            state = self.base.advance(car, car_input, state, dt / self.substeps)
+        return state
+
+
+INTEGRATORS = {integrator.name: integrator for integrator in (SemiImplicitEuler, RK2, RK4, Adaptive)}
+
+
+def make_integrator(name: str) -> Optional[Integrator]:
+    """The integrator called `name`; "euler" is the explicit step built into `Car.update`, None."""
+    if name == "euler":
+        return None
+    if name not in INTEGRATORS:
+        raise ValueError(f"unknown integrator '{name}', choose from euler, {', '.join(INTEGRATORS)}")
+    return INTEGRATORS[name]()
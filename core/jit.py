@@ -0,0 +1,158 @@
+import importlib.util
+import math
+
+# Numba is optional and slow to import, so it is only looked up here and imported by `kernels()`
+JIT_AVAILABLE = importlib.util.find_spec("numba") is not None
+
+
+def car_step(position_x, position_y, velocity_wc_x, velocity_wc_y, angle, angular_velocity, front_slip, rear_slip,
+             b, c, wheel_base, m, inertia, drag, resistance, cornering_front, cornering_rear, max_grip,
+             steer_angle, throttle, brake, dt, zero, gravity, angular_damping):
+    """One explicit step of the `ScalarCar.update` model for one car.
+
+    Takes the state, the config values and the inputs as floats and returns the new
+    state followed by the values `ScalarCar.dynamics` stores on the car:
+    `(position_x, position_y, velocity_wc_x, velocity_wc_y, angle, angular_velocity,
+    sin, cos, velocity_x, velocity_y, yaw_speed, rot_angle, side_slip, slip_angle_front,
+    slip_angle_rear, weight, lateral_force_front, lateral_force_rear, front_traction,
+    resistance_x, resistance_y, force_x, force_y, torque, acceleration_x, acceleration_y,
+    angular_acceleration, acceleration_wc_x, acceleration_wc_y)`. The constants of
+    `core.car` are passed in so this module does not import it, `angular_damping` as
+    the factor for this step, `core.car.angular_damping(dt)`. This is the plain
+    Python function, `kernels()` returns the compiled one.
+    """
+    sin = math.sin(angle)
+    cos = math.cos(angle)
+
+    velocity_x = cos * velocity_wc_y + sin * velocity_wc_x
+    velocity_y = -sin * velocity_wc_y + cos * velocity_wc_x
+    if math.hypot(velocity_x, velocity_y) < zero:
+        velocity_x = 0.0
+        velocity_y = 0.0
+    speed = math.hypot(velocity_x, velocity_y)
+
+    yaw_speed = wheel_base * 0.5 * angular_velocity
+    rot_angle = 0.0
+    side_slip = 0.0
+    slip_angle_front = 0.0
+    slip_angle_rear = 0.0
+    if speed > zero:
+        if velocity_x >= zero:
+            rot_angle = math.atan(yaw_speed / velocity_x)
+            side_slip = math.atan(velocity_y / velocity_x)
+        slip_angle_front = side_slip + rot_angle - steer_angle
+        slip_angle_rear = side_slip - rot_angle
+
+    # lateral force on wheels (Ca * slip_angle) capped to friction * load
+    weight = m * gravity * 0.5
+    lateral_force_front = min(max(cornering_front * slip_angle_front, -max_grip), max_grip) * weight
+    if front_slip == 1:
+        lateral_force_front *= 0.5
+    lateral_force_rear = min(max(cornering_rear * slip_angle_rear, -max_grip), max_grip) * weight
+    if rear_slip == 1:
+        lateral_force_rear *= 0.5
+
+    # longitudinal force - very simple traction model
+    direction = 1.0 if velocity_x > 0 else (-1.0 if velocity_x < 0 else 0.0)
+    front_traction = 150 * (throttle - brake * direction)
+    if rear_slip == 1:
+        front_traction *= 0.5
+
+    # forces and torque on body
+    resistance_x = -(resistance * velocity_x + drag * velocity_x * abs(velocity_x))
+    resistance_y = -(resistance * velocity_y + drag * velocity_y * abs(velocity_y))
+    force_x = front_traction + resistance_x
+    force_y = math.cos(steer_angle) * lateral_force_front + lateral_force_rear + resistance_y
+    torque = b * lateral_force_front - c * lateral_force_rear
+
+    # acceleration
+    acceleration_x = force_x / m
+    acceleration_y = force_y / m
+    angular_acceleration = torque / inertia
+    if abs(angular_acceleration) < zero:
+        angular_acceleration = 0.0
+    acceleration_wc_x = cos * acceleration_y + sin * acceleration_x
+    acceleration_wc_y = -sin * acceleration_y + cos * acceleration_x
+
+    # velocity is integrated acceleration, position is integrated velocity
+    velocity_wc_x += acceleration_wc_x * dt
+    velocity_wc_y += acceleration_wc_y * dt
+    position_x += velocity_wc_x * dt
+    position_y += velocity_wc_y * dt
+
+    # angular velocity and heading
+    angular_velocity = (angular_velocity + angular_acceleration * dt) * angular_damping
+    if abs(angular_velocity) < zero:
+        angular_velocity = 0.0
+    angle += angular_velocity * dt
+
+    return (position_x, position_y, velocity_wc_x, velocity_wc_y, angle, angular_velocity,
+            sin, cos, velocity_x, velocity_y, yaw_speed, rot_angle, side_slip, slip_angle_front,
+            slip_angle_rear, weight, lateral_force_front, lateral_force_rear, front_traction,
+            resistance_x, resistance_y, force_x, force_y, torque, acceleration_x, acceleration_y,
+            angular_acceleration, acceleration_wc_x, acceleration_wc_y)
+
+
+# what batch_step calls per car, the compiled car_step once kernels() ran
+_car_step = car_step
+
+
+def batch_step(position_wc, velocity_wc, angle, angular_velocity, orientation_vector, front_slip, rear_slip,
+               b, c, wheel_base, m, inertia, drag, resistance, cornering_front, cornering_rear, max_grip,
+               steer_angle, throttle, brake, dt, zero, gravity, angular_damping,
+               velocity, acceleration_wc, side_slip, slip_angle_front, slip_angle_rear, force, resistance_force,
+               acceleration, torque, angular_acceleration, front_traction, lateral_force_front, lateral_force_rear):
+    """`car_step` for every car of a `CarBatch`, updating its arrays in place."""
+    for i in range(angle.shape[0]):
+        result = _car_step(position_wc[i, 0], position_wc[i, 1], velocity_wc[i, 0], velocity_wc[i, 1],
+                           angle[i], angular_velocity[i], front_slip[i], rear_slip[i],
+                           b[i], c[i], wheel_base[i], m[i], inertia[i], drag[i], resistance[i],
+                           cornering_front[i], cornering_rear[i], max_grip[i],
+                           steer_angle[i], throttle[i], brake[i], dt, zero, gravity, angular_damping)
+        position_wc[i, 0] = result[0]
+        position_wc[i, 1] = result[1]
+        velocity_wc[i, 0] = result[2]
+        velocity_wc[i, 1] = result[3]
+        angle[i] = result[4]
+        angular_velocity[i] = result[5]
+        orientation_vector[i, 0] = math.cos(result[4])
+        orientation_vector[i, 1] = math.sin(result[4])
+        velocity[i, 0] = result[8]
+        velocity[i, 1] = result[9]
+        side_slip[i] = result[12]
+        slip_angle_front[i] = result[13]
+        slip_angle_rear[i] = result[14]
+        lateral_force_front[i, 1] = result[16]
+        lateral_force_rear[i, 1] = result[17]
+        front_traction[i, 0] = result[18]
+        resistance_force[i, 0] = result[19]
+        resistance_force[i, 1] = result[20]
+        force[i, 0] = result[21]
+        force[i, 1] = result[22]
+        torque[i] = result[23]
+        acceleration[i, 0] = result[24]
+        acceleration[i, 1] = result[25]
+        angular_acceleration[i] = result[26]
+        acceleration_wc[i, 0] = result[27]
+        acceleration_wc[i, 1] = result[28]
+
+
+_kernels = None
+
+
+def kernels():
+    """`(car_step, batch_step)` compiled with Numba, or the plain Python functions without it.
+
+    The first call imports Numba and returns lazily compiled functions: each compiles
+    on its first call, or loads the machine code Numba cached next to this module.
+    """
+    global _kernels, _car_step
+    if _kernels is None:
+        if JIT_AVAILABLE:
+            import numba
+            compile = numba.njit(cache=True)
+            _car_step = compile(car_step)
+            _kernels = (_car_step, compile(batch_step))
+        else:
+            _kernels = (car_step, batch_step)
+    return _kernels
@@ -0,0 +1,172 @@
+import csv
+import os
+import time
+from contextlib import nullcontext
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+_DISABLED = nullcontext()
+
+
+class _Section:
+    """Adds the wall time spent inside `with` to its column of the profiler's current frame.
+
+    One exists per path; entering it makes it the parent of the sections entered inside.
+    """
+
+    __slots__ = ("path", "children", "_stack", "_totals", "_column", "_start")
+
+    def __init__(self, path, stack, totals, column):
+        self.path = path
+        self.children = {}
+        self._stack = stack
+        self._totals = totals
+        self._column = column
+        self._start = 0.0
+
+    def __enter__(self):
+        self._stack.append(self)
+        self._start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        self._totals[self._column] += time.perf_counter() - self._start
+        self._stack.pop()
+
+
+class Profiler:
+    """Nested wall-clock timers, summed per section and frame into a ring buffer of `capacity` frames.
+
+        with PROFILER.section("draw"):
+            with PROFILER.section("map"):
+                ...
+        PROFILER.end_frame()
+
+    A section is keyed by its path, the names of the sections open around it and its
+    own joined by "/", so "map" above is "draw/map" and the same name under another
+    parent is another section. Times are inclusive, `stats` also reports the self
+    time, what is left after the children. A section entered several times in a
+    frame, like the car's update on every physics step, counts the sum. `end_frame`
+    stores the frame's sums and the wall time since the previous `end_frame`. While
+    disabled `section` returns one shared no-op context and `end_frame` returns at
+    once, so instrumented code costs a method call. `CAR_PROFILE=1` enables
+    `PROFILER` at start.
+    """
+
+    MAX_SECTIONS = 64
+
+    def __init__(self, capacity: int = 600, enabled: bool = False):
+        self.capacity = capacity
+        self.enabled = enabled
+        self.names = [] # section paths in column order, the order sections were first entered
+        self.parents = [] # column of each section's parent, -1 at the top
+        self._totals = [0.0] * Profiler.MAX_SECTIONS
+        self._root = _Section("", None, self._totals, -1)
+        self._stack = [self._root]
+        self._data = np.zeros((capacity, Profiler.MAX_SECTIONS), dtype=np.float64)
+        self._frame_times = np.zeros(capacity, dtype=np.float64)
+        self._count = 0
+        self._last_frame = None
+
+    def __len__(self):
+        return min(self._count, self.capacity)
+
+    def section(self, name: str):
+        if not self.enabled:
+            return _DISABLED
+        parent = self._stack[-1]
+        section = parent.children.get(name)
+        if section is None:
+            if len(self.names) == Profiler.MAX_SECTIONS:
+                raise ValueError(f"more than {Profiler.MAX_SECTIONS} profiler sections")
+            path = f"{parent.path}/{name}" if parent.path else name
+            section = _Section(path, self._stack, self._totals, len(self.names))
+            parent.children[name] = section
+            self.names.append(path)
+            self.parents.append(parent._column)
+        return section
+
+    def end_frame(self):
+        if not self.enabled:
+            self._last_frame = None
+            return
+        now = time.perf_counter()
+        if self._last_frame is not None:
+            row = self._count % self.capacity
+            self._data[row] = self._totals
+            self._frame_times[row] = now - self._last_frame
+            self._count += 1
+        self._last_frame = now
+        totals = self._totals
+        for column in range(len(self.names)):
+            totals[column] = 0.0
+
+    def clear(self):
+        self._count = 0
+        self._last_frame = None
+
+    def frame_times(self) -> np.ndarray:
+        """Wall time of the recorded frames in seconds, oldest first."""
+        return self._ordered(self._frame_times)
+
+    def section_times(self) -> np.ndarray:
+        """`(frames, len(names))` seconds per section and frame, oldest first."""
+        return self._ordered(self._data)[:, :len(self.names)]
+
+    def tree(self) -> List[Tuple[str, int]]:
+        """`(path, depth)` of every section, each followed by its children, depth 0 at the top."""
+        result = []
+
+        def visit(section, depth):
+            for child in section.children.values():
+                result.append((child.path, depth))
+                visit(child, depth + 1)
+        visit(self._root, 0)
+        return result
+
+    def stats(self, frames: int = None) -> Dict[str, Tuple[float, float, float]]:
+        """`(mean, p99, mean self time)` seconds per section, and of the whole frame as "frame", over the last `frames` frames.
+
+        The frame's self time is the part of it spent outside every section.
+        """
+        times = self.section_times()[-frames:] if frames else self.section_times()
+        frame_times = self.frame_times()[-frames:] if frames else self.frame_times()
+        if len(frame_times) == 0:
+            return {}
+        # self time: subtract every section from its parent, the top ones from the frame
+        self_times = times.copy()
+        frame_self_times = frame_times.copy()
+        for column, parent in enumerate(self.parents):
+            if parent < 0:
+                frame_self_times -= times[:, column]
+            else:
+                self_times[:, parent] -= times[:, column]
+        result = {"frame": (float(frame_times.mean()), float(np.percentile(frame_times, 99)), float(frame_self_times.mean()))}
+        means = times.mean(axis=0)
+        p99 = np.percentile(times, 99, axis=0)
+        self_means = self_times.mean(axis=0)
+        for column, name in enumerate(self.names):
+            result[name] = (float(means[column]), float(p99[column]), float(self_means[column]))
+        return result
+
+    def export(self, path: str):
+        """Write the recorded frames to a CSV, one row per frame and one column of inclusive ms per section path."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(["frame", "frame_ms"] + [f"{name}_ms" for name in self.names])
+            first = self._count - len(self)
+            for i, (frame_time, sections) in enumerate(zip(self.frame_times(), self.section_times())):
+                writer.writerow([first + i, f"{frame_time * 1000:.4f}"] + [f"{value * 1000:.4f}" for value in sections])
+
+    def _ordered(self, buffer):
+        count = len(self)
+        if self._count <= self.capacity:
+            return buffer[:count]
+        start = self._count % self.capacity
+        return np.concatenate((buffer[start:], buffer[:start]))
+
+
+PROFILER = Profiler(enabled=os.environ.get("CAR_PROFILE", "0") not in ("", "0"))
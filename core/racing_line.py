@@ -0,0 +1,332 @@
+import hashlib
+import itertools
+import os
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+from core.track import CACHE_DIR, PX_M_RATIO_MAP_IMAGE, decode_mask, downsample
+
+CACHE_VERSION = 1 # bump when the way the line is extracted changes
+
+LINE_ALPHA = 128 # pixels at least this opaque belong to the line
+SMOOTHING_PASSES = 4 # [1, 2, 1] / 4 passes over the traced points before resampling
+FALLBACK_CHUNK = 256 # positions checked against every segment at once, bounds the temporary arrays
+
+
+class Projection(NamedTuple):
+    """Nearest points on the racing line, one entry per query position."""
+    progress: np.ndarray # arc length from the start line along the line, in [0, length)
+    lateral_offset: np.ndarray # signed distance, positive right of the direction of travel on screen
+    distance: np.ndarray # unsigned distance to the line
+    point: np.ndarray # nearest point on the line, (n, 2)
+    segment: np.ndarray # index of the segment the point lies on
+
+
+class RacingLine:
+    """A closed polyline parameterised by arc length, with a uniform grid over its segments.
+
+    Positions are world coordinates like `Car.position_wc`. Each grid cell lists every
+    segment that comes within `reach` of it, so `project` checks a handful of
+    candidates per position in one vectorized pass. Positions further than `reach`
+    from the line fall back to checking all segments, which only happens well off the
+    track. `curvature` holds the signed curvature at every vertex.
+    """
+
+    def __init__(self, vertices: np.ndarray, index_cell_size: float = 1.0, reach: float = 6.0):
+        self.vertices = np.asarray(vertices, dtype=np.float64)
+        self._start = self.vertices
+        self._direction = np.roll(self.vertices, -1, axis=0) - self.vertices
+        self._segment_length = np.hypot(self._direction[:, 0], self._direction[:, 1])
+        self._length_squared = np.maximum(self._segment_length ** 2, 1e-12)
+        # arc_length[i] is the progress at vertex i, arc_length[-1] the full lap
+        self.arc_length = np.concatenate(([0.0], np.cumsum(self._segment_length)))
+        self.length = float(self.arc_length[-1])
+        self.curvature = self._vertex_curvature()
+        self._build_index(index_cell_size, reach)
+
+    @classmethod
+    def load(cls, path: str = 'assets/racing_line.png', cell_pixels: int = 40, spacing: float = 0.5,
+             start=(0.0, 0.0), cache_dir: str = CACHE_DIR) -> "RacingLine":
+        """Extract the line drawn in the image at `path`, or load it from the cache.
+
+        The image is reduced to cells of `cell_pixels`, which should be at least the
+        drawn line's width, traced into a loop, smoothed and resampled every `spacing`
+        metres. Progress starts at the vertex nearest to `start`, the car's start
+        position by default, and increases clockwise on screen.
+        """
+        with open(path, 'rb') as file:
+            digest = hashlib.sha1(file.read())
+        digest.update(repr((cell_pixels, spacing, tuple(start), LINE_ALPHA, SMOOTHING_PASSES, CACHE_VERSION)).encode())
+        cache_path = os.path.join(cache_dir, digest.hexdigest() + '.racing_line.npy')
+
+        if not os.path.exists(cache_path):
+            mask = decode_mask(path, LINE_ALPHA)
+            width, height = mask.shape
+            cells = np.argwhere(downsample(mask, cell_pixels, min_fraction=0))
+            del mask
+            points = ((cells + 0.5) * cell_pixels - (width / 2, height / 2)) / PX_M_RATIO_MAP_IMAGE
+            vertices = _orient(_resample(_smooth(_trace(points, cell_pixels / PX_M_RATIO_MAP_IMAGE)), spacing), start)
+            os.makedirs(cache_dir, exist_ok=True)
+            temporary_path = cache_path + '.tmp.npy'
+            np.save(temporary_path, vertices)
+            os.replace(temporary_path, cache_path)
+        return cls(np.load(cache_path))
+
+    def _vertex_curvature(self, window: float = 5.0) -> np.ndarray:
+        """Signed curvature in 1/m at each vertex, averaged over about `window` metres of arc.
+
+        Positive turns clockwise on screen, the direction of travel around the loop.
+        """
+        heading = np.arctan2(self._direction[:, 1], self._direction[:, 0])
+        turn = np.angle(np.exp(1j * (heading - np.roll(heading, 1))))
+        spacing = np.maximum((self._segment_length + np.roll(self._segment_length, 1)) / 2, 1e-12)
+        half_width = max(int(round(window / spacing.mean() / 2)), 0)
+        kernel = np.ones(2 * half_width + 1)
+        padded_turn = np.concatenate((turn[-half_width:], turn, turn[:half_width])) if half_width else turn
+        padded_spacing = np.concatenate((spacing[-half_width:], spacing, spacing[:half_width])) if half_width else spacing
+        return np.convolve(padded_turn, kernel, 'valid') / np.convolve(padded_spacing, kernel, 'valid')
+
+    def curvature_at(self, progress) -> np.ndarray:
+        """Curvature of the line at arc length `progress`, interpolated between vertices."""
+        return np.interp(np.mod(progress, self.length), self.arc_length,
+                         np.append(self.curvature, self.curvature[0]))
+
+    def _build_index(self, cell_size, reach):
+        self._cell_size = cell_size
+        self._reach = reach
+        low = np.minimum(self._start, self._start + self._direction).min(axis=0) - reach
+        high = np.maximum(self._start, self._start + self._direction).max(axis=0) + reach
+        self._origin = low
+        self._columns, self._rows = (np.ceil((high - low) / cell_size).astype(int) + 1)
+
+        # every segment goes into the cells its bounding box, grown by `reach`, overlaps
+        segment_low = np.floor((np.minimum(self._start, self._start + self._direction) - reach - low) / cell_size).astype(int)
+        segment_high = np.floor((np.maximum(self._start, self._start + self._direction) + reach - low) / cell_size).astype(int)
+        cells = [[] for _ in range(self._columns * self._rows)]
+        for segment, ((x0, y0), (x1, y1)) in enumerate(zip(segment_low, segment_high)):
+            for row in range(max(y0, 0), min(y1, self._rows - 1) + 1):
+                for column in range(max(x0, 0), min(x1, self._columns - 1) + 1):
+                    cells[row * self._columns + column].append(segment)
+        # compressed rows: the segments of cell i are _cell_segments[_cell_start[i]:_cell_start[i + 1]]
+        self._cell_start = np.concatenate(([0], np.cumsum([len(cell) for cell in cells]))).astype(np.intp)
+        self._cell_segments = np.fromiter(itertools.chain.from_iterable(cells), dtype=np.intp, count=self._cell_start[-1])
+
+    def project(self, positions) -> Projection:
+        """Project `(n, 2)` positions (or one position) onto the line."""
+        positions = np.asarray(positions, dtype=np.float64)
+        single = positions.ndim == 1
+        positions = positions.reshape(-1, 2)
+
+        cell = np.floor((positions - self._origin) / self._cell_size).astype(np.intp)
+        inside = (cell[:, 0] >= 0) & (cell[:, 0] < self._columns) & (cell[:, 1] >= 0) & (cell[:, 1] < self._rows)
+        cell_index = np.where(inside, cell[:, 1] * self._columns + cell[:, 0], 0)
+        first = self._cell_start[cell_index]
+        counts = np.where(inside, self._cell_start[cell_index + 1] - first, 0)
+        segment, t, distance_squared = self._nearest_in_cells(positions, first, counts)
+
+        # candidates only cover positions within `reach` of the line, check the rest against everything
+        far = np.flatnonzero(distance_squared > self._reach ** 2)
+        everything = np.arange(len(self._start))
+        for first in range(0, len(far), FALLBACK_CHUNK):
+            chunk = far[first:first + FALLBACK_CHUNK]
+            segment[chunk], t[chunk], distance_squared[chunk] = self._nearest(
+                positions[chunk], np.broadcast_to(everything, (len(chunk), len(everything))))
+
+        direction = self._direction[segment]
+        point = self._start[segment] + direction * t[:, None]
+        offset = positions - point
+        cross = direction[:, 0] * offset[:, 1] - direction[:, 1] * offset[:, 0]
+        distance = np.sqrt(distance_squared)
+        lateral_offset = np.where(cross < 0, -distance, distance)
+        progress = self.arc_length[segment] + t * self._segment_length[segment]
+        if single:
+            return Projection(progress[0], lateral_offset[0], distance[0], point[0], segment[0])
+        return Projection(progress, lateral_offset, distance, point, segment)
+
+    def _nearest_in_cells(self, positions, first, counts):
+        """Nearest of the `counts` candidates starting at `first` in `_cell_segments`, per position.
+
+        All (position, candidate) pairs are laid out flat, so the work follows the number
+        of candidates each position actually has. Positions without any get an infinite distance.
+        """
+        n = len(positions)
+        owner = np.repeat(np.arange(n), counts)
+        group_start = np.cumsum(counts) - counts
+        candidates = self._cell_segments[np.repeat(first - group_start, counts) + np.arange(len(owner))]
+
+        # x and y kept apart, reductions over a length-2 axis cost more than the arithmetic
+        direction_x = self._direction[:, 0][candidates]
+        direction_y = self._direction[:, 1][candidates]
+        relative_x = positions[:, 0][owner] - self._start[:, 0][candidates]
+        relative_y = positions[:, 1][owner] - self._start[:, 1][candidates]
+        t = (relative_x * direction_x + relative_y * direction_y) / self._length_squared[candidates]
+        np.clip(t, 0.0, 1.0, out=t)
+        offset_x = relative_x - direction_x * t
+        offset_y = relative_y - direction_y * t
+        distance_squared = offset_x * offset_x + offset_y * offset_y
+
+        segment = np.zeros(n, dtype=np.intp)
+        best_t = np.zeros(n)
+        best = np.full(n, np.inf)
+        found = counts > 0
+        if found.any():
+            best[found] = np.minimum.reduceat(distance_squared, group_start[found])
+            # first pair of each position that reaches its minimum
+            hits = np.flatnonzero(distance_squared == best[owner])
+            hits = hits[np.concatenate(([True], owner[hits[1:]] != owner[hits[:-1]]))]
+            segment[owner[hits]] = candidates[hits]
+            best_t[owner[hits]] = t[hits]
+        return segment, best_t, best
+
+    def _nearest(self, positions, candidates):
+        valid = candidates >= 0
+        candidates = np.where(valid, candidates, 0)
+        start = self._start[candidates]
+        direction = self._direction[candidates]
+        relative = positions[:, None, :] - start
+        t = np.clip((relative * direction).sum(axis=2) / self._length_squared[candidates], 0.0, 1.0)
+        offset = relative - direction * t[..., None]
+        distance_squared = (offset * offset).sum(axis=2)
+        distance_squared[~valid] = np.inf
+        best = np.argmin(distance_squared, axis=1)
+        rows = np.arange(len(positions))
+        return candidates[rows, best], t[rows, best], distance_squared[rows, best]
+
+    def point_at(self, progress) -> np.ndarray:
+        """Points on the line at arc length `progress`, wrapped around the lap."""
+        progress = np.mod(progress, self.length)
+        segment = np.clip(np.searchsorted(self.arc_length, progress, side='right') - 1, 0, len(self._start) - 1)
+        t = (progress - self.arc_length[segment]) / np.maximum(self._segment_length[segment], 1e-12)
+        return self._start[segment] + self._direction[segment] * np.expand_dims(t, -1)
+
+    def tangent_at(self, progress) -> np.ndarray:
+        """Unit direction of travel of the line at arc length `progress`."""
+        progress = np.mod(progress, self.length)
+        segment = np.clip(np.searchsorted(self.arc_length, progress, side='right') - 1, 0, len(self._start) - 1)
+        return self._direction[segment] / np.expand_dims(np.maximum(self._segment_length[segment], 1e-12), -1)
+
+
+class LapTimer:
+    """Lap and sector times for `n` cars from their progress along a line of `length`.
+
+    Call `update` once per physics step with every car's progress. Crossing times are
+    interpolated within the step. Timing starts at the first crossing of the start
+    line; driving backwards over a sector boundary voids the lap in progress.
+    """
+
+    def __init__(self, length: float, n: int = 1, sectors: int = 3):
+        self.length = length
+        self.sectors = sectors
+        self.time = 0.0
+        self.laps = np.zeros(n, dtype=int)
+        self.last_lap = np.full(n, np.nan)
+        self.best_lap = np.full(n, np.nan)
+        self.sector_times = np.full((n, sectors), np.nan) # latest time of each sector
+        self._lap_start = np.full(n, np.nan)
+        self._sector_start = np.full(n, np.nan)
+        self._progress: Optional[np.ndarray] = None
+        self._sector: Optional[np.ndarray] = None
+
+    def _sector_of(self, progress):
+        return np.minimum((progress / self.length * self.sectors).astype(int), self.sectors - 1)
+
+    def update(self, progress, dt: float):
+        progress = np.asarray(progress, dtype=np.float64).reshape(-1)
+        previous_time = self.time
+        self.time += dt
+        if self._progress is None:
+            self._progress = progress.copy()
+            self._sector = self._sector_of(progress)
+            return
+
+        # unwrap the step across the start line, then count the sector boundaries it crossed
+        delta = progress - self._progress
+        delta[delta < -self.length / 2] += self.length
+        delta[delta > self.length / 2] -= self.length
+        sector_length = self.length / self.sectors
+        boundary = np.floor((self._progress + delta) / sector_length)
+        crossed = boundary - np.floor(self._progress / sector_length)
+        forward = crossed == 1
+        backward = (crossed < 0) | (crossed > 1)
+
+        if forward.any():
+            # time at which the boundary was crossed, interpolated along the step
+            covered = boundary[forward] * sector_length - self._progress[forward]
+            fraction = np.clip(covered / np.maximum(delta[forward], 1e-12), 0.0, 1.0)
+            crossed_at = previous_time + fraction * dt
+
+            cars = np.flatnonzero(forward)
+            finished_sector = self._sector[forward]
+            self.sector_times[cars, finished_sector] = crossed_at - self._sector_start[forward]
+            self._sector_start[forward] = crossed_at
+
+            lap = np.mod(boundary[forward], self.sectors) == 0
+            lap_cars = cars[lap]
+            lap_time = crossed_at[lap] - self._lap_start[lap_cars]
+            timed = ~np.isnan(lap_time)
+            self.last_lap[lap_cars[timed]] = lap_time[timed]
+            self.best_lap[lap_cars[timed]] = np.fmin(self.best_lap[lap_cars[timed]], lap_time[timed])
+            self.laps[lap_cars[timed]] += 1
+            self._lap_start[lap_cars] = crossed_at[lap]
+
+        self._lap_start[backward] = np.nan
+        self._sector_start[backward] = np.nan
+        self._progress = progress.copy()
+        self._sector = self._sector_of(progress)
+
+
+def _trace(points: np.ndarray, cell_size: float) -> np.ndarray:
+    """Order the centres of the cells covering a drawn loop into a path along it.
+
+    Walks from the leftmost cell, each step moving to the mean of the unvisited cells
+    ahead within three cells and marking everything within 1.5 cells as visited.
+    """
+    visited = np.zeros(len(points), dtype=bool)
+    current = points[np.argmin(points[:, 0])]
+    direction = None
+    path = [current]
+    while True:
+        relative = points - current
+        distance = np.hypot(relative[:, 0], relative[:, 1])
+        visited[distance <= 1.5 * cell_size] = True
+        ahead = ~visited & (distance <= 3 * cell_size)
+        if direction is None and ahead.any():
+            # first step: pick one of the two ways around
+            direction = relative[np.flatnonzero(ahead)[0]]
+        if direction is not None:
+            ahead &= relative @ direction > 0
+        if not ahead.any():
+            break
+        following = points[ahead].mean(axis=0)
+        direction = following - current
+        current = following
+        path.append(current)
+
+    path = np.array(path)
+    if len(path) < 3 or np.hypot(*(path[-1] - path[0])) > 4 * cell_size or not visited.all():
+        raise ValueError("the racing line image does not contain a single closed loop")
+    return path
+
+
+def _smooth(path: np.ndarray) -> np.ndarray:
+    for _ in range(SMOOTHING_PASSES):
+        path = (np.roll(path, 1, axis=0) + 2 * path + np.roll(path, -1, axis=0)) / 4
+    return path
+
+
+def _resample(path: np.ndarray, spacing: float) -> np.ndarray:
+    """Points every `spacing` metres of arc length along the closed `path`."""
+    closed = np.vstack((path, path[:1]))
+    arc_length = np.concatenate(([0.0], np.cumsum(np.hypot(*np.diff(closed, axis=0).T))))
+    samples = np.arange(0.0, arc_length[-1], arc_length[-1] / max(int(round(arc_length[-1] / spacing)), 3))
+    return np.column_stack((np.interp(samples, arc_length, closed[:, 0]), np.interp(samples, arc_length, closed[:, 1])))
+
+
+def _orient(vertices: np.ndarray, start) -> np.ndarray:
+    """Start at the vertex nearest `start` and run clockwise on screen (y points down)."""
+    x, y = vertices[:, 0], vertices[:, 1]
+    if np.sum(x * np.roll(y, -1) - np.roll(x, -1) * y) < 0:
+        vertices = vertices[::-1]
+    first = np.argmin(np.hypot(*(vertices - np.asarray(start, dtype=np.float64)).T))
+    return np.roll(vertices, -first, axis=0)
@@ -0,0 +1,134 @@
+import hashlib
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+
+from core import car as car_module
+from core.car import Car, CarInput
+from core.car_batch import CarConfigBatch
+from core.simulation import simulate_timed, trajectory_row
+from core.telemetry import TelemetryRecorder
+
+REPLAY_VERSION = 1
+
+def trajectory_checksum(trajectory: np.ndarray) -> str:
+    """sha256 of a float64 trajectory from `core.simulation`, row by row."""
+    return hashlib.sha256(np.ascontiguousarray(trajectory, dtype=np.float64).tobytes()).hexdigest()
+
+
+def _pack(obj, names):
+    """Copies of `names` of `obj` as arrays keeping their dtype, and which of them were Python numbers."""
+    values = {name: np.array(getattr(obj, name)) for name in names}
+    python_numbers = [name for name in names if not isinstance(getattr(obj, name), (np.ndarray, np.generic))]
+    return values, python_numbers
+
+
+def _unpack(value: np.ndarray, python_number: bool):
+    # numpy scalars and Python floats promote differently against float32, keep the original kind
+    if python_number:
+        return float(value)
+    return value.copy() if value.ndim else value[()]
+
+
+class Recording:
+    """A car's starting state and config plus one `(dt, steer_angle, throttle, brake)` row per step.
+
+    Replaying it re-drives a fresh car of the recorded class through the same steps;
+    `checksum` is the `trajectory_checksum` of the recorded run, so a replay whose
+    trajectory hashes differently has diverged from it.
+    """
+
+    def __init__(self, car_class: str, config: dict, state: dict, python_numbers: Iterable[str],
+                 steps: np.ndarray, checksum: Optional[str] = None):
+        self.car_class = car_class
+        self.config = config
+        self.state = state
+        self.python_numbers = frozenset(python_numbers)
+        self.steps = np.asarray(steps, dtype=np.float64).reshape(-1, 4)
+        self.checksum = checksum
+
+    def __len__(self):
+        return len(self.steps)
+
+    @property
+    def duration(self) -> float:
+        return float(self.steps[:, 0].sum())
+
+    def make_car(self) -> Car:
+        """A new car of the recorded class in the recorded starting state."""
+        car = object.__new__(getattr(car_module, self.car_class))
+        car.__init__()
+        return self.restore(car)
+
+    def restore(self, car: Car) -> Car:
+        """Put `car` in the recorded starting state; config values are set directly so
+        derived values like `inertia` are the recorded ones, not recomputed."""
+        for name, value in self.config.items():
+            setattr(car.config, name, _unpack(value, "config." + name in self.python_numbers))
+        for name, value in self.state.items():
+            setattr(car, name, _unpack(value, name in self.python_numbers))
+        return car
+
+    def inputs(self) -> Iterable[Tuple[CarInput, float]]:
+        """The recorded `(CarInput, dt)` pairs, in step order."""
+        for dt, steer_angle, throttle, brake in self.steps.tolist():
+            yield CarInput(steer_angle, throttle, brake), dt
+
+    def save(self, path: str):
+        arrays = {"config." + name: value for name, value in self.config.items()}
+        arrays.update({"state." + name: value for name, value in self.state.items()})
+        np.savez_compressed(path, version=REPLAY_VERSION, car_class=self.car_class,
+                            python_numbers=np.array(sorted(self.python_numbers), dtype=str),
+                            checksum=self.checksum or "", steps=self.steps, **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> "Recording":
+        with np.load(path) as file:
+            version = int(file["version"])
+            if version != REPLAY_VERSION:
+                raise ValueError(f"{path}: replay version {version}, expected {REPLAY_VERSION}")
+            config = {key[len("config."):]: file[key] for key in file.files if key.startswith("config.")}
+            state = {key[len("state."):]: file[key] for key in file.files if key.startswith("state.")}
+            return cls(str(file["car_class"]), config, state, file["python_numbers"].tolist(),
+                       file["steps"], str(file["checksum"]) or None)
+
+
+class InputRecorder:
+    """Records the input stream of a live car, call `record` after every physics step.
+
+    The car's state and config are captured when the recorder is created, so recording
+    can start at any point of a run. The trajectory is hashed as it goes instead of
+    being kept.
+    """
+
+    def __init__(self, car: Car):
+        config, config_numbers = _pack(car.config, CarConfigBatch.FIELDS)
+        self._state, state_numbers = _pack(car, car.STATE)
+        self._config = config
+        self._python_numbers = state_numbers + ["config." + name for name in config_numbers]
+        self._car_class = type(car).__name__
+        self._steps = []
+        self._time = 0.0
+        self._hash = hashlib.sha256()
+
+    def __len__(self):
+        return len(self._steps)
+
+    def record(self, car: Car, car_input: CarInput, dt: float):
+        self._steps.append((dt, car_input.steer_angle, car_input.throttle, car_input.brake))
+        self._time += dt
+        self._hash.update(np.array(trajectory_row(self._time, car, car_input), dtype=np.float64).tobytes())
+
+    @property
+    def checksum(self) -> str:
+        return self._hash.hexdigest()
+
+    def recording(self) -> Recording:
+        return Recording(self._car_class, self._config, self._state, self._python_numbers,
+                         np.array(self._steps, dtype=np.float64), self.checksum)
+
+
+def replay(recording: Recording, telemetry: Optional[TelemetryRecorder] = None) -> Tuple[np.ndarray, str]:
+    """Run `recording` headless as fast as possible and return the trajectory and its checksum."""
+    trajectory = simulate_timed(recording.make_car(), recording.inputs(), telemetry)
+    return trajectory, trajectory_checksum(trajectory)
@@ -0,0 +1,75 @@
+import csv
+from itertools import islice
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from core.car import Car, CarConfig, CarInput
+from core.telemetry import TelemetryRecorder
+
+TRAJECTORY_FIELDS = ("t", "x", "y", "angle", "velocity_x", "velocity_y", "angular_velocity",
+                     "steer_angle", "throttle", "brake")
+
+
+def configure(config: CarConfig, overrides: Dict[str, float]) -> CarConfig:
+    """Apply `overrides` to `config`, going through the `set_*` methods where they exist
+    so derived values like `wheel_base` and `inertia` stay consistent."""
+    for name, value in overrides.items():
+        if not hasattr(config, name):
+            raise ValueError(f"CarConfig has no parameter '{name}'")
+        setter = getattr(config, f"set_{name}", None)
+        if setter is not None:
+            setter(value)
+        else:
+            setattr(config, name, value)
+    return config
+
+
+def simulate(car: Car, inputs: Iterable[CarInput], dt: float, steps: Optional[int] = None,
+             telemetry: Optional[TelemetryRecorder] = None) -> np.ndarray:
+    """Step `car` once per input with a fixed `dt` and return its trajectory.
+
+    `inputs` may be a sequence or a (possibly endless) generator; `steps` caps the run.
+    The result has one row per step with the columns in `TRAJECTORY_FIELDS`: pose and
+    angular velocity after the step, and `Car.velocity`, the body-frame velocity the
+    step was computed from. Each step is also recorded into `telemetry` if given.
+    """
+    if steps is not None:
+        inputs = islice(inputs, steps)
+    return simulate_timed(car, ((car_input, dt) for car_input in inputs), telemetry)
+
+
+def simulate_timed(car: Car, timed_inputs: Iterable[Tuple[CarInput, float]],
+                   telemetry: Optional[TelemetryRecorder] = None) -> np.ndarray:
+    """Like `simulate`, with each input paired with the dt of its own step."""
+    rows = []
+    t = 0.0
+    for car_input, dt in timed_inputs:
+        car.update(car_input, dt)
+        if telemetry is not None:
+            telemetry.record(car, dt)
+        t += dt
+        rows.append(trajectory_row(t, car, car_input))
+    return np.array(rows, dtype=np.float64).reshape(-1, len(TRAJECTORY_FIELDS))
+
+
+def trajectory_row(t: float, car: Car, car_input: CarInput) -> tuple:
+    """The `TRAJECTORY_FIELDS` of `car` after the step driven by `car_input` that ended at `t`."""
+    return (t, car.position_wc[0], car.position_wc[1], car.angle,
+            car.velocity[0], car.velocity[1], car.angular_velocity,
+            car_input.steer_angle, car_input.throttle, car_input.brake)
+
+
+def read_inputs(path: str) -> Iterable[CarInput]:
+    """Read a scripted input sequence, one `steer_angle,throttle,brake` row per step."""
+    with open(path, newline="") as file:
+        for row in csv.DictReader(file):
+            yield CarInput(float(row["steer_angle"]), float(row["throttle"]), float(row["brake"]))
+
+
+def write_trajectory(path: str, trajectory: np.ndarray):
+    """Write a trajectory as `.npz` (one array per field) or, for any other extension, CSV."""
+    if path.endswith(".npz"):
+        np.savez(path, **{field: trajectory[:, i] for i, field in enumerate(TRAJECTORY_FIELDS)})
+    else:
+        np.savetxt(path, trajectory, delimiter=",", fmt="%.17g", header=",".join(TRAJECTORY_FIELDS), comments="")
@@ -0,0 +1,186 @@
+import itertools
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.car import CarConfig
+from core.car_batch import CarBatch
+from core.simulation import configure
+
+# CarConfig parameters a sweep can vary, the others keep their defaults
+PARAMETERS = ("b", "c", "m", "cornering_front", "cornering_rear", "max_grip", "drag", "resistance")
+
+METRICS = ("peak_lateral_acceleration", "steady_yaw_rate", "yaw_rate_overshoot", "settling_time")
+
+SETTLING_BAND = 0.05 # yaw rate within 5% of its steady value counts as settled
+STEADY_WINDOW = 0.5 # s at the end of a manoeuvre averaged for the steady yaw rate
+
+
+class Manoeuvre(ABC):
+    """Open-loop inputs for every car of a sweep, starting straight at `speed` m/s.
+
+    `controls(t, cruise_throttle)` returns steer angle, throttle and brake at time `t`
+    as scalars or per-car arrays; `cruise_throttle` is the throttle that holds the
+    start speed on a straight for each car. Yaw-rate metrics are measured from
+    `steer_time` on. The car model zeroes angular velocities below `ZERO` every step,
+    so at small `dt` a small steer angle never starts a yaw; the default angles do.
+    """
+
+    name = "manoeuvre"
+
+    def __init__(self, speed: float = 20.0, duration: float = 5.0, steer_time: float = 0.5, dt: float = 1 / 240):
+        self.speed = speed
+        self.duration = duration
+        self.steer_time = steer_time
+        self.dt = dt
+
+    @property
+    def steps(self) -> int:
+        return int(round(self.duration / self.dt))
+
+    @abstractmethod
+    def controls(self, t: float, cruise_throttle: np.ndarray):
+        pass
+
+
+class StepSteer(Manoeuvre):
+    """Steer to `steer_angle` at once at `steer_time`, throttle held at cruise."""
+
+    name = "step-steer"
+
+    def __init__(self, steer_angle: float = 0.15, **kwargs):
+        super().__init__(**kwargs)
+        self.steer_angle = steer_angle
+
+    def controls(self, t, cruise_throttle):
+        return (self.steer_angle if t >= self.steer_time else 0.0), cruise_throttle, 0.0
+
+
+class RampSteer(Manoeuvre):
+    """Steer at `steer_rate` rad/s from `steer_time` up to `steer_angle`, throttle held at cruise."""
+
+    name = "ramp-steer"
+
+    def __init__(self, steer_angle: float = 0.15, steer_rate: float = 0.05, **kwargs):
+        super().__init__(**kwargs)
+        self.steer_angle = steer_angle
+        self.steer_rate = steer_rate
+
+    def controls(self, t, cruise_throttle):
+        return min(max(t - self.steer_time, 0.0) * self.steer_rate, self.steer_angle), cruise_throttle, 0.0
+
+
+class BrakeInTurn(Manoeuvre):
+    """Step steer, then from `brake_time` brake with `brake` and release the throttle."""
+
+    name = "brake-in-turn"
+
+    def __init__(self, steer_angle: float = 0.15, brake_time: float = 2.5, brake: float = 20.0, **kwargs):
+        super().__init__(**kwargs)
+        self.steer_angle = steer_angle
+        self.brake_time = brake_time
+        self.brake = brake
+
+    def controls(self, t, cruise_throttle):
+        steer = self.steer_angle if t >= self.steer_time else 0.0
+        if t >= self.brake_time:
+            return steer, 0.0, self.brake
+        return steer, cruise_throttle, 0.0
+
+
+MANOEUVRES = {manoeuvre.name: manoeuvre for manoeuvre in (StepSteer, RampSteer, BrakeInTurn)}
+
+
+def grid(values: Dict[str, Sequence[float]]) -> Tuple[Tuple[str, ...], np.ndarray]:
+    """Every combination of the given parameter values, as `(names, (n, len(names)) array)`."""
+    _check_names(values)
+    names = tuple(values)
+    rows = np.array(list(itertools.product(*(values[name] for name in names))), dtype=np.float64)
+    return names, rows.reshape(-1, len(names))
+
+
+def random_sample(bounds: Dict[str, Tuple[float, float]], n: int,
+                  seed: Optional[int] = None) -> Tuple[Tuple[str, ...], np.ndarray]:
+    """`n` configs drawn uniformly from `[low, high)` per parameter."""
+    _check_names(bounds)
+    names = tuple(bounds)
+    rng = np.random.default_rng(seed)
+    low = np.array([bounds[name][0] for name in names], dtype=np.float64)
+    high = np.array([bounds[name][1] for name in names], dtype=np.float64)
+    return names, low + (high - low) * rng.random((n, len(names)))
+
+
+def _check_names(names):
+    unknown = set(names) - set(PARAMETERS)
+    if unknown:
+        raise ValueError(f"cannot sweep {', '.join(sorted(unknown))}, choose from {', '.join(PARAMETERS)}")
+
+
+def run_chunk(names: Sequence[str], values: np.ndarray, manoeuvre: Manoeuvre) -> np.ndarray:
+    """Drive one `CarBatch` of configs through `manoeuvre`, return a `(n, len(METRICS))` array."""
+    batch = CarBatch(configs=[configure(CarConfig(), dict(zip(names, row))) for row in values.tolist()])
+    dt = manoeuvre.dt
+    speed = manoeuvre.speed
+    batch.velocity_wc[:, 1] = speed # heading 0 points along +y
+    cruise_throttle = (batch.config.resistance * speed + batch.config.drag * speed * speed) / 150
+
+    steps = manoeuvre.steps
+    yaw_rate = np.empty((steps, len(batch)))
+    peak_lateral_acceleration = np.zeros(len(batch))
+    for i in range(steps):
+        steer, throttle, brake = manoeuvre.controls(i * dt, cruise_throttle)
+        batch.step(steer, throttle, brake, dt)
+        np.maximum(peak_lateral_acceleration, np.abs(batch.acceleration[:, 1]), out=peak_lateral_acceleration)
+        yaw_rate[i] = batch.angular_velocity
+
+    # yaw-rate response from the steer input on, against the mean over the last STEADY_WINDOW
+    response = yaw_rate[min(int(round(manoeuvre.steer_time / dt)), steps - 1):]
+    steady = response[-max(int(round(STEADY_WINDOW / dt)), 1):].mean(axis=0)
+    magnitude = np.abs(steady)
+    turning = magnitude > 1e-6
+    safe_magnitude = np.where(turning, magnitude, 1.0)
+    peak = (response * np.sign(steady)).max(axis=0)
+    overshoot = np.where(turning, np.maximum(peak / safe_magnitude - 1.0, 0.0), np.nan)
+
+    outside = np.abs(response - steady) > SETTLING_BAND * magnitude
+    last_outside = len(response) - 1 - np.argmax(outside[::-1], axis=0)
+    settling_time = np.where(outside.any(axis=0), (last_outside + 1) * dt, 0.0)
+    # still outside the band at the end: never settled
+    settling_time[outside[-1]] = np.nan
+    settling_time[~turning] = np.nan
+
+    return np.column_stack((peak_lateral_acceleration, steady, overshoot, settling_time))
+
+
+def run_sweep(names: Sequence[str], values: np.ndarray, manoeuvre: Manoeuvre, chunk_size: int = 2048,
+              workers: Optional[int] = None) -> Iterator[Tuple[slice, np.ndarray]]:
+    """Run every config row of `values` through `manoeuvre`, yielding `(rows, metrics)` per chunk.
+
+    Chunks are vectorized `CarBatch` runs fanned out over `workers` processes (all cores
+    by default, 1 runs in this process) and yielded in order as they finish.
+    """
+    chunks = [slice(start, min(start + chunk_size, len(values))) for start in range(0, len(values), chunk_size)]
+    if workers == 1 or len(chunks) <= 1:
+        for rows in chunks:
+            yield rows, run_chunk(names, values[rows], manoeuvre)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(run_chunk, itertools.repeat(names), (values[rows] for rows in chunks),
+                               itertools.repeat(manoeuvre))
+        yield from zip(chunks, results)
+
+
+def write_sweep(path: str, names: Sequence[str], values: np.ndarray, results: Iterator[Tuple[slice, np.ndarray]]) -> int:
+    """Stream `run_sweep` results to a CSV with one row per config, return the number of rows."""
+    count = 0
+    with open(path, "w") as file:
+        file.write(",".join(("index",) + tuple(names) + METRICS) + "\n")
+        for rows, metrics in results:
+            index = np.arange(rows.start, rows.stop)[:, None]
+            np.savetxt(file, np.hstack((index, values[rows], metrics)), delimiter=",",
+                       fmt=["%d"] + ["%.10g"] * (len(names) + len(METRICS)))
+            file.flush()
+            count += rows.stop - rows.start
+    return count
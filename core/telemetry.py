@@ -0,0 +1,75 @@
+from typing import Optional, Sequence
+
+import numpy as np
+
+from core.car import Car
+
+
+class TelemetryRecorder:
+    """Records per-step car values into a preallocated ring buffer.
+
+    `record` writes one row into a fixed `(capacity, fields)` float64 array and never
+    allocates, so the recorder can stay on in normal runs; once full, the oldest rows
+    are overwritten. `sample_every` records only every n-th step. The available fields
+    are the keys of the car's `TELEMETRY` mapping, see `Car.TELEMETRY`.
+    """
+
+    def __init__(self, capacity: int = 14400, fields: Optional[Sequence[str]] = None, sample_every: int = 1):
+        self.fields = tuple(fields) if fields is not None else tuple(Car.TELEMETRY)
+        unknown = set(self.fields) - set(Car.TELEMETRY)
+        if unknown:
+            raise ValueError(f"unknown telemetry fields: {', '.join(sorted(unknown))}")
+        if sample_every < 1:
+            raise ValueError("sample_every must be at least 1")
+        self.capacity = capacity
+        self.sample_every = sample_every
+
+        self._data = np.zeros((capacity, len(self.fields)), dtype=np.float64)
+        self._time = np.zeros(capacity, dtype=np.float64)
+        self._getters = ()
+        self._car_type = None
+        self._count = 0
+        self._steps = 0
+        self._elapsed = 0.0
+
+    def __len__(self):
+        return min(self._count, self.capacity)
+
+    def record(self, car: Car, dt: float):
+        """Account for one physics step of `dt` and store the car's values if it is sampled."""
+        self._elapsed += dt
+        self._steps += 1
+        if self._steps % self.sample_every:
+            return
+        if type(car) is not self._car_type:
+            self._car_type = type(car)
+            self._getters = tuple(car.TELEMETRY[field] for field in self.fields)
+
+        row = self._count % self.capacity
+        data = self._data
+        for column, getter in enumerate(self._getters):
+            data[row, column] = getter(car)
+        self._time[row] = self._elapsed
+        self._count += 1
+
+    def clear(self):
+        self._count = 0
+        self._steps = 0
+        self._elapsed = 0.0
+
+    def snapshot(self):
+        """Return `(time, data)` copies of the recorded rows, oldest first."""
+        if self._count <= self.capacity:
+            return self._time[:self._count].copy(), self._data[:self._count].copy()
+        start = self._count % self.capacity
+        order = np.r_[start:self.capacity, 0:start]
+        return self._time[order], self._data[order]
+
+    def export(self, path: str):
+        """Write the recorded rows to `.npz` (one array per field) or, for any other extension, CSV."""
+        time, data = self.snapshot()
+        if path.endswith(".npz"):
+            np.savez(path, t=time, **{field: data[:, i] for i, field in enumerate(self.fields)})
+        else:
+            np.savetxt(path, np.column_stack((time, data)), delimiter=",", fmt="%.17g",
+                       header=",".join(("t",) + self.fields), comments="")
@@ -0,0 +1,186 @@
+import hashlib
+import os
+from typing import Tuple
+
+import numpy as np
+
+CACHE_DIR = '.asset_cache'
+CACHE_VERSION = 1 # bump when the way the grids are built changes
+
+PX_M_RATIO_MAP_IMAGE = 240 / 6 # pixel/meter, same as GameDrawer.PX_M_RATIO_MAP_IMAGE
+ROAD_ALPHA = 128 # pixels at least this opaque are road
+_FAR = 1e20 # squared distance of cells without a site, finite so the envelope arithmetic stays defined
+
+
+class TrackMap:
+    """Where the road is, on a grid of square cells over the track image.
+
+    `occupancy[ix, iy]` is True for road cells, `signed_distance[ix, iy]` is the distance
+    in metres from the cell centre to the road edge, positive on the road and negative
+    off it. World coordinates are those of `Car.position_wc`: the image centre is the
+    origin and the image is `PX_M_RATIO_MAP_IMAGE` pixels per metre, as drawn by
+    `GameDrawer`. Queries take one position or an `(n, 2)` array of them and cost a
+    few array operations regardless of the track size.
+    """
+
+    def __init__(self, occupancy: np.ndarray, signed_distance: np.ndarray, origin: Tuple[float, float], cell_size: float):
+        self.occupancy = occupancy
+        self.signed_distance = signed_distance
+        self.origin = np.asarray(origin, dtype=np.float64)
+        self.cell_size = cell_size
+        self.shape = occupancy.shape
+        self._max_index = np.array(self.shape) - 1
+
+    @classmethod
+    def load(cls, path: str = 'assets/new_racetrack.png', cell_pixels: int = 10, cache_dir: str = CACHE_DIR) -> "TrackMap":
+        """Build the grids for the track image at `path`, `cell_pixels` image pixels per cell.
+
+        The first load decodes the image and computes the distance field, later loads
+        memory-map the cached `.npy` files, keyed by the image's hash and `cell_pixels`.
+        """
+        with open(path, 'rb') as file:
+            digest = hashlib.sha1(file.read())
+        digest.update(repr((cell_pixels, ROAD_ALPHA, CACHE_VERSION)).encode())
+        prefix = os.path.join(cache_dir, digest.hexdigest())
+        paths = {name: f"{prefix}.track_{name}.npy" for name in ("occupancy", "distance", "meta")}
+
+        if not all(os.path.exists(cache_path) for cache_path in paths.values()):
+            road = decode_mask(path)
+            occupancy = downsample(road, cell_pixels)
+            distance = (signed_distance_field(occupancy) * (cell_pixels / PX_M_RATIO_MAP_IMAGE)).astype(np.float32)
+            meta = np.array([road.shape[0], road.shape[1], cell_pixels], dtype=np.float64)
+            os.makedirs(cache_dir, exist_ok=True)
+            for name, array in (("occupancy", occupancy), ("distance", distance), ("meta", meta)):
+                temporary_path = paths[name] + '.tmp.npy'
+                np.save(temporary_path, array)
+                os.replace(temporary_path, paths[name])
+
+        width, height, cell_pixels = np.load(paths["meta"])
+        cell_size = cell_pixels / PX_M_RATIO_MAP_IMAGE
+        origin = (-width / 2 / PX_M_RATIO_MAP_IMAGE, -height / 2 / PX_M_RATIO_MAP_IMAGE)
+        return cls(np.load(paths["occupancy"], mmap_mode='r'), np.load(paths["distance"], mmap_mode='r'), origin, cell_size)
+
+    def cell(self, positions) -> Tuple[np.ndarray, np.ndarray]:
+        """Grid indices of the cells containing `positions`, clamped to the grid."""
+        cells = np.floor((np.asarray(positions, dtype=np.float64) - self.origin) / self.cell_size).astype(np.intp)
+        np.clip(cells, 0, self._max_index, out=cells)
+        return cells[..., 0], cells[..., 1]
+
+    def on_track(self, positions):
+        """True for positions on the road; anything outside the image is off track."""
+        positions = np.asarray(positions, dtype=np.float64)
+        return self.occupancy[self.cell(positions)] & (self._outside_distance(positions) == 0)
+
+    def distance_to_edge(self, positions):
+        """Signed distance in metres to the road edge, positive on the road, bilinear between cell centres.
+
+        Beyond the image the distance keeps growing with the distance to the image border.
+        """
+        positions = np.asarray(positions, dtype=np.float64)
+        grid = (positions - self.origin) / self.cell_size - 0.5
+        low = np.floor(grid)
+        fraction = grid - low
+        low = low.astype(np.intp)
+        x0 = np.clip(low[..., 0], 0, self._max_index[0])
+        y0 = np.clip(low[..., 1], 0, self._max_index[1])
+        x1 = np.minimum(x0 + 1, self._max_index[0])
+        y1 = np.minimum(y0 + 1, self._max_index[1])
+        fx = np.clip(fraction[..., 0], 0.0, 1.0)
+        fy = np.clip(fraction[..., 1], 0.0, 1.0)
+        distance = self.signed_distance
+        top = distance[x0, y0] * (1 - fx) + distance[x1, y0] * fx
+        bottom = distance[x0, y1] * (1 - fx) + distance[x1, y1] * fx
+        return top * (1 - fy) + bottom * fy - self._outside_distance(positions)
+
+    def _outside_distance(self, positions):
+        # distance from positions beyond the image to its border, 0 inside
+        low = self.origin
+        high = self.origin + np.array(self.shape) * self.cell_size
+        beyond = np.maximum(np.maximum(low - positions, positions - high), 0.0)
+        return np.hypot(beyond[..., 0], beyond[..., 1])
+
+
+def decode_mask(path: str, threshold: int = ROAD_ALPHA) -> np.ndarray:
+    """Pixels of the image at `path` that are drawn, indexed `[x, y]` like pygame's surfarray.
+
+    Drawn means at least `threshold` alpha, or for images without transparency a
+    colour other than the background colour in the top left corner.
+    """
+    import pygame # only needed to build caches
+
+    image = pygame.image.load(path)
+    if image.get_flags() & pygame.SRCALPHA:
+        alpha = pygame.surfarray.pixels_alpha(image)
+        mask = alpha >= threshold
+        del alpha
+        return mask
+    pixels = pygame.surfarray.array3d(image)
+    return (pixels != pixels[0, 0]).any(axis=2)
+
+
+def downsample(mask: np.ndarray, cell_pixels: int, min_fraction: float = 0.5) -> np.ndarray:
+    """Set a cell if at least `min_fraction` of its pixels are (and at least one); partial
+    cells at the border are padded."""
+    width, height = mask.shape
+    columns, rows = -(-width // cell_pixels), -(-height // cell_pixels)
+    if (columns * cell_pixels, rows * cell_pixels) != mask.shape:
+        padded = np.zeros((columns * cell_pixels, rows * cell_pixels), dtype=bool)
+        padded[:width, :height] = mask
+        mask = padded
+    counts = mask.reshape(columns, cell_pixels, rows, cell_pixels).sum(axis=(1, 3), dtype=np.int32)
+    return counts >= max(min_fraction * cell_pixels * cell_pixels, 1)
+
+
+def signed_distance_field(occupancy: np.ndarray) -> np.ndarray:
+    """Euclidean distance in cells from each cell centre to the boundary, positive where `occupancy` is set."""
+    inside = np.sqrt(_squared_distance(~occupancy))
+    outside = np.sqrt(_squared_distance(occupancy))
+    # the boundary runs between cells, half a cell from the nearest centre on either side
+    return np.where(occupancy, inside - 0.5, 0.5 - outside)
+
+
+def _squared_distance(sites: np.ndarray) -> np.ndarray:
+    """Squared Euclidean distance from every cell to the nearest set cell of `sites`."""
+    far = np.where(sites, 0.0, _FAR)
+    return _lower_envelope(_lower_envelope(far).T).T
+
+
+def _lower_envelope(f: np.ndarray) -> np.ndarray:
+    """Felzenszwalb-Huttenlocher 1D distance transform of every row of `f` at once.
+
+    `result[r, q] = min_p (q - p)**2 + f[r, p]`. The rows advance through the columns
+    in lockstep; the per-row envelope pointers move under masks instead of in loops.
+    """
+    rows, n = f.shape
+    index = np.arange(rows)
+    vertices = np.zeros((rows, n), dtype=np.intp)
+    boundaries = np.empty((rows, n + 1))
+    boundaries[:, 0] = -np.inf
+    boundaries[:, 1] = np.inf
+    k = np.zeros(rows, dtype=np.intp)
+
+    for q in range(1, n):
+        fq = f[:, q] + q * q
+        while True:
+            vertex = vertices[index, k]
+            s = (fq - (f[index, vertex] + vertex * vertex)) / (2 * (q - vertex))
+            hidden = s <= boundaries[index, k]
+            if not hidden.any():
+                break
+            k[hidden] -= 1
+        k += 1
+        vertices[index, k] = q
+        boundaries[index, k] = s
+        boundaries[index, k + 1] = np.inf
+
+    result = np.empty_like(f)
+    k[:] = 0
+    for q in range(n):
+        while True:
+            ahead = boundaries[index, k + 1] < q
+            if not ahead.any():
+                break
+            k[ahead] += 1
+        vertex = vertices[index, k]
+        result[:, q] = (q - vertex) ** 2 + f[index, vertex]
+    return result
@@ -0,0 +1,76 @@
+"""Render recordings from `core.replay` to PNG frames or a raw video stream, without a window.
+
+    python export_replay.py replays/replay_20240101_120000.npz --output frames/
+    python export_replay.py replays/*.npz --output exports/ --format raw --workers 8
+    python export_replay.py replays/replay_20240101_120000.npz --format raw --output - | \\
+        ffmpeg -f rawvideo -pix_fmt rgb24 -s 1920x1080 -r 60 -i - replay.mp4
+
+Frames are what the game screen shows during a replay, world and HUD, at `--fps`
+frames per second of game time, rendered as fast as possible. With several
+recordings `--output` is a directory holding one PNG directory or .rgb file per
+recording; with one, it is that directory or file itself. Encoding and writing run
+on `--workers` threads behind a queue of `--queue` frames, see `ui.export`.
+"""
+import os
+
+# pygame greets on stdout when imported, which would corrupt a raw stream there
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import argparse
+import contextlib
+import sys
+import time
+
+from core.replay import Recording
+from ui.export import FrameExporter, PngSequence, RawVideo, render_replay
+from ui.game_screen import GameScreen
+from ui.offscreen import init_headless_display
+from ui.screen import Screen
+
+
+def make_sink(args, output):
+    if args.format == "png":
+        return PngSequence(output, args.compression)
+    return RawVideo(sys.stdout.buffer if output == "-" else output)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("recordings", nargs="+", help="recorded .npz files")
+    parser.add_argument("--output", required=True, help="PNG directory, .rgb file or - for stdout; a directory for several recordings")
+    parser.add_argument("--format", choices=["png", "raw"], default="png")
+    parser.add_argument("--fps", type=float, default=60.0, help="frames per second of game time")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4, help="encoding threads")
+    parser.add_argument("--queue", type=int, default=8, help="frames waiting for a worker before rendering blocks")
+    parser.add_argument("--compression", type=int, default=3, help="zlib level of PNG frames")
+    parser.add_argument("--max-frames", type=int, help="stop each recording after this many frames")
+    args = parser.parse_args(argv)
+    if args.output == "-" and (len(args.recordings) > 1 or args.format != "raw"):
+        parser.error("--output - streams one recording in --format raw")
+
+    # the game reports replays on stdout, keep it free for a raw stream
+    sink = make_sink(args, args.output) if args.output == "-" else None
+    with contextlib.redirect_stdout(sys.stderr if sink is not None else sys.stdout):
+        init_headless_display()
+        assets = GameScreen.load_assets()
+        for path in args.recordings:
+            if len(args.recordings) == 1:
+                output = args.output
+            else:
+                name = os.path.splitext(os.path.basename(path))[0]
+                os.makedirs(args.output, exist_ok=True)
+                output = os.path.join(args.output, name if args.format == "png" else name + ".rgb")
+
+            exporter = FrameExporter(sink or make_sink(args, output), (Screen.HEIGHT, Screen.WIDTH, 4), args.workers, args.queue)
+            start = time.perf_counter()
+            try:
+                frames = render_replay(Recording.load(path), exporter, args.fps, assets, args.max_frames)
+            finally:
+                exporter.close()
+            elapsed = time.perf_counter() - start
+            print(f"{path}: {frames} frames ({frames / args.fps:.1f} s) in {elapsed:.2f} s, "
+                  f"{frames / elapsed:.1f} frames/s, written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Run the car simulation without a display.
+
+    python headless.py --inputs inputs.csv --output trajectory.csv
+    python headless.py --generator my_module:inputs --steps 6000 --set m=1200 --output run.npz
+    python headless.py --replay replays/replay_20240101_120000.npz
+    python headless.py --ai-budget 16
+
+`--inputs` is a CSV with `steer_angle,throttle,brake` columns, one row per step.
+`--generator module:function` names a function called with `dt` that returns an
+iterable of `CarInput`. `--replay` re-drives a recording from `core.replay` (the game
+records one with F5) as fast as possible and exits with status 1 if the trajectory
+checksum differs from the recorded one. `--ai-budget MS` reports how many `core.ai`
+cars on the racing line can be driven within MS milliseconds per rendered frame of
+`AI_STEPS_PER_FRAME` physics steps. This module must stay importable without pygame.
+"""
+import argparse
+import importlib
+import sys
+import time
+
+from core.ai import cars_within_budget
+from core.car import Car
+from core.integrators import INTEGRATORS, make_integrator
+from core.racing_line import RacingLine
+from core.replay import Recording, replay
+from core.simulation import configure, read_inputs, simulate, write_trajectory
+from core.telemetry import TelemetryRecorder
+
+AI_STEPS_PER_FRAME = 4 # the game steps the physics at 240 Hz and renders at 60 fps
+AI_DT = 1 / 240
+
+
+def parse_override(text):
+    name, _, value = text.partition("=")
+    if not value:
+        raise argparse.ArgumentTypeError(f"expected name=value, got '{text}'")
+    return name, float(value)
+
+
+def load_generator(spec):
+    module_name, _, function_name = spec.partition(":")
+    if not function_name:
+        raise argparse.ArgumentTypeError(f"expected module:function, got '{spec}'")
+    return getattr(importlib.import_module(module_name), function_name)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--inputs", help="CSV file with one steer_angle,throttle,brake row per step")
+    source.add_argument("--generator", type=load_generator, help="module:function returning CarInput values")
+    source.add_argument("--replay", help="recorded .npz from core.replay, uses its own dt, config and start state")
+    source.add_argument("--ai-budget", type=float, metavar="MS", help="report how many AI cars fit in MS per frame")
+    parser.add_argument("--dt", type=float, default=1 / 60, help="fixed timestep in seconds")
+    parser.add_argument("--steps", type=int, help="maximum number of steps (required for endless generators)")
+    parser.add_argument("--integrator", choices=["euler"] + list(INTEGRATORS), default="euler",
+                        help="how each step is integrated, see core.integrators")
+    parser.add_argument("--set", dest="overrides", type=parse_override, action="append", default=[],
+                        metavar="NAME=VALUE", help="override a CarConfig parameter")
+    parser.add_argument("--output", default="trajectory.csv", help="trajectory file, .csv or .npz")
+    parser.add_argument("--telemetry", help="also write telemetry of every step to this .csv or .npz file")
+    args = parser.parse_args(argv)
+    if args.replay:
+        return run_replay(parser, args)
+    if args.ai_budget is not None:
+        return run_ai_budget(args)
+
+    car = Car()
+    car.integrator = make_integrator(args.integrator)
+    configure(car.config, dict(args.overrides))
+    # a CSV is read up front, so its length can size the telemetry buffer
+    inputs = list(read_inputs(args.inputs)) if args.inputs else args.generator(args.dt)
+
+    telemetry = None
+    if args.telemetry:
+        length = len(inputs) if hasattr(inputs, "__len__") else None
+        sizes = [size for size in (args.steps, length) if size is not None]
+        if not sizes:
+            parser.error("--telemetry needs --steps to size its buffer when --generator has no length")
+        telemetry = TelemetryRecorder(capacity=max(min(sizes), 1))
+
+    start = time.perf_counter()
+    trajectory = simulate(car, inputs, args.dt, args.steps, telemetry)
+    elapsed = time.perf_counter() - start
+    write_trajectory(args.output, trajectory)
+    if telemetry is not None:
+        telemetry.export(args.telemetry)
+    print(f"{len(trajectory)} steps in {elapsed:.3f} s, trajectory written to {args.output}")
+
+
+def run_replay(parser, args):
+    recording = Recording.load(args.replay)
+    if args.overrides:
+        parser.error("--set cannot be combined with --replay, the recording carries its config")
+    if args.integrator != "euler":
+        parser.error("--integrator cannot be combined with --replay, recordings replay with the built-in step")
+    telemetry = TelemetryRecorder(capacity=max(len(recording), 1)) if args.telemetry else None
+
+    start = time.perf_counter()
+    trajectory, checksum = replay(recording, telemetry)
+    elapsed = time.perf_counter() - start
+    write_trajectory(args.output, trajectory)
+    if telemetry is not None:
+        telemetry.export(args.telemetry)
+    print(f"{len(trajectory)} steps ({recording.duration:.2f} s simulated) in {elapsed:.3f} s, "
+          f"trajectory written to {args.output}")
+    print(f"trajectory checksum {checksum}")
+    if recording.checksum is not None and checksum != recording.checksum:
+        print(f"checksum differs from the recording ({recording.checksum})")
+        sys.exit(1)
+
+
+def run_ai_budget(args):
+    line = RacingLine.load()
+    budget = args.ai_budget / 1000
+    report = lambda n, seconds: print(f"{n:6d} AI cars: {seconds * 1000:7.2f} ms per frame")
+    n = cars_within_budget(line, budget, report, steps_per_frame=AI_STEPS_PER_FRAME, dt=AI_DT)
+    print(f"{n} AI cars fit in a {args.ai_budget:g} ms frame ({AI_STEPS_PER_FRAME} physics steps of "
+          f"{AI_DT * 1000:.2f} ms each)")
+
+
+if __name__ == "__main__":
+    main()
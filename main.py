@@ -1,38 +1,63 @@
+import argparse
+import os
 import sys
+import time
 
 import pygame
 import pygame_widgets
 
+from core.profiler import PROFILER
+from core.replay import Recording
+from ui.assets import load_image
 from ui.game_screen import GameScreen
+from ui.loader import BackgroundLoader
 from ui.menu_screen import MenuScreen
+from ui.profiler_overlay import ProfilerOverlay
 from ui.screen import Screen
 
 
 class Game:
     """Main game class handling the game loop and screens.
 
+    Rendering runs at `FPS`; the game screen steps the physics at its own fixed rate
+    and interpolates what it draws between physics states. The game screen's assets
+    load on a worker thread while the menu is already up, the screen itself is built
+    when it is first shown.
+
+    F3 toggles the profiler and its overlay (`core.profiler`), F4 writes the frames it
+    recorded to a CSV in `PROFILE_DIR`.
+
     Attributes:
         screen (pygame.Surface): The main game window
         clock (pygame.time.Clock): Game clock for controlling FPS
         current_screen (str): Current active screen
+        game_loader (BackgroundLoader): Loads the game screen's assets in the background
         background (pygame.Surface): Background image for menu and options
     """
 
+    FPS = 60
+
+    PROFILER_KEY = pygame.K_F3
+    PROFILE_EXPORT_KEY = pygame.K_F4
+    PROFILE_DIR = 'profiles'
+
     def __init__(self):
+        self._start_time = time.perf_counter()
         pygame.init()
         self.screen = pygame.display.set_mode((Screen.WIDTH, Screen.HEIGHT))
         pygame.display.set_caption("Game")
         self.clock = pygame.time.Clock()
 
         self.menu_screen = MenuScreen(self)
-        self.game_screen = GameScreen(self)
+        self.game_screen = None
         self.current_screen: Screen = self.menu_screen
+        self.game_loader = BackgroundLoader(GameScreen.load_assets, GameScreen.LOAD_STEPS)
+        self.profiler_overlay = ProfilerOverlay(1 / Game.FPS)
 
         # Load and scale background image
         try:
-            self.background = pygame.image.load('assets/background.png').convert_alpha()
-            self.background = pygame.transform.scale(self.background, (Screen.WIDTH, Screen.HEIGHT))
-        except pygame.error as e:
+            self.background = load_image('assets/background.png', size=(Screen.WIDTH, Screen.HEIGHT))
+        except (pygame.error, OSError) as e:
             print(f"Couldn't load background image: {e}")
             self.background = pygame.Surface((Screen.WIDTH, Screen.HEIGHT))
             self.background.fill((0, 0, 0))
@@ -42,29 +67,73 @@ class Game:
         if screen_name == "menu":
             self.current_screen = self.menu_screen
         elif screen_name == "game":
+            if self.game_screen is None:
+                # blocks until the assets are loaded, the menu waits for `game_loader` first
+                self.game_screen = GameScreen(self, self.game_loader.result())
             self.current_screen = self.game_screen
+        self.current_screen.invalidate()
 
     def run(self):
         """Main game loop."""
         running = True
+        first_frame = True
         while running:
             dt = self.clock.get_time() *0.001
-            events = pygame.event.get()
-            for event in events:
-                if event.type == pygame.QUIT:
-                    running = False
+            with PROFILER.section("events"):
+                events = pygame.event.get()
+                for event in events:
+                    if event.type == pygame.QUIT:
+                        running = False
+                    elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                        self.current_screen.invalidate()
+                    elif event.type == pygame.KEYDOWN:
+                        self._handle_profiler_key(event.key)
 
-                self.current_screen.handle_event(event)
-            pygame_widgets.update(events)
+                    self.current_screen.handle_event(event)
+            with PROFILER.section("widgets"):
+                pygame_widgets.update(events)
 
-            self.screen.fill((0, 0, 0))
-            self.current_screen.draw(dt)
-            pygame.display.flip()
-            self.clock.tick(60)
+            # screens redraw everything or only what changed, present accordingly
+            with PROFILER.section("draw"):
+                dirty_rects = self.current_screen.draw(dt)
+            if PROFILER.enabled:
+                overlay_rect = self.profiler_overlay.draw(self.screen, PROFILER)
+                if dirty_rects is not None:
+                    dirty_rects = list(dirty_rects) + [overlay_rect]
+            with PROFILER.section("present"):
+                if dirty_rects is None:
+                    pygame.display.flip()
+                elif dirty_rects:
+                    pygame.display.update(dirty_rects)
+            if first_frame:
+                first_frame = False
+                print(f"Time to first frame: {(time.perf_counter() - self._start_time) * 1000:.0f} ms")
+            with PROFILER.section("tick"):
+                self.clock.tick(Game.FPS)
+            PROFILER.end_frame()
 
         pygame.quit()
         sys.exit()
 
+    def _handle_profiler_key(self, key):
+        if key == Game.PROFILER_KEY:
+            PROFILER.enabled = not PROFILER.enabled
+            if PROFILER.enabled:
+                PROFILER.clear()
+            # the overlay covered part of a screen that may only redraw what changed
+            self.current_screen.invalidate()
+        elif key == Game.PROFILE_EXPORT_KEY and len(PROFILER):
+            path = os.path.join(Game.PROFILE_DIR, time.strftime("profile_%Y%m%d_%H%M%S.csv"))
+            PROFILER.export(path)
+            print(f"Profile of {len(PROFILER)} frames written to {path}")
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="2D car simulation")
+    parser.add_argument("--replay", help="start in the game screen replaying this recording (.npz)")
+    args = parser.parse_args()
+
     game = Game()
+    if args.replay:
+        game.set_screen("game")
+        game.game_screen.start_replay(Recording.load(args.replay))
     game.run()
\ No newline at end of file
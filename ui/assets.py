@@ -0,0 +1,59 @@
+import hashlib
+import os
+import struct
+
+import pygame
+
+from ui.helpers import scale_and_rotate
+
+CACHE_DIR = '.asset_cache'
+CACHE_VERSION = 1 # bump when the way derived images are produced changes
+
+_images = {}
+
+
+def load_image(path: str, scale: float = 1.0, angle: float = 0.0, size=None) -> pygame.Surface:
+    """
+    load `path` scaled by `scale` and rotated by `angle` (or scaled to `size`) and
+    converted to the display format; each derived image is produced once per process
+    and shared, and kept on disk between runs keyed by the source file's hash and the
+    transform parameters. Needs the display mode to be set.
+    """
+    key = (path, scale, angle, size)
+    image = _images.get(key)
+    if image is None:
+        image = _load_derived(path, scale, angle, size).convert_alpha()
+        _images[key] = image
+    return image
+
+
+def clear():
+    """Forget the in-process images, the disk cache is kept."""
+    _images.clear()
+
+
+def _load_derived(path, scale, angle, size):
+    with open(path, 'rb') as file:
+        source = file.read()
+    digest = hashlib.sha1(source)
+    digest.update(repr((scale, angle, size, CACHE_VERSION)).encode())
+    cache_path = os.path.join(CACHE_DIR, digest.hexdigest() + '.rgba')
+
+    if os.path.exists(cache_path):
+        with open(cache_path, 'rb') as file:
+            width, height = struct.unpack('<II', file.read(8))
+            return pygame.image.frombuffer(file.read(), (width, height), 'RGBA')
+
+    image = pygame.image.load(path)
+    if size is not None:
+        image = pygame.transform.scale(image, size)
+    else:
+        image = scale_and_rotate(image, scale=scale, angle=angle)
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    temporary_path = cache_path + '.tmp'
+    with open(temporary_path, 'wb') as file:
+        file.write(struct.pack('<II', *image.get_size()))
+        file.write(pygame.image.tobytes(image, 'RGBA'))
+    os.replace(temporary_path, cache_path)
+    return image
@@ -0,0 +1,225 @@
+"""Rendering recorded sessions to image sequences or raw video, without a window.
+
+`render_replay` drives a `GameScreen` through a `core.replay` recording, so frames
+show the world and HUD exactly as the game draws them, and hands each frame to a
+`FrameExporter`. The exporter copies the frame into one of a bounded set of buffers
+and returns; worker threads encode the buffers (`PngSequence`, `RawVideo`) and one
+more thread writes them in frame order, so rendering, encoding and I/O overlap and
+nothing waits for real time.
+"""
+import os
+import queue
+import struct
+import threading
+import types
+import zlib
+
+import numpy as np
+import pygame_widgets
+
+from core.ai import MAX_PEDAL, MAX_STEER_ANGLE
+from core.replay import Recording
+from ui.game_drawer import GameDrawerAssets
+from ui.game_screen import GameScreen
+from ui.input_handling import ControlsInput
+from ui.offscreen import FrameBuffers, init_headless_display
+from ui.screen import Screen
+
+
+class ReplayControls:
+    """Stands in for `InputHandler` during an export: the recorded inputs as `ControlsInput`.
+
+    `seek(t)` selects the input of the step running at `t` s into the recording, so
+    the steering wheel, pedal bar and front wheels move as they did for the driver.
+    """
+
+    def __init__(self, recording: Recording):
+        steps = recording.steps
+        self._end_times = np.cumsum(steps[:, 0])
+        self._x = -steps[:, 1] / MAX_STEER_ANGLE
+        self._y = np.where(steps[:, 2] > 0, steps[:, 2], -steps[:, 3]) / MAX_PEDAL
+        self._input = ControlsInput()
+
+    def seek(self, t: float):
+        if len(self._end_times):
+            step = min(np.searchsorted(self._end_times, t, side='right'), len(self._end_times) - 1)
+            self._input = ControlsInput(float(self._x[step]), float(self._y[step]), t * 1000)
+
+    def sample(self, time):
+        return self._input
+
+    def get_input(self):
+        return self._input
+
+    def handle_input(self, event):
+        pass
+
+
+def encode_png(frame: np.ndarray, compression: int = 3) -> bytes:
+    """An RGB PNG of an `(height, width, 3 or 4)` uint8 frame, the fourth channel is dropped.
+
+    Plain zlib, which releases the GIL while it compresses, so frames encode in parallel.
+    """
+    height, width = frame.shape[:2]
+    rows = np.empty((height, 1 + width * 3), dtype=np.uint8)
+    rows[:, 0] = 0 # no filter
+    rows[:, 1:].reshape(height, width, 3)[...] = frame[..., :3]
+    header = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    return b'\x89PNG\r\n\x1a\n' + _png_chunk(b'IHDR', header) + \
+        _png_chunk(b'IDAT', zlib.compress(rows, compression)) + _png_chunk(b'IEND', b'')
+
+
+def _png_chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(data, zlib.crc32(kind)))
+
+
+class PngSequence:
+    """Frames as `frame_000000.png`, `frame_000001.png`, ... in `directory`."""
+
+    def __init__(self, directory: str, compression: int = 3):
+        self.directory = directory
+        self.compression = compression
+        os.makedirs(directory, exist_ok=True)
+
+    def encode(self, frame):
+        return encode_png(frame, self.compression)
+
+    def write(self, index: int, data):
+        with open(os.path.join(self.directory, f"frame_{index:06d}.png"), 'wb') as file:
+            file.write(data)
+
+    def close(self):
+        pass
+
+
+class RawVideo:
+    """Frames as one stream of packed rgb24 pixels to `path`, or to an open binary file left open.
+
+    ffmpeg reads it with `-f rawvideo -pix_fmt rgb24 -s WIDTHxHEIGHT -r FPS -i PATH`.
+    """
+
+    def __init__(self, path):
+        self._owned = isinstance(path, (str, os.PathLike))
+        self._file = open(path, 'wb') if self._owned else path
+
+    def encode(self, frame):
+        return np.ascontiguousarray(frame[..., :3])
+
+    def write(self, index: int, data):
+        self._file.write(data)
+
+    def close(self):
+        if self._owned:
+            self._file.close()
+        else:
+            self._file.flush()
+
+
+class FrameExporter:
+    """Encodes frames for `sink` on `workers` threads and writes them in order on another.
+
+    `submit` copies the frame into a free buffer and queues it, blocking only while
+    all `workers + queue_size` buffers are in flight, which bounds memory and lets
+    rendering run ahead of the disk. An error on a worker is raised by the next
+    `submit` or by `close`.
+    """
+
+    def __init__(self, sink, shape, workers: int = 4, queue_size: int = 8):
+        self.sink = sink
+        self.frames = 0
+        self._free = queue.Queue()
+        for _ in range(workers + queue_size):
+            self._free.put(np.empty(shape, dtype=np.uint8))
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._encoded = {}
+        self._next = 0
+        self._done = threading.Condition()
+        self._error = None
+        self._workers = [threading.Thread(target=self._encode, daemon=True) for _ in range(workers)]
+        self._writer = threading.Thread(target=self._write, daemon=True)
+        for thread in self._workers + [self._writer]:
+            thread.start()
+
+    def submit(self, frame: np.ndarray):
+        self._raise_error()
+        buffer = self._free.get()
+        np.copyto(buffer, frame)
+        self._queue.put((self.frames, buffer))
+        self.frames += 1
+
+    def close(self):
+        """Wait for every submitted frame to be written, then close the sink."""
+        for _ in self._workers:
+            self._queue.put(None)
+        for thread in self._workers:
+            thread.join()
+        with self._done:
+            self._encoded[self.frames] = None # ends the writer
+            self._done.notify_all()
+        self._writer.join()
+        self.sink.close()
+        self._raise_error()
+
+    def _encode(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            index, buffer = item
+            try:
+                data = self.sink.encode(buffer) if self._error is None else b''
+            except Exception as error:
+                self._error = error
+                data = b''
+            with self._done:
+                self._encoded[index] = (data, buffer)
+                self._done.notify_all()
+
+    def _write(self):
+        while True:
+            with self._done:
+                while self._next not in self._encoded:
+                    self._done.wait()
+                item = self._encoded.pop(self._next)
+            if item is None:
+                return
+            data, buffer = item
+            try:
+                if self._error is None:
+                    self.sink.write(self._next, data)
+            except Exception as error:
+                self._error = error
+            self._free.put(buffer)
+            self._next += 1
+
+    def _raise_error(self):
+        if self._error is not None:
+            raise RuntimeError("exporting a frame failed") from self._error
+
+
+def render_replay(recording: Recording, exporter: FrameExporter, fps: float = 60.0,
+                  assets: GameDrawerAssets = None, max_frames: int = None) -> int:
+    """Render `recording` at `fps` frames per second of game time into `exporter`; returns the frame count.
+
+    The game screen is built on an off-screen surface with the dummy video driver and
+    stepped `1 / fps` per frame as fast as it renders. Frames are `Screen.WIDTH` by
+    `Screen.HEIGHT` with four channels, the last one unused.
+    """
+    init_headless_display()
+    if assets is None:
+        assets = GameScreen.load_assets()
+    buffers = FrameBuffers(1, (Screen.WIDTH, Screen.HEIGHT))
+    controls = ReplayControls(recording)
+    game_screen = GameScreen(types.SimpleNamespace(screen=buffers.surfaces[0]), assets, input_handler=controls)
+    game_screen.start_replay(recording)
+
+    frame_dt = 1 / fps
+    frames = 0
+    while game_screen.game_drawer.is_replaying and (max_frames is None or frames < max_frames):
+        controls.seek(frames * frame_dt)
+        # in the order of Game.run: widgets first, then the screen, which draws over them where it redraws
+        pygame_widgets.update([])
+        game_screen.draw(frame_dt)
+        exporter.submit(buffers.array[0])
+        frames += 1
+    return frames
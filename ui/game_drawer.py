@@ -1,11 +1,22 @@
+from collections import OrderedDict
 from typing import Tuple
 import numpy as np
 import pygame
 
+from core.ai import AIDrivers, MAX_PEDAL, MAX_STEER_ANGLE
 from core.car import Car, CarInput
-from ui.helpers import scale_and_rotate, draw_vector, RED
+from core.fixed_timestep import FixedTimestep
+from core.profiler import PROFILER
+from core.racing_line import RacingLine
+from core.replay import InputRecorder, Recording
+from core.telemetry import TelemetryRecorder
+from ui.assets import load_image
+from ui.helpers import draw_car, draw_vector, RED
 from ui.input_handling import ControlsInput
+from ui.map_layer import TiledMap
 from ui.screen import Screen
+from ui.sprite_cache import RotatedSpriteCache
+from ui.text_cache import get_font, render_text
 from ui.widgets.speedometer import Speedometer
 
 class GameDrawer:
@@ -23,34 +34,75 @@ class GameDrawer:
     PX_M_RATIO_CAR_IMAGE = 1277 / 3 # pixel/meter
     PX_M_RATIO_MAP_IMAGE = 240 / 6 # pixel/meter
 
-    def __init__(self, screen, car, input_handler):
+    PHYSICS_RATE = 240 # Hz
+    MAX_SUBSTEPS = 10
+
+    TELEMETRY_SECONDS = 60 # length of the telemetry ring buffer
+    TELEMETRY_SAMPLE_EVERY = 1 # physics steps per telemetry sample
+    TELEMETRY_FIELDS = None # None records every field in Car.TELEMETRY
+
+    SPRITE_ANGLE_STEP = 0.5 # degrees between cached rotations
+    PRECOMPUTE_SPRITES = False # rotate car and wheel sprites to every angle at load time
+    MAX_RECT_SPRITE_CACHES = 8 # debug car rectangles, one cache per size and color
+
+    STATS_RECT = pygame.Rect(30, 120, 450, 180) # area of the stats text
+
+    AI_CARS = 3 # computer-driven cars on the racing line, see core.ai
+    AI_SPACING = 8 # m between AI cars on the grid, behind the start
+    WHEEL_TURN_PER_STEER = 35 / 45 # drawn front wheel degrees per degree of steer angle
+
+    def __init__(self, screen, car, input_handler, assets=None):
         self._screen = screen
         self._input_handler = input_handler
         self._car: Car = car
+        # what the last physics step ran with, drawn so the wheels match the physics
+        self.controls_input = input_handler.get_input()
+        self.car_input = self._controls_input_to_car_input(self.controls_input)
 
 
-        map_image = pygame.image.load('assets/new_racetrack.png')
-        racing_line = pygame.image.load('assets/racing_line.png')
-        map_image_scaling_factor = 1/GameDrawer.PX_M_RATIO_MAP_IMAGE * GameDrawer.PX_M_RATIO_SCREEN
-
-        self._map_image = scale_and_rotate(map_image, scale=map_image_scaling_factor, angle=GameDrawer.MAP_START_ROTATION)
-        self._racing_line_image = scale_and_rotate(racing_line, scale=map_image_scaling_factor, angle=GameDrawer.MAP_START_ROTATION)
-
-        car_image = pygame.image.load('assets/car_blue.png')
-        self._car_image_scaling_factor = 1/GameDrawer.PX_M_RATIO_CAR_IMAGE * GameDrawer.PX_M_RATIO_SCREEN
-        self._car_image = scale_and_rotate(car_image, scale=self._car_image_scaling_factor, angle=+90)
+        if assets is None:
+            assets = GameDrawerAssets()
+        self._map = assets.map
+        self._car_image_scaling_factor = assets.car_image_scaling_factor
+        self._car_image = assets.car_image
+        self._wheel_image = assets.wheel_image
 
         self._wheel_x_offset = GameDrawer.WHEEL_X_OFFSET * self._car_image_scaling_factor
         self._wheel_y_offset = GameDrawer.WHEEL_Y_OFFSET * self._car_image_scaling_factor
 
-        self._front_left_wheel_image= scale_and_rotate(pygame.image.load('assets/wheel.png'), scale=self._car_image_scaling_factor, angle=+90)
-        self._front_right_wheel_image= scale_and_rotate(pygame.image.load('assets/wheel.png'), scale=self._car_image_scaling_factor, angle=+90)
-        self._rear_left_wheel_image= scale_and_rotate(pygame.image.load('assets/wheel.png'), scale=self._car_image_scaling_factor, angle=+90)
-        self._rear_right_wheel_image= scale_and_rotate(pygame.image.load('assets/wheel.png'), scale=self._car_image_scaling_factor, angle=+90)
+        self._car_sprites = RotatedSpriteCache(self._car_image, GameDrawer.SPRITE_ANGLE_STEP, precompute=GameDrawer.PRECOMPUTE_SPRITES)
+        self._ai_car_sprites = RotatedSpriteCache(assets.ai_car_image, GameDrawer.SPRITE_ANGLE_STEP, precompute=GameDrawer.PRECOMPUTE_SPRITES)
+        self._wheel_sprites = RotatedSpriteCache(self._wheel_image, GameDrawer.SPRITE_ANGLE_STEP, precompute=GameDrawer.PRECOMPUTE_SPRITES)
+        self._rect_sprites = OrderedDict()
 
         self.speedometer = Speedometer(100, 980, 80, 200)
         self._last_update_time = 0
 
+        # physics runs at a fixed rate, the drawn pose is interpolated between the last two states
+        self.timestep = FixedTimestep(GameDrawer.PHYSICS_RATE, GameDrawer.MAX_SUBSTEPS)
+        self._previous_position = np.array(self._car.position_wc, dtype=np.float64)
+        self._previous_angle = self._car.angle
+        self._render_position = np.array(self._car.position_wc, dtype=np.float64)
+        self._render_angle = self._car.angle
+
+        # AI cars step with the player's car and are interpolated the same way
+        self.ai = AIDrivers(assets.racing_line, GameDrawer.AI_CARS, spacing=GameDrawer.AI_SPACING)
+        self._ai_previous_position = self.ai.batch.position_wc.copy()
+        self._ai_previous_angle = self.ai.batch.angle.copy()
+        self._ai_render_position = self.ai.batch.position_wc.copy()
+        self._ai_render_angle = self.ai.batch.angle.copy()
+
+        self.telemetry = TelemetryRecorder(
+            capacity=GameDrawer.TELEMETRY_SECONDS * GameDrawer.PHYSICS_RATE // GameDrawer.TELEMETRY_SAMPLE_EVERY,
+            fields=GameDrawer.TELEMETRY_FIELDS,
+            sample_every=GameDrawer.TELEMETRY_SAMPLE_EVERY)
+
+        # input recording and replay, see core.replay
+        self.recorder = None
+        self._replay = None
+        self._replay_check = None
+        self._replay_recording = None
+
         # debug mode
         self._is_debug_mode = False
         self._draw_acceleration = False
@@ -59,74 +111,199 @@ class GameDrawer:
         self._draw_resistance = False
 
     def update(self, dt):
-        controls_input = self._input_handler.get_input()
-        car_input = self._controls_input_to_car_input(controls_input)
-        self._car.update(car_input, dt)
+        steps = self.timestep.advance(dt)
+        if steps > 0:
+            # the steps catch up with the frame that just passed, each samples the controls at its own time
+            now = pygame.time.get_ticks()
+            step_ms = self.timestep.dt * 1000 / self.timestep.time_scale
+            for step in range(steps):
+                self.controls_input = self._input_handler.sample(now - (steps - 1 - step) * step_ms)
+                car_input, step_dt = self._controls_input_to_car_input(self.controls_input), self.timestep.dt
+                if self._replay is not None:
+                    # a replay drives the car with the recorded inputs and step lengths
+                    replayed = next(self._replay, None)
+                    if replayed is None:
+                        self._finish_replay()
+                    else:
+                        car_input, step_dt = replayed
+                        # the HUD shows the controls that drive the car, not the keys held meanwhile
+                        self.controls_input = self._car_input_to_controls_input(car_input, self.controls_input.time)
+                self.car_input = car_input
+                self._previous_position[:] = self._car.position_wc
+                self._previous_angle = self._car.angle
+                with PROFILER.section("car"):
+                    self._car.update(car_input, step_dt)
+                self._ai_previous_position[:] = self.ai.batch.position_wc
+                self._ai_previous_angle[:] = self.ai.batch.angle
+                with PROFILER.section("ai"):
+                    self.ai.step(step_dt)
+                self.telemetry.record(self._car, step_dt)
+                if self.recorder is not None:
+                    self.recorder.record(self._car, car_input, step_dt)
+                if self._replay_check is not None:
+                    self._replay_check.record(self._car, car_input, step_dt)
+        self._interpolate_pose(self.timestep.alpha)
         self.speedometer.update(self._car.velocity[0]*3.6)
 
-    def draw(self):
-        self._draw_map()
-
-        if self._is_debug_mode:
-            self._draw_debug_car()
+    @property
+    def is_replaying(self) -> bool:
+        return self._replay is not None
+
+    def start_recording(self):
+        self.stop_replay()
+        self.recorder = InputRecorder(self._car)
+
+    def stop_recording(self) -> Recording:
+        recording = self.recorder.recording()
+        self.recorder = None
+        return recording
+
+    def start_replay(self, recording: Recording):
+        """Drive the car with `recording` from its recorded starting state, at the current time scale."""
+        self.recorder = None
+        recording.restore(self._car)
+        self._previous_position[:] = self._car.position_wc
+        self._previous_angle = self._car.angle
+        self._replay = recording.inputs()
+        self._replay_check = InputRecorder(self._car)
+        self._replay_recording = recording
+
+    def stop_replay(self):
+        self._replay = None
+        self._replay_check = None
+        self._replay_recording = None
+
+    def _finish_replay(self):
+        expected = self._replay_recording.checksum
+        checksum = self._replay_check.checksum
+        if expected is None:
+            print(f"Replay finished, trajectory checksum {checksum}")
+        elif checksum == expected:
+            print(f"Replay finished, trajectory checksum {checksum} matches the recording")
         else:
-            self._draw_car()
-        self._draw_vectors()
-        self._draw_car_stats_as_text_on_screen()
-        self.speedometer.draw(self._screen)
+            print(f"Replay finished, trajectory checksum {checksum} differs from the recording ({expected})")
+        self.stop_replay()
+
+    def _interpolate_pose(self, alpha):
+        self._render_position[:] = self._previous_position + (self._car.position_wc - self._previous_position) * alpha
+        self._render_angle = self._previous_angle + (self._car.angle - self._previous_angle) * alpha
+        batch = self.ai.batch
+        self._ai_render_position[:] = self._ai_previous_position + (batch.position_wc - self._ai_previous_position) * alpha
+        self._ai_render_angle[:] = self._ai_previous_angle + (batch.angle - self._ai_previous_angle) * alpha
+
+    def _render_orientation_vector(self):
+        return np.array([np.cos(self._render_angle), np.sin(self._render_angle)])
+
+    def draw(self):
+        self.draw_world()
+        self.draw_stats()
+        self.draw_speedometer()
+
+    def draw_world(self):
+        """Draw the map, the car and its vectors, everything that moves with the camera."""
+        with PROFILER.section("map"):
+            self._draw_map()
+        with PROFILER.section("ai_cars"):
+            self._draw_ai_cars()
+
+        with PROFILER.section("car_sprites"):
+            if self._is_debug_mode:
+                self._draw_debug_car()
+            else:
+                self._draw_car()
+        with PROFILER.section("vectors"):
+            self._draw_vectors()
+
+    def draw_stats(self):
+        with PROFILER.section("stats"):
+            self._draw_car_stats_as_text_on_screen()
+
+    def draw_speedometer(self):
+        with PROFILER.section("speedometer"):
+            self.speedometer.draw(self._screen)
+
+    def speedometer_rect(self):
+        speedometer = self.speedometer
+        return pygame.Rect(speedometer.x - speedometer.radius - 2, speedometer.y - speedometer.radius - 2,
+                           2 * speedometer.radius + 5, 2 * speedometer.radius + 5)
+
+    def world_state(self):
+        """Everything `draw_world` depends on; while it is unchanged the world layer looks the same."""
+        car = self._car
+        config = car.config
+        return (self._render_position[0], self._render_position[1], self._render_angle,
+                self.car_input.steer_angle, self.show_racing_line,
+                self._is_debug_mode, self._draw_acceleration, self._draw_velocity,
+                self._draw_friction_circle, self._draw_resistance,
+                config.b, config.c, config.m, config.max_grip,
+                tuple(car.velocity_wc), tuple(car.acceleration_wc), tuple(car.resistance),
+                car.front_traction[0], car.lateral_force_front[1]) + self._visible_ai_state()
+
+    def _visible_ai_state(self):
+        # only the AI cars on screen change the picture, the others always drive
+        _, visible = self._visible_ai_cars()
+        if len(visible) == 0:
+            return ()
+        return (visible.tobytes(), self._ai_render_position[visible].tobytes(),
+                self._ai_render_angle[visible].tobytes(), self.ai.steer_angle[visible].tobytes())
+
+    @property
+    def show_racing_line(self):
+        return self._map.show_overlay
+
+    @show_racing_line.setter
+    def show_racing_line(self, value):
+        self._map.show_overlay = value
 
     def _draw_map(self):
         x, y, _ = self._calculate_map_transform()
-        self._screen.blit(self._map_image, self._map_image.get_rect(center=(x, y)))
-        self._screen.blit(self._racing_line_image, self._map_image.get_rect(center=(x, y)))
-
-    def _get_wheel_position(self, car_direction_norm, car_direction_perpendicular_norm, x_sign, y_sign):
-        return np.array([GameDrawer.CAR_X, GameDrawer.CAR_Y]) + car_direction_perpendicular_norm * x_sign * self._wheel_x_offset + car_direction_norm * y_sign * self._wheel_y_offset
+        self._map.draw(self._screen, (x, y))
 
     def _draw_car(self):
-        car_rotation = np.rad2deg(self._car.angle)
-        car_angle_rotated = -car_rotation - 90
-        car_direction = np.array([np.cos(np.deg2rad(car_angle_rotated)), np.sin(np.deg2rad(car_angle_rotated))])
-        car_direction_norm = car_direction / np.linalg.norm(car_direction)
-        car_direction_perpendicular_norm = np.array([-car_direction_norm[1], car_direction_norm[0]])
-
-        front_left_wheel_position = self._get_wheel_position(car_direction_norm, car_direction_perpendicular_norm, -1, -1)
-        front_right_wheel_position = self._get_wheel_position(car_direction_norm, car_direction_perpendicular_norm, 1, -1)
-        rear_left_wheel_position = self._get_wheel_position(car_direction_norm, car_direction_perpendicular_norm, -1, 1)
-        rear_right_wheel_position = self._get_wheel_position(car_direction_norm, car_direction_perpendicular_norm, 1, 1)
-
-        rotated_car = pygame.transform.rotate(self._car_image, car_rotation)
-        rotated_car_rect = rotated_car.get_rect(center=(GameDrawer.CAR_X, GameDrawer.CAR_Y))
-
-        input_rotation = -self._input_handler.get_input().x * 35
-        front_wheel_rotation = car_rotation + input_rotation
-        rotated_front_wheel = pygame.transform.rotate(self._front_left_wheel_image, front_wheel_rotation)
-        rotated_rear_wheel = pygame.transform.rotate(self._rear_left_wheel_image, car_rotation)
-        front_left_rotated_wheel_rect = rotated_front_wheel.get_rect(center=(front_left_wheel_position[0], front_left_wheel_position[1]))
-        front_right_rotated_wheel_rect = rotated_front_wheel.get_rect(center=(front_right_wheel_position[0], front_right_wheel_position[1]))
-        rear_left_rotated_wheel_rect = rotated_rear_wheel.get_rect(center=(rear_left_wheel_position[0], rear_left_wheel_position[1]))
-        rear_right_rotated_wheel_rect = rotated_rear_wheel.get_rect(center=(rear_right_wheel_position[0], rear_right_wheel_position[1]))
-
-        self._screen.blit(rotated_front_wheel, front_left_rotated_wheel_rect)
-        self._screen.blit(rotated_front_wheel, front_right_rotated_wheel_rect)
-        self._screen.blit(rotated_rear_wheel, rear_left_rotated_wheel_rect)
-        self._screen.blit(rotated_rear_wheel, rear_right_rotated_wheel_rect)
-        self._screen.blit(rotated_car, rotated_car_rect)
+        self._draw_car_sprites(np.array(self.CAR_POSITION, dtype=np.float64), np.rad2deg(self._render_angle),
+                               self._wheel_rotation(), self._car_sprites)
+
+    def _visible_ai_cars(self):
+        """Screen centers of all AI cars and the indices of those whose sprite can reach the screen."""
+        scale = GameDrawer.PX_M_RATIO_SCREEN
+        centers = np.array(self.CAR_POSITION) + (self._ai_render_position - self._render_position) * scale
+        margin = max(self._car_image.get_size())
+        visible = ((centers[:, 0] > -margin) & (centers[:, 0] < Screen.WIDTH + margin)
+                   & (centers[:, 1] > -margin) & (centers[:, 1] < Screen.HEIGHT + margin))
+        return centers, np.flatnonzero(visible)
+
+    def _draw_ai_cars(self):
+        centers, visible = self._visible_ai_cars()
+        wheel_rotation = np.rad2deg(self.ai.steer_angle) * GameDrawer.WHEEL_TURN_PER_STEER
+        for i in visible:
+            self._draw_car_sprites(centers[i], np.rad2deg(self._ai_render_angle[i]), wheel_rotation[i], self._ai_car_sprites)
+
+    def _wheel_rotation(self):
+        return np.rad2deg(self.car_input.steer_angle) * GameDrawer.WHEEL_TURN_PER_STEER
+
+    def _draw_car_sprites(self, center, car_rotation, input_rotation, car_sprites):
+        draw_car(self._screen, center, car_rotation, input_rotation, car_sprites, self._wheel_sprites,
+                 (self._wheel_x_offset, self._wheel_y_offset))
 
     def _draw_rect(self, position, width, length, angle, color):
-        surf = pygame.Surface((width, length))
-        surf.set_colorkey((0, 255, 0))
-        surf.fill(color)
-        surf = pygame.transform.rotate(surf, angle)
-        rect = surf.get_rect(center = position)
-        self._screen.blit(surf, rect)
+        key = (width, length, color)
+        sprites = self._rect_sprites.get(key)
+        if sprites is None:
+            surf = pygame.Surface((width, length))
+            surf.set_colorkey((0, 255, 0))
+            surf.fill(color)
+            sprites = RotatedSpriteCache(surf, GameDrawer.SPRITE_ANGLE_STEP)
+            self._rect_sprites[key] = sprites
+            if len(self._rect_sprites) > GameDrawer.MAX_RECT_SPRITE_CACHES:
+                self._rect_sprites.popitem(last=False)
+        sprites.blit(self._screen, angle, position)
 
     def _draw_debug_car(self):
         scale = GameDrawer.PX_M_RATIO_SCREEN
 
         # car
-        car_rotation = np.rad2deg(self._car.angle)
-        orientation_vector = np.flip(self._car.orientation_vector)
+        car_rotation = np.rad2deg(self._render_angle)
+        orientation_vector = np.flip(self._render_orientation_vector())
 
         front_part_center = np.array([self.CAR_X, self.CAR_Y]) + self._car.config.b*0.5 * orientation_vector * scale
         rear_part_center = np.array([self.CAR_X, self.CAR_Y]) - self._car.config.c*0.5 * orientation_vector * scale
@@ -134,14 +311,14 @@ class GameDrawer:
         self._draw_rect(rear_part_center, 1*scale, scale*self._car.config.c, car_rotation, (200, 200, 200))
 
         front_wheel_position = np.array([self.CAR_X, self.CAR_Y]) + self._car.config.b*scale * orientation_vector
-        front_wheel_rotation = car_rotation + (-self._input_handler.get_input().x * 35)
+        front_wheel_rotation = car_rotation + self._wheel_rotation()
         self._draw_rect(front_wheel_position, 0.2*scale, 0.4*scale, front_wheel_rotation, (0, 0, 0))
 
         rear_wheel_position = np.array([self.CAR_X, self.CAR_Y]) - self._car.config.c*scale * orientation_vector
         self._draw_rect(rear_wheel_position, 0.2*scale, 0.4*scale, car_rotation, (0, 0, 0))
 
     def _draw_vectors(self):
-        orientation_vector = np.flip(self._car.orientation_vector)
+        orientation_vector = np.flip(self._render_orientation_vector())
         scale = GameDrawer.PX_M_RATIO_SCREEN
         if self._draw_acceleration:
             draw_vector(self._screen, self._car.acceleration_wc*scale, self.CAR_POSITION, RED, 3)
@@ -154,7 +331,6 @@ class GameDrawer:
         front_longitudinal_vec = orientation_vector*self._car.front_traction[0]/self._car.config.m*scale
         front_lateral_vec = np.array([-orientation_vector[1], orientation_vector[0]]) * self._car.lateral_force_front[1]/self._car.config.m*scale
         front_sum = front_longitudinal_vec + front_lateral_vec
-        print(front_sum)
         # draw_vector(self._screen, orientation_vector*self._car.front_traction[0]/self._car.config.m*scale, front_wheel_position, (0, 255, 0), 3)
         # draw_vector(self._screen, np.array([-orientation_vector[1], orientation_vector[0]]) * self._car.lateral_force_front[1]/self._car.config.m*scale, front_wheel_position, (0, 255, 0), 3)
         # draw_vector(self._screen, front_sum, front_wheel_position, (255, 0, 0), 3)
@@ -162,8 +338,8 @@ class GameDrawer:
             front_wheel_position = np.array([self.CAR_X, self.CAR_Y]) + self._car.config.b*scale * orientation_vector
             pygame.draw.circle(self._screen, (255, 0, 255), (front_wheel_position[0], front_wheel_position[1]), scale*self._car.config.max_grip, 3)
 
-            R = np.array([[np.cos(self._car.angle), np.sin(self._car.angle)],
-                        [-np.sin(self._car.angle), np.cos(self._car.angle)]])
+            R = np.array([[np.cos(self._render_angle), np.sin(self._render_angle)],
+                        [-np.sin(self._render_angle), np.cos(self._render_angle)]])
 
             lateral = self._car.lateral_force_front/(self._car.config.m*9.81*0.5)
             lateral = np.flip(lateral)
@@ -182,41 +358,76 @@ class GameDrawer:
             pygame.draw.circle(self._screen, (255, 0, 255), friction_point, 4)
 
 
-    def _draw_car_stats_as_text_on_screen(self):
+    def car_stats_lines(self):
         velocity = np.linalg.norm(self._car.velocity)
         acceleration = np.linalg.norm(self._car.acceleration)
 
-        current_y = 120
-        text = f"Velocity: {round(velocity,2)}"
-        font = pygame.font.Font(None, 36)
-        text_surface = font.render(text, True, (0, 0, 0))
-        self._screen.blit(text_surface, (30, current_y))
-
-        current_y += 30
-        text = f"Acceleration: {round(acceleration, 2)}"
-        text_surface = font.render(text, True, (0, 0, 0))
-        self._screen.blit(text_surface, (30, current_y))
+        lines = [
+            f"Velocity: {round(velocity,2)}",
+            f"Acceleration: {round(acceleration, 2)}",
+            f"Angular velocity: {round(self._car.angular_velocity, 2)}",
+            f"Angular acceleration: {round(self._car.angular_acceleration, 2)}",
+        ]
+        if self.timestep.time_scale != 1.0:
+            lines.append(f"Time scale: x{self.timestep.time_scale:g}")
+        if self.recorder is not None:
+            lines.append("Recording inputs")
+        elif self.is_replaying:
+            lines.append("Replaying")
+        return lines
 
-        current_y += 30
-        text = f"Angular velocity: {round(self._car.angular_velocity, 2)}"
-        text_surface = font.render(text, True, (0, 0, 0))
-        self._screen.blit(text_surface, (30, current_y))
-
-        current_y += 30
-        text = f"Angular acceleration: {round(self._car.angular_acceleration, 2)}"
-        text_surface = font.render(text, True, (0, 0, 0))
-        self._screen.blit(text_surface, (30, current_y))
+    def _draw_car_stats_as_text_on_screen(self):
+        font = get_font(36)
+        current_y = GameDrawer.STATS_RECT.top
+        for text in self.car_stats_lines():
+            text_surface = render_text(font, text, (0, 0, 0))
+            self._screen.blit(text_surface, (GameDrawer.STATS_RECT.left, current_y))
+            current_y += 30
 
     def _calculate_map_transform(self):
-        car_x = self._car.position_wc[0]
-        car_y = self._car.position_wc[1]
+        car_x = self._render_position[0]
+        car_y = self._render_position[1]
         map_x = GameDrawer.MAP_START_X - car_x * GameDrawer.PX_M_RATIO_SCREEN
         map_y = GameDrawer.MAP_START_Y - car_y * GameDrawer.PX_M_RATIO_SCREEN
         return map_x, map_y, 0
 
     @staticmethod
     def _controls_input_to_car_input(controls_input: ControlsInput) -> CarInput:
-        steering_angle = -controls_input.x * np.pi / 4
-        throttle = controls_input.y * 100 if controls_input.y > 0 else 0
-        brake = -controls_input.y * 100 if controls_input.y < 0 else 0
-        return CarInput(steering_angle, throttle, brake)
\ No newline at end of file
+        steering_angle = -controls_input.x * MAX_STEER_ANGLE
+        throttle = controls_input.y * MAX_PEDAL if controls_input.y > 0 else 0
+        brake = -controls_input.y * MAX_PEDAL if controls_input.y < 0 else 0
+        return CarInput(steering_angle, throttle, brake)
+
+    @staticmethod
+    def _car_input_to_controls_input(car_input: CarInput, time: float) -> ControlsInput:
+        y = car_input.throttle if car_input.throttle > 0 else -car_input.brake
+        return ControlsInput(-car_input.steer_angle / MAX_STEER_ANGLE, y / MAX_PEDAL, time)
+
+
+class GameDrawerAssets:
+    """The track and car images GameDrawer draws with, and the racing line its AI cars follow.
+
+    Loading them is most of the cost of starting a game and needs nothing but the
+    display mode, so it can run on a worker thread; `progress()` is called after each
+    of the `STEPS` loading steps.
+    """
+
+    STEPS = 6
+
+    def __init__(self, progress=lambda: None):
+        map_image_scaling_factor = 1/GameDrawer.PX_M_RATIO_MAP_IMAGE * GameDrawer.PX_M_RATIO_SCREEN
+        map_image = load_image('assets/new_racetrack.png', scale=map_image_scaling_factor, angle=GameDrawer.MAP_START_ROTATION)
+        progress()
+        racing_line_image = load_image('assets/racing_line.png', scale=map_image_scaling_factor, angle=GameDrawer.MAP_START_ROTATION)
+        progress()
+        self.map = TiledMap(map_image, racing_line_image)
+        progress()
+
+        self.car_image_scaling_factor = 1/GameDrawer.PX_M_RATIO_CAR_IMAGE * GameDrawer.PX_M_RATIO_SCREEN
+        self.car_image = load_image('assets/car_blue.png', scale=self.car_image_scaling_factor, angle=+90)
+        self.wheel_image = load_image('assets/wheel.png', scale=self.car_image_scaling_factor, angle=+90)
+        progress()
+        self.ai_car_image = load_image('assets/car_red.png', scale=self.car_image_scaling_factor, angle=+90)
+        progress()
+        self.racing_line = RacingLine.load()
+        progress()
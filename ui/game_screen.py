@@ -1,9 +1,18 @@
+import os
+import time
+
 import pygame
 
 from core.car import Car
-from ui.game_drawer import GameDrawer
+from core.profiler import PROFILER
+from ui.game_drawer import GameDrawer, GameDrawerAssets
 from ui.input_handling import InputHandler
+from ui.assets import load_image
+from ui.helpers import prerender
+from ui.hud import HudLayer
 from ui.screen import Screen
+from ui.sprite_cache import RotatedSpriteCache
+from ui.text_cache import get_font
 from ui.widgets.button import Button
 from ui.widgets.checkbox import Checkbox
 from ui.widgets.settings import CarSettingsWidget
@@ -18,23 +27,39 @@ class GameScreen(Screen):
     WHEEL_SIZE = 100
     MAX_ROTATION = 180  # Maximum rotation angle in degrees
 
-    def __init__(self, game):
+    # Time scale controls: slower, faster, back to real time
+    SLOWER_KEY = pygame.K_COMMA
+    FASTER_KEY = pygame.K_PERIOD
+    REAL_TIME_KEY = pygame.K_SLASH
+
+    TELEMETRY_EXPORT_KEY = pygame.K_F9
+    RACING_LINE_KEY = pygame.K_l
+    TELEMETRY_DIR = 'telemetry'
+
+    RECORD_KEY = pygame.K_F5 # start recording inputs, press again to stop and save
+    REPLAY_KEY = pygame.K_F6 # replay the last recording of this session
+    REPLAY_DIR = 'replays'
+
+    LOAD_STEPS = GameDrawerAssets.STEPS + 1
+
+    def __init__(self, game, assets: GameDrawerAssets = None, input_handler=None):
         self.game = game
         self.car = Car()
-        self.input_handler = InputHandler()
-        self.game_drawer = GameDrawer(self.game.screen, self.car,  self.input_handler)
+        # anything with handle_input(event), sample(time) and get_input(), ui.export replays recorded inputs
+        self.input_handler = input_handler if input_handler is not None else InputHandler()
+        self.game_drawer = GameDrawer(self.game.screen, self.car,  self.input_handler, assets)
         self.back_button = Button(50, 50, 200, 50, "Back to Menu")
-        self.font = pygame.font.Font(None, 36)
+        self.font = get_font(36)
 
         # Load and prepare steering wheel image
         try:
-            self.wheel_image = pygame.image.load('assets/steering_wheel.png').convert_alpha()
-            self.wheel_image = pygame.transform.scale(self.wheel_image,
-                                                      (self.WHEEL_SIZE, self.WHEEL_SIZE))
+            self.wheel_image = load_image('assets/steering_wheel.png', size=(self.WHEEL_SIZE, self.WHEEL_SIZE))
             self.wheel_rect = self.wheel_image.get_rect()
-        except pygame.error as e:
+            self._wheel_sprites = RotatedSpriteCache(self.wheel_image)
+        except (pygame.error, OSError) as e:
             print(f"Couldn't load steering wheel image: {e}")
             self.wheel_image = None
+            self._wheel_sprites = None
             self.wheel_rect = pygame.Rect(0, 0, self.WHEEL_SIZE, self.WHEEL_SIZE)
 
         # Calculate positions
@@ -47,9 +72,45 @@ class GameScreen(Screen):
             self.BAR_WIDTH,
             self.BAR_HEIGHT
         )
+        # Static parts of the bar, drawn once: the border below the fill, the center line above it
+        bar_size = self.throttle_brake_rect.size
+        self._throttle_brake_frame = prerender(bar_size, lambda surface: pygame.draw.rect(
+            surface, (100, 100, 100), surface.get_rect(), self.BAR_BORDER))
+        self._throttle_brake_center_line = prerender(bar_size, lambda surface: pygame.draw.line(
+            surface, (200, 200, 200), (0, self.BAR_HEIGHT // 2), (self.BAR_WIDTH, self.BAR_HEIGHT // 2), 2))
         self._settings_checkbox = Checkbox(Screen.WIDTH - 150, 10, 30, "Settings")
         self._mode_checkbox = Checkbox(Screen.WIDTH - 290, 10, 30, "Debug")
         self._settings = CarSettingsWidget(self.car.config, self.game.screen)
+        self._controls_input = self.game_drawer.controls_input
+        self._last_recording = None
+
+        # HUD elements in drawing order, redrawn on their own while the world does not change
+        self._world_state = None
+        self._hud = HudLayer(self.game.screen)
+        self._hud.add(GameDrawer.STATS_RECT, self.game_drawer.draw_stats,
+                      lambda: tuple(self.game_drawer.car_stats_lines()))
+        self._hud.add(self.game_drawer.speedometer_rect(), self.game_drawer.draw_speedometer,
+                      lambda: self.game_drawer.speedometer.current_speed)
+        self._hud.add(self._settings.rect, self._settings.draw, self._settings.state)
+        self._hud.add(self.throttle_brake_rect.inflate(4, 4), lambda: self._draw_throttle_brake_bar(self._controls_input.y),
+                      lambda: self._controls_input.y)
+        rotated_wheel_size = int(self.WHEEL_SIZE * 2 ** 0.5) + 4
+        self._hud.add(pygame.Rect(0, 0, rotated_wheel_size, rotated_wheel_size).move(
+                          self.wheel_rect.centerx - rotated_wheel_size // 2, self.wheel_rect.centery - rotated_wheel_size // 2),
+                      lambda: self._draw_steering_wheel(self._controls_input.x), lambda: self._controls_input.x)
+        self._hud.add(self.back_button.rect, lambda: self.back_button.draw(self.game.screen),
+                      lambda: self.back_button.current_color)
+
+    @staticmethod
+    def load_assets(progress=lambda: None) -> GameDrawerAssets:
+        """Load the images the screen needs, in `LOAD_STEPS` steps; safe to run on a worker thread."""
+        assets = GameDrawerAssets(progress)
+        try:
+            load_image('assets/steering_wheel.png', size=(GameScreen.WHEEL_SIZE, GameScreen.WHEEL_SIZE))
+        except (pygame.error, OSError):
+            pass # reported when the screen is built
+        progress()
+        return assets
 
     def handle_event(self, event):
         """Handle events for game screen."""
@@ -57,21 +118,62 @@ class GameScreen(Screen):
             self.game.set_screen("menu")
         if event.type == pygame.KEYDOWN or event.type == pygame.KEYUP:
             self.input_handler.handle_input(event)
+        if event.type == pygame.KEYDOWN:
+            self._handle_time_scale_key(event.key)
+            if event.key == self.TELEMETRY_EXPORT_KEY:
+                self._export_telemetry()
+            elif event.key == self.RACING_LINE_KEY:
+                self.game_drawer.show_racing_line = not self.game_drawer.show_racing_line
+            elif event.key == self.RECORD_KEY:
+                self._toggle_recording()
+            elif event.key == self.REPLAY_KEY and self._last_recording is not None:
+                self.start_replay(self._last_recording)
         self._settings_checkbox.handle_event(event)
         self._mode_checkbox.handle_event(event)
 
-    def draw(self, dt):
-        """Draw game screen."""
-        controls_input = self.input_handler.get_input()
-        self._settings.update()
-        self.game_drawer.update(dt)
+    def _handle_time_scale_key(self, key):
+        timestep = self.game_drawer.timestep
+        if key == self.SLOWER_KEY:
+            timestep.set_time_scale(timestep.time_scale / 2)
+        elif key == self.FASTER_KEY:
+            timestep.set_time_scale(timestep.time_scale * 2)
+        elif key == self.REAL_TIME_KEY:
+            timestep.set_time_scale(1.0)
+
+    def _export_telemetry(self):
+        os.makedirs(self.TELEMETRY_DIR, exist_ok=True)
+        path = os.path.join(self.TELEMETRY_DIR, time.strftime("telemetry_%Y%m%d_%H%M%S.npz"))
+        self.game_drawer.telemetry.export(path)
+        print(f"Telemetry written to {path}")
+
+    def _toggle_recording(self):
+        if self.game_drawer.recorder is None:
+            self.game_drawer.start_recording()
+            return
+        recording = self.game_drawer.stop_recording()
+        os.makedirs(self.REPLAY_DIR, exist_ok=True)
+        path = os.path.join(self.REPLAY_DIR, time.strftime("replay_%Y%m%d_%H%M%S.npz"))
+        recording.save(path)
+        self._last_recording = recording
+        print(f"Recorded {len(recording)} steps to {path}, trajectory checksum {recording.checksum}")
 
-        self.game_drawer.draw()
-        self._settings.draw()
+    def start_replay(self, recording):
+        """Re-drive the car with `recording`; the time scale keys still apply."""
+        self.game_drawer.start_replay(recording)
 
-        self._draw_throttle_brake_bar(controls_input.y)
-        self._draw_steering_wheel(controls_input.x)
-        self.back_button.draw(self.game.screen)
+    def draw(self, dt):
+        """Draw game screen.
+
+        The world (map, car, vectors) is redrawn in full whenever it changes, which is
+        every frame while the car moves. While it stands still only the HUD elements
+        that changed are redrawn and their rects returned.
+        """
+        with PROFILER.section("settings"):
+            self._settings.update()
+        with PROFILER.section("physics"):
+            self.game_drawer.update(dt)
+        # the pedal bar and steering wheel show the controls of the last physics step
+        self._controls_input = self.game_drawer.controls_input
 
         self.game_drawer._is_debug_mode = self._settings.mode_toggle.value
         self.game_drawer._draw_acceleration = self._settings.acceleration_toggle.value
@@ -79,10 +181,30 @@ class GameScreen(Screen):
         self.game_drawer._draw_friction_circle = self._settings.friction_circle_toggle.value
         self.game_drawer._draw_resistance = self._settings.resistance_toggle.value
 
+        world_state = self.game_drawer.world_state()
+        world_changed = world_state != self._world_state
+        self._world_state = world_state
+        redraw_world = self._full_redraw or world_changed or not self._hud.has_world
+        if redraw_world:
+            self._full_redraw = False
+            with PROFILER.section("world"):
+                self.game.screen.fill((0, 0, 0))
+                self.game_drawer.draw_world()
+            # keep the world layer once it stopped changing, the next frames only touch the HUD
+            if world_changed:
+                self._hud.release_world()
+            else:
+                self._hud.capture_world()
+        with PROFILER.section("hud"):
+            if not redraw_world:
+                return self._hud.redraw_dirty()
+            self._hud.draw_all()
+        return None
+
     def _draw_throttle_brake_bar(self, y_input):
         """Draw the vertical throttle (green) and brake (red) bar."""
         # Draw border
-        pygame.draw.rect(self.game.screen, (100, 100, 100), self.throttle_brake_rect, self.BAR_BORDER)
+        self.game.screen.blit(self._throttle_brake_frame, self.throttle_brake_rect)
 
         # Calculate the fill height and position based on input
         center_y = self.throttle_brake_rect.centery
@@ -106,10 +228,7 @@ class GameScreen(Screen):
             pygame.draw.rect(self.game.screen, (255, 0, 0), fill_rect)
 
         # Draw center line
-        pygame.draw.line(self.game.screen, (200, 200, 200),
-                         (self.throttle_brake_rect.left, center_y),
-                         (self.throttle_brake_rect.right, center_y),
-                         2)
+        self.game.screen.blit(self._throttle_brake_center_line, self.throttle_brake_rect)
 
     def _draw_steering_wheel(self, x_input):
         """Draw the rotating steering wheel."""
@@ -123,7 +242,7 @@ class GameScreen(Screen):
         angle = -x_input * self.MAX_ROTATION  # Negative because pygame rotation is clockwise
 
         # Rotate the wheel image
-        rotated_wheel = pygame.transform.rotate(self.wheel_image, angle)
+        rotated_wheel = self._wheel_sprites.get(angle)
 
         # Get the rect of the rotated image and center it
         rotated_rect = rotated_wheel.get_rect(center=self.wheel_rect.center)
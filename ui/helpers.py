@@ -1,3 +1,4 @@
+import numpy as np
 import pygame
 
 RED = [255, 0, 0, 255]
@@ -19,7 +20,40 @@ def draw_rect(screen, image, center, angle):
     rect = rotated.get_rect(center = center)
     screen.blit(rotated, rect)
 
+def prerender(size, draw_function) -> pygame.Surface:
+    """
+    draw static content once into a transparent surface of `size` so it can be
+    blitted every frame instead of redrawn: `draw_function(surface)` does the drawing
+    """
+    surface = pygame.Surface(size, pygame.SRCALPHA)
+    surface.fill((0, 0, 0, 0))
+    draw_function(surface)
+    return surface
+
 def scale_and_rotate(image: pygame.Surface, scale: float = 1, angle: float = 0) -> pygame.Surface:
     image = pygame.transform.scale(image, (int(image.get_width() * scale), int(image.get_height() * scale)))
     image = pygame.transform.rotate(image, angle)
     return image
+
+def draw_car(screen, center, car_rotation, wheel_rotation, car_sprites, wheel_sprites, wheel_offset):
+    """
+    draw a car sprite and its four wheels centred on `center`: `car_rotation` is the
+    heading in degrees, `wheel_rotation` the front wheels' turn relative to it and
+    `wheel_offset` the (across, along) distance in pixels from the centre to each wheel
+    """
+    car_angle_rotated = -car_rotation - 90
+    car_direction = np.array([np.cos(np.deg2rad(car_angle_rotated)), np.sin(np.deg2rad(car_angle_rotated))])
+    car_direction_norm = car_direction / np.linalg.norm(car_direction)
+    car_direction_perpendicular_norm = np.array([-car_direction_norm[1], car_direction_norm[0]])
+    across = car_direction_perpendicular_norm * wheel_offset[0]
+    along = car_direction_norm * wheel_offset[1]
+
+    rotated_front_wheel = wheel_sprites.get(car_rotation + wheel_rotation)
+    rotated_rear_wheel = wheel_sprites.get(car_rotation)
+    # front wheels are at -along, the rear wheels at +along
+    for wheel, position in ((rotated_front_wheel, center - across - along), (rotated_front_wheel, center + across - along),
+                            (rotated_rear_wheel, center - across + along), (rotated_rear_wheel, center + across + along)):
+        screen.blit(wheel, wheel.get_rect(center=(position[0], position[1])))
+
+    rotated_car = car_sprites.get(car_rotation)
+    screen.blit(rotated_car, rotated_car.get_rect(center=(center[0], center[1])))
@@ -0,0 +1,81 @@
+import pygame
+
+
+class HudItem:
+    def __init__(self, rect: pygame.Rect, draw, state):
+        self.rect = pygame.Rect(rect)
+        self.draw = draw
+        self.state = state
+        self.last_state = None
+
+
+class HudLayer:
+    """Retained-mode HUD drawn over a cached copy of the world layer.
+
+    Each item has a screen rect, a `draw()` callable and a `state()` callable returning
+    something comparable that changes whenever the item would look different. While
+    the world below is static, `redraw_dirty` restores only the rects of items whose
+    state changed from the cached world, redraws those items and returns the rects
+    to present. Items overlapping a dirty item are redrawn with it, in the order
+    they were added.
+    """
+
+    def __init__(self, screen: pygame.Surface):
+        self._screen = screen
+        self._items = []
+        self._world = None
+        self._has_world = False
+
+    def add(self, rect, draw, state) -> HudItem:
+        item = HudItem(rect, draw, state)
+        self._items.append(item)
+        return item
+
+    @property
+    def has_world(self) -> bool:
+        return self._has_world
+
+    def capture_world(self):
+        """Keep a copy of what is on screen now, before the HUD is drawn, as the world layer."""
+        if self._world is None or self._world.get_size() != self._screen.get_size():
+            self._world = pygame.Surface(self._screen.get_size()).convert(self._screen)
+        self._world.blit(self._screen, (0, 0))
+        self._has_world = True
+
+    def release_world(self):
+        self._has_world = False
+
+    def draw_all(self):
+        for item in self._items:
+            item.last_state = item.state()
+            item.draw()
+
+    def redraw_dirty(self):
+        """Redraw the items whose state changed over the cached world and return their rects."""
+        dirty = []
+        for item in self._items:
+            state = item.state()
+            if state != item.last_state:
+                item.last_state = state
+                dirty.append(item)
+        if not dirty:
+            return []
+
+        # restoring a rect erases whatever else overlaps it, so those items are redrawn too
+        grown = True
+        while grown:
+            grown = False
+            for item in self._items:
+                if item not in dirty and item.rect.collidelist([other.rect for other in dirty]) != -1:
+                    dirty.append(item)
+                    grown = True
+
+        rects = [item.rect for item in dirty]
+        for rect in rects:
+            self._screen.blit(self._world, rect, rect)
+        for item in self._items:
+            if item in dirty:
+                self._screen.set_clip(item.rect)
+                item.draw()
+        self._screen.set_clip(None)
+        return rects
@@ -1,19 +1,36 @@
+from collections import deque
+from dataclasses import dataclass
+
 import pygame
 
 
+@dataclass(frozen=True)
 class ControlsInput:
-    def __init__(self):
-        self.x = 0  # -1 for left, 1 for right
-        self.y = 0  # -1 for up, 1 for down
+    """The controls at one instant, published once per physics step and never changed afterwards."""
+    x: float = 0.0  # -1 for left, 1 for right
+    y: float = 0.0  # -1 for braking, 1 for throttle
+    time: float = 0.0  # ms on the pygame.time.get_ticks() clock
 
 class InputHandler:
+    """Keyboard controls, ramped up while a key is held and faded out after it is released.
+
+    Key events are queued with the time they were handled and only take effect in
+    `sample(time)`, which the game calls once per physics step with the time that step
+    stands for. Each step thus sees the ramps at its own time rather than every step of
+    a frame sharing one value, and the game draws the same snapshot the physics used.
+    `get_input()` returns the last published snapshot without recomputing it.
+    """
+
     TIME_UNTIL_MAX_INPUT_Y = 500  # ms
     TIME_UNTIL_MAX_INPUT_X = 1000  # ms
     TIME_TO_FADE_BACK_Y = 50  # ms
     TIME_TO_FADE_BACK_X = 250  # ms
 
+    KEYS = (pygame.K_w, pygame.K_s, pygame.K_a, pygame.K_d)
+
     def __init__(self):
         self._input = ControlsInput()
+        self._events = deque()  # (time, key, pressed) not yet applied
         self._start_time_x = None
         self._start_time_y = None
         self._release_time_x = None
@@ -26,109 +43,113 @@ class InputHandler:
         self._a_down = False
         self._d_down = False
 
-    def get_input(self):
-        self.update_input()
+    def get_input(self) -> ControlsInput:
         return self._input
 
     def handle_input(self, event: pygame.event.Event):
-        if event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_w:
-                self._handle_w_pressed()
-            elif event.key == pygame.K_s:
-                self._handle_s_pressed()
-            elif event.key == pygame.K_a:
-                self._handle_a_pressed()
-            elif event.key == pygame.K_d:
-                self._handle_d_pressed()
-        elif event.type == pygame.KEYUP:
-            if event.key == pygame.K_w:
-                self._handle_w_released()
-            elif event.key == pygame.K_s:
-                self._handle_s_released()
-            elif event.key == pygame.K_a:
-                self._handle_a_released()
-            elif event.key == pygame.K_d:
-                self._handle_d_released()
-
-    def update_input(self):
-        current_time = pygame.time.get_ticks()
-
-        # Handle Y-axis (acceleration/braking)
+        # pygame does not pass on SDL's event timestamps, the time it is handled has to do
+        if event.type in (pygame.KEYDOWN, pygame.KEYUP) and event.key in self.KEYS:
+            self._events.append((pygame.time.get_ticks(), event.key, event.type == pygame.KEYDOWN))
+
+    def sample(self, time: float) -> ControlsInput:
+        """Apply the key events up to `time` ms, then publish and return the controls at that time."""
+        time = max(time, self._input.time)
+        while self._events and self._events[0][0] <= time:
+            event_time, key, pressed = self._events.popleft()
+            self._apply_key(key, pressed, event_time)
+        self._input = ControlsInput(self._input_x(time), self._input_y(time), time)
+        return self._input
+
+    def _apply_key(self, key, pressed, time):
+        if pressed:
+            if key == pygame.K_w:
+                self._handle_w_pressed(time)
+            elif key == pygame.K_s:
+                self._handle_s_pressed(time)
+            elif key == pygame.K_a:
+                self._handle_a_pressed(time)
+            elif key == pygame.K_d:
+                self._handle_d_pressed(time)
+        else:
+            if key == pygame.K_w:
+                self._handle_w_released(time)
+            elif key == pygame.K_s:
+                self._handle_s_released(time)
+            elif key == pygame.K_a:
+                self._handle_a_released(time)
+            elif key == pygame.K_d:
+                self._handle_d_released(time)
+
+    def _input_y(self, current_time):
+        # acceleration/braking
         if self._w_down:
-            time_diff = current_time - self._start_time_y
-            self._input.y = min(time_diff / self.TIME_UNTIL_MAX_INPUT_Y, 1)
-            self._last_value_y = self._input.y
-        elif self._s_down:
-            time_diff = current_time - self._start_time_y
-            self._input.y = -min(time_diff / self.TIME_UNTIL_MAX_INPUT_Y, 1)
-            self._last_value_y = self._input.y
-        elif self._release_time_y is not None:
+            return min((current_time - self._start_time_y) / self.TIME_UNTIL_MAX_INPUT_Y, 1)
+        if self._s_down:
+            return -min((current_time - self._start_time_y) / self.TIME_UNTIL_MAX_INPUT_Y, 1)
+        if self._release_time_y is not None:
             time_since_release = current_time - self._release_time_y
             if time_since_release < self.TIME_TO_FADE_BACK_Y:
-                fade_factor = 1 - (time_since_release / self.TIME_TO_FADE_BACK_Y)
-                self._input.y = self._last_value_y * fade_factor
-            else:
-                self._input.y = 0
-                self._release_time_y = None
-        else:
-            self._input.y = 0
+                return self._last_value_y * (1 - time_since_release / self.TIME_TO_FADE_BACK_Y)
+            self._release_time_y = None
+        return 0.0
 
-        # Handle X-axis (steering)
+    def _input_x(self, current_time):
+        # steering
         if self._a_down:
-            time_diff = current_time - self._start_time_x
-            self._input.x = -min(time_diff / self.TIME_UNTIL_MAX_INPUT_X, 1)
-            self._last_value_x = self._input.x
-        elif self._d_down:
-            time_diff = current_time - self._start_time_x
-            self._input.x = min(time_diff / self.TIME_UNTIL_MAX_INPUT_X, 1)
-            self._last_value_x = self._input.x
-        elif self._release_time_x is not None:
+            return -min((current_time - self._start_time_x) / self.TIME_UNTIL_MAX_INPUT_X, 1)
+        if self._d_down:
+            return min((current_time - self._start_time_x) / self.TIME_UNTIL_MAX_INPUT_X, 1)
+        if self._release_time_x is not None:
             time_since_release = current_time - self._release_time_x
             if time_since_release < self.TIME_TO_FADE_BACK_X:
-                fade_factor = 1 - (time_since_release / self.TIME_TO_FADE_BACK_X)
-                self._input.x = self._last_value_x * fade_factor
-            else:
-                self._input.x = 0
-                self._release_time_x = None
-        else:
-            self._input.x = 0
+                return self._last_value_x * (1 - time_since_release / self.TIME_TO_FADE_BACK_X)
+            self._release_time_x = None
+        return 0.0
 
-    def _handle_w_pressed(self):
+    def _handle_w_pressed(self, time):
         self._w_down = True
         self._s_down = False
-        self._start_time_y = pygame.time.get_ticks()
+        self._start_time_y = time
         self._release_time_y = None
 
-    def _handle_w_released(self):
+    def _handle_w_released(self, time):
+        if self._w_down:
+            self._last_value_y = self._input_y(time)
         self._w_down = False
-        self._release_time_y = pygame.time.get_ticks()
+        self._release_time_y = time
 
-    def _handle_s_pressed(self):
+    def _handle_s_pressed(self, time):
         self._s_down = True
         self._w_down = False
-        self._start_time_y = pygame.time.get_ticks()
+        self._start_time_y = time
         self._release_time_y = None
 
-    def _handle_s_released(self):
+    def _handle_s_released(self, time):
+        if self._s_down:
+            self._last_value_y = self._input_y(time)
         self._s_down = False
-        self._release_time_y = pygame.time.get_ticks()
+        self._release_time_y = time
 
-    def _handle_a_pressed(self):
+    def _handle_a_pressed(self, time):
         self._a_down = True
         self._d_down = False
-        self._start_time_x = pygame.time.get_ticks()
+        self._start_time_x = time
         self._release_time_x = None
 
-    def _handle_a_released(self):
+    def _handle_a_released(self, time):
+        if self._a_down:
+            self._last_value_x = self._input_x(time)
         self._a_down = False
-        self._release_time_x = pygame.time.get_ticks()
+        self._release_time_x = time
 
-    def _handle_d_pressed(self):
+    def _handle_d_pressed(self, time):
         self._d_down = True
         self._a_down = False
-        self._start_time_x = pygame.time.get_ticks()
+        self._start_time_x = time
         self._release_time_x = None
 
-    def _handle_d_released(self):
+    def _handle_d_released(self, time):
+        if self._d_down:
+            self._last_value_x = self._input_x(time)
         self._d_down = False
-        self._release_time_x = pygame.time.get_ticks()
\ No newline at end of file
+        self._release_time_x = time
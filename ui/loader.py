@@ -0,0 +1,32 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+class BackgroundLoader:
+    """Runs `load(advance)` on a worker thread while the caller keeps drawing.
+
+    `load` calls `advance()` after each of its `total_steps` steps so `progress` can be
+    shown. `future` resolves to the return value of `load`, `result()` waits for it and
+    re-raises anything `load` raised.
+    """
+
+    def __init__(self, load, total_steps: int):
+        self.total_steps = total_steps
+        self.completed_steps = 0
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="asset-loader")
+        self.future: Future = executor.submit(load, self._advance)
+        executor.shutdown(wait=False)
+
+    def _advance(self):
+        self.completed_steps += 1
+
+    @property
+    def progress(self) -> float:
+        if self.future.done():
+            return 1.0
+        return min(self.completed_steps / self.total_steps, 1.0) if self.total_steps else 0.0
+
+    def done(self) -> bool:
+        return self.future.done()
+
+    def result(self):
+        return self.future.result()
@@ -0,0 +1,89 @@
+import numpy as np
+import pygame
+
+
+class TiledMap:
+    """Track image and an optional overlay (the racing line), cut into tiles.
+
+    The overlay is composited onto the map once at load time, so drawing is a single
+    blit per tile whichever layers are shown. Tiles are cropped to their visible
+    pixels, fully transparent tiles are dropped, and `draw` only blits the tiles that
+    intersect the screen.
+    """
+
+    TILE_SIZE = 512
+
+    def __init__(self, image: pygame.Surface, overlay: pygame.Surface = None, tile_size: int = TILE_SIZE):
+        self.tile_size = tile_size
+        # the map is placed by the track image's rect, the overlay may extend beyond it
+        self.width, self.height = image.get_size()
+        self.columns = -(-max(self.width, overlay.get_width() if overlay else 0) // tile_size)
+        self.rows = -(-max(self.height, overlay.get_height() if overlay else 0) // tile_size)
+        self.show_overlay = overlay is not None
+
+        # (column, row) -> (x, y, surface), x and y relative to the map's top left corner
+        self._tiles = {key: (bounds.x, bounds.y, image.subsurface(bounds))
+                       for key, bounds in self._tile_bounds(image, tile_size).items()}
+        self._overlay_tiles = dict(self._tiles)
+        if overlay is not None:
+            for column, row in self._tile_bounds(overlay, tile_size):
+                rect = pygame.Rect(column * tile_size, row * tile_size, tile_size, tile_size)
+                self._overlay_tiles[(column, row)] = self._composite(image, overlay, rect)
+
+    @staticmethod
+    def _tile_bounds(image, tile_size):
+        """Map each tile with visible pixels to the rect bounding them, in image coordinates."""
+        width, height = image.get_size()
+        tiles = [((column, row), pygame.Rect(column * tile_size, row * tile_size, tile_size, tile_size).clip(image.get_rect()))
+                 for row in range(-(-height // tile_size)) for column in range(-(-width // tile_size))]
+        if not image.get_flags() & pygame.SRCALPHA:
+            return dict(tiles)
+
+        # equivalent to get_bounding_rect per tile, but one pass over the alpha plane
+        bounds = {}
+        alpha = pygame.surfarray.pixels_alpha(image)
+        for key, rect in tiles:
+            block = alpha[rect.left:rect.right, rect.top:rect.bottom]
+            used_columns = np.flatnonzero(block.any(axis=1))
+            if len(used_columns) == 0:
+                continue
+            used_rows = np.flatnonzero(block.any(axis=0))
+            bounds[key] = pygame.Rect(rect.left + used_columns[0], rect.top + used_rows[0],
+                                      used_columns[-1] - used_columns[0] + 1, used_rows[-1] - used_rows[0] + 1)
+        del alpha
+        return bounds
+
+    @classmethod
+    def _composite(cls, image, overlay, rect):
+        surface = pygame.Surface(rect.size, pygame.SRCALPHA)
+        surface.blit(image, (0, 0), rect)
+        surface.blit(overlay, (0, 0), rect)
+        bounds = cls._tile_bounds(surface, rect.width)[(0, 0)]
+        return rect.x + bounds.x, rect.y + bounds.y, surface.subsurface(bounds)
+
+    def get_rect(self, center) -> pygame.Rect:
+        rect = pygame.Rect(0, 0, self.width, self.height)
+        rect.center = center
+        return rect
+
+    def visible_tiles(self, rect: pygame.Rect, viewport: pygame.Rect):
+        """Yield the keys of the tiles that intersect `viewport` when the map is placed at `rect`."""
+        size = self.tile_size
+        first_column = max((viewport.left - rect.left) // size, 0)
+        last_column = min((viewport.right - 1 - rect.left) // size, self.columns - 1)
+        first_row = max((viewport.top - rect.top) // size, 0)
+        last_row = min((viewport.bottom - 1 - rect.top) // size, self.rows - 1)
+        for row in range(first_row, last_row + 1):
+            for column in range(first_column, last_column + 1):
+                yield column, row
+
+    def draw(self, screen: pygame.Surface, center):
+        rect = self.get_rect(center=center)
+        tiles = self._overlay_tiles if self.show_overlay else self._tiles
+        blits = []
+        for key in self.visible_tiles(rect, screen.get_clip()):
+            tile = tiles.get(key)
+            if tile is not None:
+                x, y, surface = tile
+                blits.append((surface, (rect.left + x, rect.top + y)))
+        screen.blits(blits, doreturn=False)
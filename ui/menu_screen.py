@@ -2,7 +2,10 @@ import sys
 
 import pygame
 
+from ui.assets import load_image
+from ui.hud import HudLayer
 from ui.screen import Screen
+from ui.text_cache import get_font, render_text
 from ui.widgets.button import Button
 
 class MenuScreen(Screen):
@@ -10,15 +13,15 @@ class MenuScreen(Screen):
     BUTTON_WIDTH = 200
     BUTTON_HEIGHT = 50
     BUTTON_SPACING = 40
+    LOADING_RECT = pygame.Rect(Screen.CENTER_X - 150, Screen.CENTER_Y + 100, 300, 40) # "Loading..." below the buttons
 
     def __init__(self, game):
         self.game = game
 
         # Load and scale background image
         try:
-            self.background = pygame.image.load('assets/background.png').convert_alpha()
-            self.background = pygame.transform.scale(self.background, (Screen.WIDTH, Screen.HEIGHT))
-        except pygame.error as e:
+            self.background = load_image('assets/background.png', size=(Screen.WIDTH, Screen.HEIGHT))
+        except (pygame.error, OSError) as e:
             print(f"Couldn't load background image: {e}")
             self.background = pygame.Surface((Screen.WIDTH, Screen.HEIGHT))
             self.background.fill((0, 0, 0))
@@ -30,19 +33,50 @@ class MenuScreen(Screen):
                    "Exit")
         ]
 
+        # "Start Game" waits for the game assets loading in the background, showing progress
+        self._start_requested = False
+        self._font = get_font(36)
+
+        # the background never changes, only buttons are redrawn when their hover state does
+        self._hud = HudLayer(self.game.screen)
+        for button in self.menu_buttons:
+            self._hud.add(button.rect, lambda button=button: button.draw(self.game.screen),
+                          lambda button=button: button.current_color)
+        self._hud.add(self.LOADING_RECT, self._draw_loading, self._loading_state)
+
     def handle_event(self, event):
         for i, button in enumerate(self.menu_buttons):
             if button.handle_event(event):
                 if i == 0:
-                    self.game.set_screen("game")
+                    self._start_requested = True
                 elif i == 1:
                     pygame.quit()
                     sys.exit()
 
+    def _loading_state(self):
+        if not self._start_requested:
+            return None
+        return int(self.game.game_loader.progress * 100)
+
+    def _draw_loading(self):
+        percent = self._loading_state()
+        if percent is None:
+            return
+        text = render_text(self._font, f"Loading... {percent}%", (255, 255, 255))
+        self.game.screen.blit(text, text.get_rect(center=self.LOADING_RECT.center))
+
     def draw(self, dt):
         """Draw menu screen."""
+        if self._start_requested and self.game.game_loader.done():
+            self._start_requested = False
+            self.game.set_screen("game")
+            return []
+        if not self._full_redraw:
+            return self._hud.redraw_dirty()
+        self._full_redraw = False
+
         # Draw background first
         self.game.screen.blit(self.background, (0, 0))
+        self._hud.capture_world()
         # Then draw buttons on top
-        for button in self.menu_buttons:
-            button.draw(self.game.screen)
\ No newline at end of file
+        self._hud.draw_all()
\ No newline at end of file
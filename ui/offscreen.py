@@ -0,0 +1,164 @@
+"""Rendering into NumPy frame buffers, without a window.
+
+`SpriteRenderer` draws the game's view (track, car and wheel sprites) around each of
+`n` cars; `TopDownRenderer` is a cheap low-resolution top-down view built from NumPy
+indexing alone. Both fill one preallocated `(n, height, width, 3)` uint8 array per
+call and return it, so the frames are overwritten by the next `render`. Rows are
+world y and columns world x, as on screen.
+"""
+import os
+
+import numpy as np
+import pygame
+
+from ui.game_drawer import GameDrawer, GameDrawerAssets
+from ui.helpers import draw_car
+from ui.sprite_cache import RotatedSpriteCache
+
+BACKGROUND = (0, 0, 0) # what the game draws beyond the track
+
+
+def init_headless_display():
+    """Start pygame's display on SDL's dummy video driver, with a 1x1 mode so images can be converted, and its fonts.
+
+    The driver is only chosen if `SDL_VIDEODRIVER` is unset and the display is not
+    yet initialised, so in a running game this just returns.
+    """
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.display.init()
+    pygame.font.init()
+    if pygame.display.get_surface() is None:
+        pygame.display.set_mode((1, 1))
+
+
+class FrameBuffers:
+    """`n` frames of `size` pixels in one array, each frame also a surface drawing straight into it.
+
+    The surfaces wrap the array's memory (`pygame.image.frombuffer`), so a blit onto
+    `surfaces[i]` writes `array[i]` with no copy. `rgb` is a view without the padding byte.
+    """
+
+    def __init__(self, n: int, size):
+        width, height = size
+        self.size = (width, height)
+        self.array = np.zeros((n, height, width, 4), dtype=np.uint8)
+        self.rgb = self.array[..., :3]
+        self.surfaces = [pygame.image.frombuffer(self.array[i], self.size, "RGBX") for i in range(n)]
+
+
+class SpriteRenderer:
+    """The game's view centred on each of `n` cars, at the game's `PX_M_RATIO_SCREEN` pixels per metre.
+
+    Uses the `GameDrawerAssets` of the game, loading them (and a dummy display) if none
+    are given. With `shared=True` the cars are in one scene and each frame also shows
+    the others within its view; otherwise each frame shows only its own car.
+    """
+
+    def __init__(self, n: int, size=(256, 256), assets: GameDrawerAssets = None, shared: bool = False):
+        if assets is None:
+            init_headless_display()
+            assets = GameDrawerAssets()
+        self.n = n
+        self.shared = shared
+        self.buffers = FrameBuffers(n, size)
+        self._map = assets.map
+        self._car_sprites = RotatedSpriteCache(assets.car_image, GameDrawer.SPRITE_ANGLE_STEP)
+        self._wheel_sprites = RotatedSpriteCache(assets.wheel_image, GameDrawer.SPRITE_ANGLE_STEP)
+        self._wheel_offset = (GameDrawer.WHEEL_X_OFFSET * assets.car_image_scaling_factor,
+                              GameDrawer.WHEEL_Y_OFFSET * assets.car_image_scaling_factor)
+        self._margin = max(assets.car_image.get_size())
+        self._center = np.array(size, dtype=np.float64) / 2
+
+    def render(self, positions, angles, steer_angles=None) -> np.ndarray:
+        """Frames around `positions` `(n, 2)` with headings `angles` (rad); steer angles turn the front wheels."""
+        positions = np.asarray(positions, dtype=np.float64).reshape(self.n, 2)
+        rotations = np.rad2deg(np.asarray(angles, dtype=np.float64).reshape(self.n))
+        wheel_rotations = (np.zeros(self.n) if steer_angles is None
+                           else np.rad2deg(np.asarray(steer_angles, dtype=np.float64).reshape(self.n)) * GameDrawer.WHEEL_TURN_PER_STEER)
+        scale = GameDrawer.PX_M_RATIO_SCREEN
+        width, height = self.buffers.size
+        for i, surface in enumerate(self.buffers.surfaces):
+            surface.fill(BACKGROUND)
+            # world origin is the centre of the map image
+            self._map.draw(surface, self._center - positions[i] * scale)
+            cars = range(self.n) if self.shared else (i,)
+            for j in cars:
+                center = self._center + (positions[j] - positions[i]) * scale
+                if (-self._margin < center[0] < width + self._margin) and (-self._margin < center[1] < height + self._margin):
+                    draw_car(surface, center, rotations[j], wheel_rotations[j], self._car_sprites,
+                             self._wheel_sprites, self._wheel_offset)
+        return self.buffers.rgb
+
+
+class TopDownRenderer:
+    """Low-resolution top-down frames around each of `n` cars, with no sprites and no display.
+
+    The track image is scaled once to `pixels_per_metre`; each frame is then one
+    gather from it and the car a filled rectangle, its front half in `NOSE_COLOR`,
+    for all `n` cars in a few array operations. Each frame shows only its own car.
+    """
+
+    CAR_LENGTH = 1277 / GameDrawer.PX_M_RATIO_CAR_IMAGE # m, as car_blue.png is drawn
+    CAR_WIDTH = 707 / GameDrawer.PX_M_RATIO_CAR_IMAGE # m
+    CAR_COLOR = (40, 90, 255)
+    NOSE_COLOR = (255, 255, 255)
+
+    def __init__(self, n: int, size=(64, 64), pixels_per_metre: float = 2.0, track_path: str = 'assets/new_racetrack.png'):
+        self.n = n
+        self.pixels_per_metre = pixels_per_metre
+        width, height = size
+        self.frames = np.zeros((n, height, width, 3), dtype=np.uint8)
+        self._index = np.empty((n, height, width), dtype=np.intp)
+        self._map, self._origin = self._load_map(track_path, pixels_per_metre)
+
+        # pixel centres relative to the frame centre, in m
+        self._offset_x = (np.arange(width) - width / 2 + 0.5) / pixels_per_metre
+        self._offset_y = (np.arange(height) - height / 2 + 0.5) / pixels_per_metre
+        # the pixels the car can cover at any heading
+        reach = np.hypot(self.CAR_LENGTH, self.CAR_WIDTH) / 2
+        self._car_columns = np.flatnonzero(np.abs(self._offset_x) <= reach + 1 / pixels_per_metre)
+        self._car_rows = np.flatnonzero(np.abs(self._offset_y) <= reach + 1 / pixels_per_metre)
+
+    @staticmethod
+    def _load_map(path, pixels_per_metre):
+        """The track as flat `(pixels, 3)` colours with a border of `BACKGROUND`, and the world origin in its pixels."""
+        image = pygame.image.load(path)
+        if image.get_bitsize() != 32:
+            image = pygame.Surface(image.get_size(), pygame.SRCALPHA, 32)
+            image.blit(pygame.image.load(path), (0, 0))
+        scale = pixels_per_metre / GameDrawer.PX_M_RATIO_MAP_IMAGE
+        width, height = image.get_size()
+        image = pygame.transform.smoothscale(image, (max(round(width * scale), 1), max(round(height * scale), 1)))
+        alpha = pygame.surfarray.array_alpha(image)[..., None] / 255
+        colors = pygame.surfarray.array3d(image) * alpha + np.array(BACKGROUND) * (1 - alpha)
+
+        # (x, y) -> (row, column) plus a border, indices beyond the map are clipped onto it
+        padded = np.empty((image.get_height() + 2, image.get_width() + 2, 3), dtype=np.uint8)
+        padded[...] = BACKGROUND
+        padded[1:-1, 1:-1] = np.round(colors).astype(np.uint8).transpose(1, 0, 2)
+        return padded, np.array(image.get_size()) / 2 + 1
+
+    def render(self, positions, angles, steer_angles=None) -> np.ndarray:
+        """Frames around `positions` `(n, 2)` with headings `angles` (rad); steer angles are not drawn."""
+        positions = np.asarray(positions, dtype=np.float64).reshape(self.n, 2)
+        angles = np.asarray(angles, dtype=np.float64).reshape(self.n)
+        rows, columns = self._map.shape[:2]
+        column = np.clip(np.floor((positions[:, 0, None] + self._offset_x) * self.pixels_per_metre + self._origin[0]),
+                         0, columns - 1).astype(np.intp)
+        row = np.clip(np.floor((positions[:, 1, None] + self._offset_y) * self.pixels_per_metre + self._origin[1]),
+                      0, rows - 1).astype(np.intp)
+        np.add(row[:, :, None] * columns, column[:, None, :], out=self._index)
+        np.take(self._map.reshape(-1, 3), self._index, axis=0, out=self.frames)
+
+        # the car in its own coordinates, forward is (sin, cos), over the pixels around the centre only
+        sin = np.sin(angles)[:, None, None]
+        cos = np.cos(angles)[:, None, None]
+        x = self._offset_x[self._car_columns][None, None, :]
+        y = self._offset_y[self._car_rows][None, :, None]
+        along = x * sin + y * cos
+        across = x * cos - y * sin
+        body = (np.abs(along) <= self.CAR_LENGTH / 2) & (np.abs(across) <= self.CAR_WIDTH / 2)
+        patch = self.frames[:, self._car_rows[0]:self._car_rows[-1] + 1, self._car_columns[0]:self._car_columns[-1] + 1]
+        patch[body] = self.CAR_COLOR
+        patch[body & (along > 0)] = self.NOSE_COLOR
+        return self.frames
@@ -0,0 +1,69 @@
+import pygame
+
+from core.profiler import Profiler
+from ui.text_cache import get_font, render_text
+
+
+class ProfilerOverlay:
+    """Panel with each profiler section's mean, p99 and mean self time over the last `WINDOW` frames and a frame time graph.
+
+    Sections are listed as a tree under the frame, each indented below its parent. The panel is opaque and redrawn in full every frame, so it can be drawn over a
+    screen that only redraws its dirty rects; `draw` returns the rect to present.
+    """
+
+    WINDOW = 120 # frames the statistics cover
+    GRAPH_FRAMES = 240
+    GRAPH_HEIGHT = 100
+    LINE_HEIGHT = 20
+    INDENT = 14 # px per level of nesting
+    COLUMNS = (270, 350, 430) # right edges of the mean, p99 and self columns
+    LEFT = 30
+    TOP = 320
+    WIDTH = 460
+    BACKGROUND = (20, 20, 20)
+    TEXT_COLOR = (230, 230, 230)
+    GRAPH_COLOR = (0, 220, 120)
+    TARGET_COLOR = (200, 60, 60)
+
+    def __init__(self, target_frame_time: float):
+        self.target_frame_time = target_frame_time
+
+    def rect(self, profiler: Profiler) -> pygame.Rect:
+        lines = len(profiler.names) + 2 # header and frame
+        return pygame.Rect(self.LEFT, self.TOP, self.WIDTH, lines * self.LINE_HEIGHT + self.GRAPH_HEIGHT + 20)
+
+    def draw(self, screen: pygame.Surface, profiler: Profiler) -> pygame.Rect:
+        rect = self.rect(profiler)
+        screen.fill(self.BACKGROUND, rect)
+        font = get_font(22)
+        x = rect.left + 10
+        y = rect.top + 5
+        stats = profiler.stats(self.WINDOW)
+        self._draw_row(screen, font, x, y, 0, "section", ("mean ms", "p99 ms", "self ms"))
+        for path, depth in [("frame", -1)] + profiler.tree():
+            y += self.LINE_HEIGHT
+            times = stats.get(path, (0.0, 0.0, 0.0))
+            self._draw_row(screen, font, x, y, (depth + 1) * self.INDENT, path.rpartition("/")[2],
+                           [f"{value * 1000:.2f}" for value in times])
+        self._draw_graph(screen, profiler, pygame.Rect(x, y + self.LINE_HEIGHT + 5, rect.width - 20, self.GRAPH_HEIGHT))
+        return rect
+
+    def _draw_row(self, screen, font, x, y, indent, name, columns):
+        screen.blit(render_text(font, name, self.TEXT_COLOR), (x + indent, y))
+        # numbers right-aligned in their columns, only the name is indented
+        for text, right in zip(columns, self.COLUMNS):
+            surface = render_text(font, text, self.TEXT_COLOR)
+            screen.blit(surface, (x + right - surface.get_width(), y))
+
+    def _draw_graph(self, screen, profiler, rect):
+        # frame times from 0 at the bottom to twice the target at the top, clipped
+        scale = rect.height / (2 * self.target_frame_time)
+        target_y = rect.bottom - self.target_frame_time * scale
+        pygame.draw.line(screen, self.TARGET_COLOR, (rect.left, target_y), (rect.right, target_y))
+        frame_times = profiler.frame_times()[-self.GRAPH_FRAMES:]
+        if len(frame_times) < 2:
+            return
+        step = rect.width / (self.GRAPH_FRAMES - 1)
+        points = [(rect.left + i * step, rect.bottom - min(frame_time * scale, rect.height))
+                  for i, frame_time in enumerate(frame_times)]
+        pygame.draw.lines(screen, self.GRAPH_COLOR, False, points)
@@ -8,10 +8,18 @@ class Screen(ABC):
     CENTER_X = WIDTH // 2
     CENTER_Y = HEIGHT // 2
 
+    _full_redraw = True
+
     @abstractmethod
     def handle_event(self, event):
         pass
 
     @abstractmethod
     def draw(self, dt):
-        pass
\ No newline at end of file
+        """Draw the screen. Return None after redrawing all of it, or the list of
+        rects that changed (possibly empty) when only those were redrawn."""
+        pass
+
+    def invalidate(self):
+        """Make the next draw redraw the whole screen."""
+        self._full_redraw = True
\ No newline at end of file
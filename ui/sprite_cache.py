@@ -0,0 +1,60 @@
+from collections import OrderedDict
+
+import pygame
+
+
+class RotatedSpriteCache:
+    """Rotated copies of one image, keyed by the angle quantized to `step` degrees.
+
+    `pygame.transform.rotate` is one of the most expensive calls in a frame; with the
+    cache each distinct quantized angle is rotated once. The cache is a bounded LRU of
+    `max_size` surfaces and counts hits and misses.
+    """
+
+    def __init__(self, image: pygame.Surface, step: float = 0.5, max_size: int = 720, precompute: bool = False):
+        self.image = image
+        self.step = step
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._steps_per_turn = round(360 / step)
+        self._sprites = OrderedDict()
+        if precompute:
+            self.precompute()
+
+    def __len__(self):
+        return len(self._sprites)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def get(self, angle: float) -> pygame.Surface:
+        """Return the image rotated by `angle` degrees (counter-clockwise, like `pygame.transform.rotate`)."""
+        key = round(angle / self.step) % self._steps_per_turn
+        sprite = self._sprites.get(key)
+        if sprite is not None:
+            self.hits += 1
+            self._sprites.move_to_end(key)
+            return sprite
+
+        self.misses += 1
+        sprite = pygame.transform.rotate(self.image, key * self.step)
+        self._sprites[key] = sprite
+        if len(self._sprites) > self.max_size:
+            self._sprites.popitem(last=False)
+        return sprite
+
+    def blit(self, screen: pygame.Surface, angle: float, center):
+        sprite = self.get(angle)
+        screen.blit(sprite, sprite.get_rect(center=center))
+
+    def precompute(self):
+        """Rotate the image to every quantized angle up front, as far as `max_size` allows."""
+        for key in range(min(self._steps_per_turn, self.max_size)):
+            if key not in self._sprites:
+                self._sprites[key] = pygame.transform.rotate(self.image, key * self.step)
+
+    def clear(self):
+        self._sprites.clear()
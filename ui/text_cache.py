@@ -0,0 +1,67 @@
+from collections import OrderedDict
+
+import pygame
+
+_fonts = {}
+
+
+def get_font(size: int, name: str = None, sysfont: bool = False) -> pygame.font.Font:
+    """Return the shared font for `(name, size)`, creating it on first use.
+
+    `name` is a font file for `pygame.font.Font` (None for the default font), or a
+    system font name if `sysfont` is set.
+    """
+    key = (name, size, sysfont)
+    font = _fonts.get(key)
+    if font is None:
+        font = pygame.font.SysFont(name, size) if sysfont else pygame.font.Font(name, size)
+        _fonts[key] = font
+    return font
+
+
+class TextCache:
+    """Rendered text surfaces keyed by (font, text, color, antialias), in a bounded LRU.
+
+    Callers format values to their display precision before rendering, so a value
+    that did not change on screen is never rendered again.
+    """
+
+    def __init__(self, max_size: int = 512):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._surfaces = OrderedDict()
+
+    def __len__(self):
+        return len(self._surfaces)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def render(self, font: pygame.font.Font, text: str, color, antialias: bool = True) -> pygame.Surface:
+        key = (font, text, tuple(color), antialias)
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self._surfaces.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self._surfaces[key] = surface
+        if len(self._surfaces) > self.max_size:
+            self._surfaces.popitem(last=False)
+        return surface
+
+    def clear(self):
+        self._surfaces.clear()
+
+
+text_cache = TextCache()
+
+
+def render_text(font: pygame.font.Font, text: str, color, antialias: bool = True) -> pygame.Surface:
+    """Render `text` through the shared `text_cache`."""
+    return text_cache.render(font, text, color, antialias)
@@ -1,5 +1,7 @@
 import pygame
 
+from ui.text_cache import get_font, render_text
+
 
 class Button:
     """A class to create reusable ui buttons for pygame.
@@ -20,12 +22,12 @@ class Button:
         self.base_color = base_color
         self.hover_color = hover_color
         self.current_color = base_color
-        self.font = pygame.font.Font(None, 36)
+        self.font = get_font(36)
 
     def draw(self, surface):
         """Draw the button on the given surface."""
         pygame.draw.rect(surface, self.current_color, self.rect, border_radius=12)
-        text_surface = self.font.render(self.text, True, (0, 0, 0))
+        text_surface = render_text(self.font, self.text, (0, 0, 0))
         text_rect = text_surface.get_rect(center=self.rect.center)
         surface.blit(text_surface, text_rect)
 
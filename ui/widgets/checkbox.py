@@ -1,11 +1,13 @@
 import pygame
 
+from ui.text_cache import get_font, render_text
+
 class Checkbox:
     def __init__(self, x, y, size, label=""):
         self.rect = pygame.Rect(x, y, size, size)
         self.label = label
         self.checked = False
-        self.font = pygame.font.Font(None, 36)
+        self.font = get_font(36)
 
     def draw(self, screen):
         pygame.draw.rect(screen, (255, 255, 255), self.rect, 2)
@@ -13,7 +15,7 @@ class Checkbox:
             pygame.draw.line(screen, (255, 255, 255), (self.rect.left, self.rect.top), (self.rect.right, self.rect.bottom), 2)
             pygame.draw.line(screen, (255, 255, 255), (self.rect.left, self.rect.bottom), (self.rect.right, self.rect.top), 2)
         if self.label:
-            label_surface = self.font.render(self.label, True, (255, 255, 255))
+            label_surface = render_text(self.font, self.label, (255, 255, 255))
             screen.blit(label_surface, (self.rect.right + 10, self.rect.centery - label_surface.get_height() // 2))
 
     def handle_event(self, event):
@@ -1,3 +1,4 @@
+import pygame
 from pygame_widgets.button import Button
 from core.car import CarConfig
 from ui.screen import Screen
@@ -12,9 +13,11 @@ class CarSettingsWidget:
     def __init__(self, car_config: CarConfig, screen):
 
         self._car_config = car_config
+        self._visible = None
 
         current_y = 50
         current_x = Screen.WIDTH -600
+        top_y = current_y
         increment_y = 70
         self.mode_toggle = Toggle(screen, current_x, current_y, 20, 20)
         self.mode_toggle_label = TextBox(screen, current_x + 30, current_y+35, 0, 0, fontSize=30)
@@ -67,6 +70,11 @@ class CarSettingsWidget:
         self.reset_button.hide()
 
         self.sliders = [self.slider_b, self.slider_c, self.slider_m, self.slider_ca_f, self.slider_ca_r, self.slider_max_grip]
+        self.toggles = [self.mode_toggle, self.show_hide_toggle, self.acceleration_toggle, self.resistance_toggle,
+                        self.velocity_toggle, self.friction_circle_toggle]
+
+        # area covered by all the widgets when shown
+        self.rect = pygame.Rect(current_x - 20, top_y - 20, 560, current_y + 40 + 20 - (top_y - 20))
 
     def hide(self):
         for slider in self.sliders:
@@ -98,10 +106,22 @@ class CarSettingsWidget:
     def update(self):
         for slider in self.sliders:
             slider.update()
-        if self.show_hide_toggle.value:
-            self.show()
-        else:
-            self.hide()
+        visible = self.show_hide_toggle.value
+        if visible != self._visible:
+            self._visible = visible
+            if visible:
+                self.show()
+            else:
+                self.hide()
+
+    def state(self):
+        """Everything the widgets' look depends on, so they are only redrawn when it changes."""
+        mouse_position = pygame.mouse.get_pos()
+        if not self.rect.collidepoint(mouse_position):
+            mouse_position = None
+        return (tuple(toggle.value for toggle in self.toggles),
+                tuple(slider.get_value() for slider in self.sliders),
+                mouse_position, pygame.mouse.get_pressed()[0])
 
     def reset(self):
         for slider in self.sliders:
@@ -112,6 +132,8 @@ class CarSettingsWidget:
         self.mode_toggle_label.draw()
         self.show_hide_toggle.draw()
         self.show_hide_toggle_label.draw()
+        if not self._visible:
+            return
         self.velocity_toggle.draw()
         self.velocity_toggle_label.draw()
         self.acceleration_toggle.draw()
@@ -15,6 +15,7 @@ class TextSlider:
         self._slider = Slider(screen, Screen.WIDTH - x_offset, y_offset, width, height, min=0, max=max - min, initial=default - min, step=step, handleRadius=15)
         self._output = TextBox(screen, Screen.WIDTH - x_offset, y_offset, 0, 0, fontSize=30)
         self._update_lambda = update_lambda
+        self._value = None
 
         self.hide()
 
@@ -39,6 +40,9 @@ class TextSlider:
 
     def update(self):
         value = round(self.get_value(), 2)
+        if value == self._value:
+            return
+        self._value = value
         self._output.setText(self._text + ": " + str(value))
         if self._update_lambda is not None:
             self._update_lambda(value)
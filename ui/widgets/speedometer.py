@@ -2,6 +2,9 @@ import pygame
 import math
 import pygame.gfxdraw
 
+from ui.helpers import prerender
+from ui.text_cache import get_font, render_text
+
 
 class Speedometer:
     def __init__(self, x, y, radius, max_speed):
@@ -28,7 +31,11 @@ class Speedometer:
         self.end_angle = math.pi * -0.1    # ~54 degrees (4 o'clock)
 
         # Create font
-        self.font = pygame.font.SysFont('Arial', int(radius * 0.3))
+        self.font = get_font(int(radius * 0.3), 'Arial', sysfont=True)
+
+        # Static dial, baked into a surface and rebuilt when radius or max_speed change
+        self._dial = None
+        self._dial_key = None
 
     def update(self, speed):
         """Update the current speed"""
@@ -68,11 +75,20 @@ class Speedometer:
         else:
             pygame.gfxdraw.line(surface, int(x1), int(y1), int(x2), int(y2), color)
 
-    def draw(self, screen):
-        """Draw the speedometer on the screen"""
+    def _bake_dial(self):
+        """Render the background, markings and numbers into an off-screen surface"""
+        self.font = get_font(int(self.radius * 0.3), 'Arial', sysfont=True)
+        center = self.radius + 1
+        size = 2 * center + 1
+        self._dial = prerender((size, size), lambda surface: self._draw_dial(surface, center, center))
+        self._dial_offset = center
+        self._dial_key = (self.radius, self.max_speed)
+
+    def _draw_dial(self, surface, x, y):
+        """Draw the static part of the speedometer centered at x, y"""
         # Draw the background circle
-        self.draw_aa_circle(screen, self.background_color, (self.x, self.y), self.radius)
-        self.draw_aa_circle(screen, self.marking_color, (self.x, self.y), self.radius, 2)
+        self.draw_aa_circle(surface, self.background_color, (x, y), self.radius)
+        self.draw_aa_circle(surface, self.marking_color, (x, y), self.radius, 2)
 
         # Draw the markings
         for i in range(11):
@@ -81,24 +97,30 @@ class Speedometer:
             angle = self.start_angle + (self.end_angle - self.start_angle) * (speed / self.max_speed)
 
             start_pos = (
-                self.x + (self.radius - 20) * math.cos(angle),
-                self.y - (self.radius - 20) * math.sin(angle)
+                x + (self.radius - 20) * math.cos(angle),
+                y - (self.radius - 20) * math.sin(angle)
             )
             end_pos = (
-                self.x + self.radius * math.cos(angle),
-                self.y - self.radius * math.sin(angle)
+                x + self.radius * math.cos(angle),
+                y - self.radius * math.sin(angle)
             )
 
-            self.draw_aa_line(screen, self.marking_color, start_pos, end_pos, 2)
+            self.draw_aa_line(surface, self.marking_color, start_pos, end_pos, 2)
 
             # Draw speed numbers
             if i % 2 == 0:  # Draw every second number
-                text = self.font.render(str(int(speed)), True, self.text_color)
+                text = render_text(self.font, str(int(speed)), self.text_color)
                 text_pos = (
-                    self.x + (self.radius - 40) * math.cos(angle) - text.get_width() // 2,
-                    self.y - (self.radius - 40) * math.sin(angle) - text.get_height() // 2
+                    x + (self.radius - 40) * math.cos(angle) - text.get_width() // 2,
+                    y - (self.radius - 40) * math.sin(angle) - text.get_height() // 2
                 )
-                screen.blit(text, text_pos)
+                surface.blit(text, text_pos)
+
+    def draw(self, screen):
+        """Draw the speedometer on the screen"""
+        if self._dial_key != (self.radius, self.max_speed):
+            self._bake_dial()
+        screen.blit(self._dial, (self.x - self._dial_offset, self.y - self._dial_offset))
 
         # Draw the needle
         speed_angle = self.start_angle + (self.end_angle - self.start_angle) * (self.current_speed / self.max_speed)
@@ -113,6 +135,6 @@ class Speedometer:
         self.draw_aa_circle(screen, self.needle_color, (self.x, self.y), 10)
 
         # Draw current speed text
-        speed_text = self.font.render(f"{int(self.current_speed)} km/h", True, self.text_color)
+        speed_text = render_text(self.font, f"{int(self.current_speed)} km/h", self.text_color)
         text_pos = (self.x - speed_text.get_width() // 2, self.y + self.radius // 2)
         screen.blit(speed_text, text_pos)
\ No newline at end of file